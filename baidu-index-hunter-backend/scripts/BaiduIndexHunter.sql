@@ -413,6 +413,7 @@ CREATE TABLE `task_statistics` (
   `success_count` int NOT NULL DEFAULT '0' COMMENT '成功数量',
   `fail_count` int NOT NULL DEFAULT '0' COMMENT '失败数量',
   PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_task_keyword_city` (`task_id`,`keyword`,`city_code`),
   KEY `idx_task_id` (`task_id`),
   KEY `idx_keyword` (`keyword`),
   KEY `idx_city_code` (`city_code`)
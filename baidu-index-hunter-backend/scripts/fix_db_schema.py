@@ -1,5 +1,6 @@
 import sys
 import os
+import argparse
 
 # 将项目根目录添加到 python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -8,9 +9,20 @@ from sqlalchemy import text
 from src.data.database import session_scope
 from src.core.logger import log
 
-def fix_task_statistics_schema():
+# 与唯一键 (task_id, keyword, city_code) 冲突、将被删除的重复行（保留 id 最大的一条，NULL 视为空串）
+DUPLICATE_ROWS_SQL = (
+    "FROM task_statistics t1 JOIN task_statistics t2 "
+    "ON t1.task_id = t2.task_id AND COALESCE(t1.keyword, '') = COALESCE(t2.keyword, '') "
+    "AND COALESCE(t1.city_code, '') = COALESCE(t2.city_code, '') AND t1.id < t2.id"
+)
+BACKUP_TABLE = 'task_statistics_dedupe_backup'
+
+
+def fix_task_statistics_schema(dedupe: bool = False):
     """
-    修复 task_statistics 表缺失字段的问题
+    修复 task_statistics 表缺失字段与唯一键的问题
+    :param dedupe: 存在重复行时是否删除（删除前备份到 task_statistics_dedupe_backup）；
+                   为 False 时只输出重复行数量，不添加唯一键
     """
     log.info("开始检查并修复数据库表结构...")
     
@@ -64,7 +76,43 @@ def fix_task_statistics_schema():
             else:
                 log.info(f"列 {col_name} 已存在，跳过")
 
+        # 4. 添加唯一键 (task_id, keyword, city_code)，供批量 upsert 使用
+        try:
+            result = session.exec(text("SHOW INDEX FROM task_statistics WHERE Key_name = 'uk_task_keyword_city'")).all()
+            if result:
+                log.info("唯一键 uk_task_keyword_city 已存在，跳过")
+            else:
+                duplicates = session.exec(text(f"SELECT COUNT(DISTINCT t1.id) {DUPLICATE_ROWS_SQL}")).one()[0]
+                log.info(f"添加唯一键前需删除的重复行: {duplicates}")
+                if duplicates and not dedupe:
+                    log.warning(f"task_statistics 存在 {duplicates} 条重复行，未添加唯一键；"
+                                f"确认后使用 --dedupe 重新运行（删除前会备份到 {BACKUP_TABLE}）")
+                    log.info("数据库表结构修复完成（唯一键未添加）")
+                    return
+                if duplicates:
+                    # 删除前备份将被删除的行
+                    session.exec(text(f"CREATE TABLE IF NOT EXISTS {BACKUP_TABLE} LIKE task_statistics"))
+                    session.exec(text(
+                        f"INSERT IGNORE INTO {BACKUP_TABLE} SELECT DISTINCT t1.* {DUPLICATE_ROWS_SQL}"
+                    ))
+                    deleted = session.exec(text(f"DELETE t1 {DUPLICATE_ROWS_SQL}")).rowcount
+                    log.warning(f"已删除 {deleted} 条重复行，原始数据已备份到 {BACKUP_TABLE}")
+                # 唯一键列中的 NULL 统一为空串
+                session.exec(text("UPDATE task_statistics SET keyword = '' WHERE keyword IS NULL"))
+                session.exec(text("UPDATE task_statistics SET city_code = '' WHERE city_code IS NULL"))
+                session.exec(text(
+                    "ALTER TABLE task_statistics ADD UNIQUE KEY uk_task_keyword_city (task_id, keyword, city_code)"
+                ))
+                session.commit()
+                log.info("唯一键 uk_task_keyword_city 添加成功")
+        except Exception as e:
+            log.error(f"添加唯一键 uk_task_keyword_city 失败: {e}")
+
     log.info("数据库表结构修复完成")
 
 if __name__ == "__main__":
-    fix_task_statistics_schema()
+    parser = argparse.ArgumentParser(description="修复 task_statistics 表结构")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="存在重复行时删除（保留 id 最大的一条，删除前备份）后再添加唯一键")
+    args = parser.parse_args()
+    fix_task_statistics_schema(dedupe=args.dedupe)
@@ -86,6 +86,12 @@ DASHBOARD_SPEC = create_swagger_spec(
     request_in="query"
 )
 
+ENGINE_STATS_SPEC = create_swagger_spec(
+    summary="获取爬虫引擎运行时统计",
+    description="获取当前进程内的解密密钥缓存命中率、Cookie 限速等待等运行时统计",
+    tags=["统计数据"]
+)
+
 
 # ============== API 端点 ==============
 
@@ -193,6 +199,18 @@ def get_dashboard_data(validated_data: DashboardRequest):
         return jsonify(ResponseFormatter.error(ResponseCode.SERVER_ERROR, f"获取大屏数据失败: {str(e)}"))
 
 
+@stats_blueprint.route('/engine_stats', methods=['GET'])
+@swag_from(ENGINE_STATS_SPEC)
+def get_engine_stats():
+    """获取爬虫引擎运行时统计"""
+    try:
+        data = statistics_service.get_engine_stats()
+        return jsonify(ResponseFormatter.success(data, "获取引擎统计成功"))
+    except Exception as e:
+        log.error(f"获取引擎统计失败: {e}")
+        return jsonify(ResponseFormatter.error(ResponseCode.SERVER_ERROR, f"获取引擎统计失败: {str(e)}"))
+
+
 def register_statistics_blueprint(app):
     """注册统计蓝图"""
     app.register_blueprint(stats_blueprint)
\ No newline at end of file
@@ -113,6 +113,18 @@ SPIDER_CONFIG = {
     'proxy_enabled': os.getenv('SPIDER_PROXY_ENABLED', 'False').lower() == 'true',  # 是否启用代理
     'proxy_url': os.getenv('SPIDER_PROXY_URL', ''),  # 代理URL
     'proxy_auth': os.getenv('SPIDER_PROXY_AUTH', ''),  # 代理认证信息
+    'bucket_capacity': int(os.getenv('SPIDER_BUCKET_CAPACITY', 1)),  # 每个Cookie令牌桶的突发容量
+    'rate_limit_per_endpoint': os.getenv('SPIDER_RATE_LIMIT_PER_ENDPOINT', 'False').lower() == 'true',  # 是否按接口细分令牌桶
+}
+
+# 集群模式配置（多个节点/进程共享同一个 Redis 中的 Cookie 租约与限速桶）
+CLUSTER_CONFIG = {
+    'enabled': os.getenv('CLUSTER_MODE', 'False').lower() == 'true',  # 是否启用集群模式
+    'node_id': os.getenv('CLUSTER_NODE_ID', ''),  # 节点标识，为空时自动生成
+    'key_prefix': os.getenv('CLUSTER_KEY_PREFIX', 'baidu_index:cluster'),  # Redis键前缀
+    'lease_ttl': float(os.getenv('CLUSTER_LEASE_TTL', 30)),  # Cookie租约超时时间（秒），防止节点崩溃后租约悬挂
+    'lease_wait_timeout': float(os.getenv('CLUSTER_LEASE_WAIT_TIMEOUT', 60)),  # 所有Cookie都被租用时的最长等待时间（秒）
+    'max_candidates': int(os.getenv('CLUSTER_MAX_CANDIDATES', 50)),  # 每次尝试租用的候选Cookie数量
 }
 
 # 输出配置
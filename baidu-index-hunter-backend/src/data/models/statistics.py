@@ -5,6 +5,7 @@ import json
 from datetime import date, datetime
 from typing import Optional, Any, Dict
 from sqlmodel import Field
+from sqlalchemy import UniqueConstraint
 from pydantic import field_validator
 from src.data.models.base import BaseDataModel
 
@@ -33,6 +34,9 @@ class TaskStatisticsModel(BaseDataModel, table=True):
     对应数据库中的 task_statistics 表
     """
     __tablename__ = "task_statistics"
+    __table_args__ = (
+        UniqueConstraint('task_id', 'keyword', 'city_code', name='uk_task_keyword_city'),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     task_id: str = Field(..., max_length=32)
@@ -7,8 +7,42 @@ from datetime import date, datetime, timedelta
 from sqlmodel import select, col, func, text, desc, asc, case, and_
 from src.data.database import session_scope
 from src.data.repositories.base_repository import BaseRepository
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from src.data.models.statistics import SpiderStatisticsModel, TaskStatisticsModel
 
+# 批量 upsert 每块的行数
+UPSERT_CHUNK_SIZE = 500
+
+# spider_statistics 原子递增；ON DUPLICATE KEY UPDATE 按顺序求值，
+# avg_duration 需在 completed_tasks 递增之前用旧值计算加权平均，success_rate 在计数递增之后计算
+SPIDER_STATISTICS_INCREMENT_SQL = text("""
+    INSERT INTO spider_statistics
+        (stat_date, task_type, total_tasks, completed_tasks, failed_tasks, total_crawled_items,
+         cookie_usage, cookie_ban_count, avg_duration, success_rate, update_time)
+    VALUES
+        (:stat_date, :task_type, :total_tasks, :completed_tasks, :failed_tasks, :total_crawled_items,
+         :cookie_usage, :cookie_ban_count, :avg_duration, :success_rate, :update_time)
+    ON DUPLICATE KEY UPDATE
+        avg_duration = IF(completed_tasks + VALUES(completed_tasks) > 0,
+            (completed_tasks * avg_duration + VALUES(avg_duration) * VALUES(completed_tasks))
+                / (completed_tasks + VALUES(completed_tasks)),
+            avg_duration),
+        total_tasks = total_tasks + VALUES(total_tasks),
+        completed_tasks = completed_tasks + VALUES(completed_tasks),
+        failed_tasks = failed_tasks + VALUES(failed_tasks),
+        total_crawled_items = total_crawled_items + VALUES(total_crawled_items),
+        cookie_usage = cookie_usage + VALUES(cookie_usage),
+        cookie_ban_count = cookie_ban_count + VALUES(cookie_ban_count),
+        success_rate = IF(total_tasks > 0, completed_tasks / total_tasks * 100.0, 0),
+        update_time = VALUES(update_time)
+""")
+
+# 冲突时覆盖的列（唯一键列 task_id/keyword/city_code 除外）
+TASK_STATISTICS_UPDATE_COLUMNS = (
+    'city_name', 'date_range', 'data_type', 'item_count', 'success_count', 'fail_count',
+    'avg_value', 'max_value', 'min_value', 'sum_value', 'extra_data', 'create_time'
+)
+
 class StatisticsRepository:
     """统计数据仓储"""
     
@@ -347,45 +381,50 @@ class StatisticsRepository:
                 session.add(new_stats)
             session.commit()
 
-    def save_task_statistics_batch(self, stats_list: List[Dict[str, Any]]):
-        """批量保存单次爬取关键词的统计信息"""
+    @staticmethod
+    def _normalize_task_statistics(stats_data: Dict[str, Any]) -> Dict[str, Any]:
+        """将处理器返回的中文键（或已标准化的英文键）转换为 task_statistics 列"""
+        city_code = stats_data.get('城市代码')
+        if city_code is None:
+            city_code = stats_data.get('city_code')
+        return {
+            'task_id': stats_data.get('task_id'),
+            # 唯一键 (task_id, keyword, city_code) 中的 NULL 不参与去重，统一用空串；全国代码 0 需保留
+            'keyword': stats_data.get('关键词') or stats_data.get('keyword') or '',
+            'city_code': '' if city_code is None else str(city_code),
+            'city_name': stats_data.get('城市') or stats_data.get('city_name'),
+            'date_range': stats_data.get('时间范围') or stats_data.get('date_range'),
+            'data_type': stats_data.get('数据类型') or stats_data.get('data_type'),
+            'item_count': stats_data.get('数据项数量') or stats_data.get('item_count', 0),
+            'success_count': stats_data.get('成功数量') or stats_data.get('success_count', 0),
+            'fail_count': stats_data.get('失败数量') or stats_data.get('fail_count', 0),
+            'avg_value': stats_data.get('平均值') or stats_data.get('avg_value'),
+            'max_value': stats_data.get('最大值') or stats_data.get('max_value'),
+            'min_value': stats_data.get('最小值') or stats_data.get('min_value'),
+            'sum_value': stats_data.get('总和') or stats_data.get('sum_value'),
+            'extra_data': stats_data.get('extra_data'),
+            'create_time': datetime.now()
+        }
+
+    @staticmethod
+    def _build_task_statistics_upsert():
+        """INSERT ... ON DUPLICATE KEY UPDATE，依赖唯一键 uk_task_keyword_city"""
+        stmt = mysql_insert(TaskStatisticsModel.__table__)
+        return stmt.on_duplicate_key_update(
+            {column: stmt.inserted[column] for column in TASK_STATISTICS_UPDATE_COLUMNS}
+        )
+
+    def save_task_statistics_batch(self, stats_list: List[Dict[str, Any]], chunk_size: int = UPSERT_CHUNK_SIZE):
+        """
+        批量保存单次爬取关键词的统计信息
+        按 chunk_size 分块 executemany 执行 upsert，每块一次往返
+        """
         if not stats_list: return
+        rows = [self._normalize_task_statistics(stats_data) for stats_data in stats_list]
+        stmt = self._build_task_statistics_upsert()
         with session_scope() as session:
-            for stats_data in stats_list:
-                # 检查是否存在 (同 task_id + keyword + city_code)
-                statement = select(TaskStatisticsModel).where(and_(
-                    TaskStatisticsModel.task_id == stats_data.get('task_id'),
-                    TaskStatisticsModel.keyword == stats_data.get('keyword'),
-                    TaskStatisticsModel.city_code == stats_data.get('city_code', '')
-                ))
-                existing = session.exec(statement).first()
-                
-                # 转换字段名 (从处理器返回的中文键或标准化后的英文键)
-                model_data = {
-                    'task_id': stats_data.get('task_id'),
-                    'keyword': stats_data.get('关键词') or stats_data.get('keyword'),
-                    'city_code': stats_data.get('城市代码') or stats_data.get('city_code'),
-                    'city_name': stats_data.get('城市') or stats_data.get('city_name'),
-                    'date_range': stats_data.get('时间范围') or stats_data.get('date_range'),
-                    'data_type': stats_data.get('数据类型') or stats_data.get('data_type'),
-                    'item_count': stats_data.get('数据项数量') or stats_data.get('item_count', 0),
-                    'success_count': stats_data.get('成功数量') or stats_data.get('success_count', 0),
-                    'fail_count': stats_data.get('失败数量') or stats_data.get('fail_count', 0),
-                    'avg_value': stats_data.get('平均值') or stats_data.get('avg_value'),
-                    'max_value': stats_data.get('最大值') or stats_data.get('max_value'),
-                    'min_value': stats_data.get('最小值') or stats_data.get('min_value'),
-                    'sum_value': stats_data.get('总和') or stats_data.get('sum_value'),
-                    'extra_data': stats_data.get('extra_data'),
-                    'create_time': datetime.now()
-                }
-                
-                if existing:
-                    for key, val in model_data.items():
-                        setattr(existing, key, val)
-                    session.add(existing)
-                else:
-                    new_stats = TaskStatisticsModel(**model_data)
-                    session.add(new_stats)
+            for i in range(0, len(rows), chunk_size):
+                session.execute(stmt, rows[i:i + chunk_size])
             session.commit()
 
     def update_spider_summary(self, task_type: str, total_delta: int = 0, completed_delta: int = 0, failed_delta: int = 0, duration: float = 0, cookie_usage: int = 0, cookie_ban_count: int = 0):
@@ -440,4 +479,33 @@ class StatisticsRepository:
                 session.add(stats)
             session.commit()
 
+    def apply_spider_statistics_deltas(self, deltas: List[Dict[str, Any]]):
+        """
+        批量原子递增 spider_statistics（写回聚合器使用）
+        每项包含 stat_date, task_type 及 COUNTER_FIELDS 中的增量，duration_sum = Σ(完成数 × 时长)
+        """
+        if not deltas: return
+        now = datetime.now()
+        params = []
+        for d in deltas:
+            total = int(d.get('total_tasks', 0))
+            completed = int(d.get('completed_tasks', 0))
+            params.append({
+                'stat_date': d['stat_date'],
+                'task_type': d['task_type'],
+                'total_tasks': total,
+                'completed_tasks': completed,
+                'failed_tasks': int(d.get('failed_tasks', 0)),
+                'total_crawled_items': int(d.get('total_crawled_items', 0)),
+                'cookie_usage': int(d.get('cookie_usage', 0)),
+                'cookie_ban_count': int(d.get('cookie_ban_count', 0)),
+                # 插入值为本批次平均时长，冲突时通过 VALUES(avg_duration) * VALUES(completed_tasks) 还原时长总和
+                'avg_duration': d.get('duration_sum', 0) / completed if completed > 0 else 0,
+                'success_rate': completed / total * 100.0 if total > 0 else 0.0,
+                'update_time': now,
+            })
+        with session_scope() as session:
+            session.execute(SPIDER_STATISTICS_INCREMENT_SQL, params)
+            session.commit()
+
 statistics_repo = StatisticsRepository()
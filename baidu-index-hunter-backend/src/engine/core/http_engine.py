@@ -0,0 +1,232 @@
+"""
+HTTP 请求引擎
+按 Cookie 账号维护长连接池，避免每次请求重新建立 TCP/TLS 连接
+- sync: 基于 requests.Session 的连接池（默认）
+- async: 基于 asyncio/aiohttp 的事件循环，在后台线程中复用连接并发处理大量在途请求
+通过配置项 spider.engine 选择引擎
+
+异步引擎下搜索/资讯指数爬虫以请求步骤驱动任务（见 BaseCrawler._submit_request_steps）：
+请求在事件循环上等待，不占用工作线程，在途请求数由 spider.async_max_inflight 限制。
+get() 供其余同步调用方使用，等待期间占用调用线程。
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.core.logger import log
+
+
+class HttpResponse:
+    """统一的响应对象，接口与 requests.Response 常用部分保持一致"""
+
+    def __init__(self, status_code, text, url=None, elapsed=None):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+        # 发出请求到读完响应体的秒数（不含等待在途名额的时间）
+        self.elapsed = elapsed
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _pool_key(pool_key=None, cookies=None):
+    """确定连接池的键：优先使用账号ID，否则按 BDUSS / Cookie 内容计算"""
+    if pool_key is not None:
+        return str(pool_key)
+    if not cookies:
+        return 'default'
+    bduss = cookies.get('BDUSS')
+    if bduss:
+        return hashlib.md5(bduss.encode('utf-8')).hexdigest()
+    raw = '; '.join(f"{k}={v}" for k, v in sorted(cookies.items()))
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+class SyncHttpEngine:
+    """基于 requests.Session 的同步引擎，每个 Cookie 账号一个长连接池"""
+
+    name = 'sync'
+
+    def __init__(self, pool_maxsize=20):
+        self.pool_maxsize = pool_maxsize
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def _get_session(self, key):
+        session = self.sessions.get(key)
+        if session is not None:
+            return session
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                # 不在会话中保存服务端下发的 Cookie，行为与直接 requests.get 一致
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.sessions[key] = session
+            return session
+
+    def get(self, url, params=None, headers=None, cookies=None, timeout=15, pool_key=None):
+        """发起 GET 请求，返回 HttpResponse"""
+        session = self._get_session(_pool_key(pool_key, cookies))
+        started = time.monotonic()
+        response = session.get(url, params=params, headers=headers, cookies=cookies, timeout=timeout)
+        return HttpResponse(response.status_code, response.text, response.url, time.monotonic() - started)
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                try:
+                    session.close()
+                except Exception as e:
+                    log.error(f"关闭HTTP会话失败: {e}")
+            self.sessions.clear()
+
+
+class AsyncHttpEngine:
+    """
+    基于 aiohttp 的异步引擎
+    事件循环运行在独立的守护线程中，每个 Cookie 账号一个 ClientSession（keep-alive 连接池），
+    在途请求数由信号量（max_inflight）限制，超时从取得名额后开始计算。实际节奏由频率限制器与 Cookie 池决定
+    """
+
+    name = 'async'
+
+    def __init__(self, max_inflight=1000, limit_per_pool=50, keepalive_timeout=60):
+        import aiohttp  # 仅在启用异步引擎时需要
+        self._aiohttp = aiohttp
+        self.max_inflight = max_inflight
+        self.limit_per_pool = limit_per_pool
+        self.keepalive_timeout = keepalive_timeout
+        self.sessions = {}
+        self.inflight = 0
+        self.loop = asyncio.new_event_loop()
+        self._semaphore = None
+        self._ready = threading.Event()
+        self.thread = threading.Thread(target=self._run_loop, name='AsyncHttpEngine', daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        log.info(f"异步HTTP引擎已启动: 最大在途请求 {max_inflight}, 单账号连接上限 {limit_per_pool}")
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self._semaphore = asyncio.Semaphore(self.max_inflight)
+        self._ready.set()
+        self.loop.run_forever()
+
+    def _get_session(self, key):
+        # 仅在事件循环线程中调用，无需加锁
+        session = self.sessions.get(key)
+        if session is None or session.closed:
+            connector = self._aiohttp.TCPConnector(
+                limit=self.limit_per_pool,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            session = self._aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=self._aiohttp.DummyCookieJar()
+            )
+            self.sessions[key] = session
+        return session
+
+    async def request(self, url, params=None, headers=None, cookies=None, timeout=15, pool_key=None):
+        """协程：发起 GET 请求，返回 HttpResponse；超时与连接错误转换为 requests 的异常类型"""
+        from yarl import URL
+
+        session = self._get_session(_pool_key(pool_key, cookies))
+        req_headers = dict(headers or {})
+        if cookies:
+            req_headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in cookies.items())
+        # URL 已在调用方编码，避免重复编码
+        target = URL(url, encoded=True) if params is None else url
+
+        async with self._semaphore:
+            self.inflight += 1
+            started = time.monotonic()
+            try:
+                async with session.get(target, params=params, headers=req_headers,
+                                       timeout=self._aiohttp.ClientTimeout(total=timeout)) as response:
+                    text = await response.text()
+                    return HttpResponse(response.status, text, str(response.url), time.monotonic() - started)
+            except asyncio.TimeoutError as e:
+                raise requests.Timeout(f"请求超时: {url}") from e
+            except self._aiohttp.ClientError as e:
+                raise requests.ConnectionError(str(e)) from e
+            finally:
+                self.inflight -= 1
+
+    def run(self, coro):
+        """在事件循环中运行协程，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def submit(self, url, params=None, headers=None, cookies=None, timeout=15, pool_key=None):
+        """提交请求到事件循环，返回 concurrent.futures.Future"""
+        return self.run(self.request(url, params=params, headers=headers, cookies=cookies,
+                                     timeout=timeout, pool_key=pool_key))
+
+    def get(self, url, params=None, headers=None, cookies=None, timeout=15, pool_key=None):
+        """
+        同步等待结果（等待期间占用调用线程）
+        不另设等待上限：排队等待在途名额的时间不计入超时，请求本身的超时由 request() 保证
+        """
+        return self.submit(url, params=params, headers=headers, cookies=cookies,
+                           timeout=timeout, pool_key=pool_key).result()
+
+    async def _close_sessions(self):
+        for session in list(self.sessions.values()):
+            await session.close()
+        self.sessions.clear()
+
+    def close(self):
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_sessions(), self.loop).result(10)
+        except Exception as e:
+            log.error(f"关闭异步HTTP会话失败: {e}")
+
+
+sync_http_engine = SyncHttpEngine()
+_async_http_engine = None
+# aiohttp 不可用时只记录一次，之后直接使用同步引擎
+_async_unavailable = False
+_engine_lock = threading.Lock()
+
+
+def get_http_engine(engine=None):
+    """
+    获取 HTTP 引擎
+    :param engine: 引擎名称 (sync/async)，为空时读取配置 spider.engine
+    """
+    global _async_http_engine, _async_unavailable
+    if engine is None:
+        from src.services.config_service import config_manager
+        engine = config_manager.get('spider.engine', 'sync')
+
+    if engine != 'async' or _async_unavailable:
+        return sync_http_engine
+
+    if _async_http_engine is None:
+        with _engine_lock:
+            if _async_unavailable:
+                return sync_http_engine
+            if _async_http_engine is None:
+                from src.services.config_service import config_manager
+                try:
+                    _async_http_engine = AsyncHttpEngine(
+                        max_inflight=int(config_manager.get('spider.async_max_inflight', 1000)),
+                        limit_per_pool=int(config_manager.get('spider.async_pool_size', 50))
+                    )
+                except ImportError:
+                    _async_unavailable = True
+                    log.error("未安装 aiohttp，回退为同步HTTP引擎")
+                    return sync_http_engine
+    return _async_http_engine
@@ -1,33 +1,264 @@
 """
 Cipher-Text生成模块，用于生成百度指数API请求所需的加密参数，正确
+
+默认使用常驻 Node 工作进程池（cipher_worker.js，按行 JSON 通信），
+Cipher-Text.js 只在每个工作进程启动时加载一次；找不到 node 时回退到 execjs。
+同一 (url, ua) 的结果在短 TTL 内复用。
 """
 import os
+import json
+import time
+import queue
+import shutil
+import atexit
+import itertools
+import threading
+import subprocess
+from collections import OrderedDict
 import execjs
 from pathlib import Path
 from src.core.logger import log
-from src.core.config import CIPHER_TEXT_JS_PATH
+from src.core.config import CIPHER_TEXT_JS_PATH, BAIDU_INDEX_API
 from fake_useragent import UserAgent
 
 ua = UserAgent()
 useragent=ua.random#随机生成useragent
+
+CIPHER_WORKER_JS_PATH = Path(__file__).parent / 'cipher_worker.js'
+
+
+def build_cipher_url(keyword):
+    """构造用于生成 Cipher-Text 的页面 URL"""
+    encoded_keyword = keyword.replace(' ', '%20')
+    return f'{BAIDU_INDEX_API["referer"]}#/trend/{encoded_keyword}?words={encoded_keyword}'
+
+
+class CipherWorkerError(Exception):
+    """Node 工作进程调用失败"""
+
+
+class NodeCipherWorker:
+    """单个常驻 Node 进程，一次只处理一个请求（由进程池保证独占）"""
+
+    def __init__(self, js_path, node_path='node', start_timeout=10):
+        self._ids = itertools.count(1)
+        self._responses = queue.Queue()
+        self.process = subprocess.Popen(
+            [node_path, str(CIPHER_WORKER_JS_PATH), str(js_path)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding='utf-8', bufsize=1,
+        )
+        # 独立线程读取 stdout，调用方通过队列带超时等待（跨平台，不依赖 select）
+        self._reader = threading.Thread(target=self._read_loop, name='cipher-worker-reader', daemon=True)
+        self._reader.start()
+        ready = self._next_response(start_timeout)
+        if not ready.get('ready'):
+            self.close()
+            raise CipherWorkerError(f"工作进程启动失败: {ready}")
+
+    def _read_loop(self):
+        try:
+            for line in self.process.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._responses.put(json.loads(line))
+                except ValueError:
+                    log.debug(f"忽略非协议输出: {line[:100]}")
+        finally:
+            self._responses.put(None)
+
+    def _next_response(self, timeout):
+        try:
+            message = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            raise CipherWorkerError(f"工作进程响应超时 ({timeout}s)")
+        if message is None:
+            raise CipherWorkerError("工作进程已退出")
+        return message
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def call(self, url, user_agent, timeout=10):
+        request_id = next(self._ids)
+        try:
+            self.process.stdin.write(json.dumps({'id': request_id, 'url': url, 'ua': user_agent}, ensure_ascii=False) + '\n')
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise CipherWorkerError(f"写入工作进程失败: {e}")
+        while True:
+            message = self._next_response(timeout)
+            if message.get('id') != request_id:
+                continue  # 丢弃超时请求遗留的迟到响应
+            if 'error' in message:
+                raise CipherWorkerError(message['error'])
+            return message.get('result')
+
+    def close(self):
+        try:
+            if self.process.stdin:
+                self.process.stdin.close()
+            self.process.wait(timeout=2)
+        except Exception:
+            self.process.kill()
+
+
+class NodeCipherPool:
+    """Node 工作进程池：按需启动，最多 size 个；出错的进程直接丢弃，下次按需重建"""
+
+    def __init__(self, js_path, size=4, node_path='node', call_timeout=10):
+        self.js_path = js_path
+        self.size = max(1, size)
+        self.node_path = node_path
+        self.call_timeout = call_timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def resize(self, size):
+        """调整进程池上限（只增不减，已启动的进程不会被回收）"""
+        with self._lock:
+            self.size = max(self.size, size)
+
+    def _acquire(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return NodeCipherWorker(self.js_path, self.node_path)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise CipherWorkerError("等待空闲工作进程超时")
+
+    def _discard(self, worker):
+        worker.close()
+        with self._lock:
+            self._created -= 1
+
+    def call(self, url, user_agent):
+        worker = self._acquire(self.call_timeout)
+        try:
+            result = worker.call(url, user_agent, self.call_timeout)
+        except Exception:
+            self._discard(worker)
+            raise
+        if self._closed:
+            self._discard(worker)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class CipherTextCache:
+    """(url, ua) -> Cipher-Text 的短 TTL 缓存（Cipher-Text 内含时间戳，不宜长期复用）"""
+
+    def __init__(self, ttl=10, maxsize=4096):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item and item[1] > time.monotonic():
+                self.hits += 1
+                return item[0]
+            if item:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.ttl <= 0 or not value:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
 class CipherTextGenerator:
     """Cipher-Text生成器，调用JS脚本生成加密参数"""
-    
+
     def __init__(self):
         self.js_path = CIPHER_TEXT_JS_PATH
         self.js_context = None
-        self._init_js_context()
-    
+        self.pool = None
+        self.cache = CipherTextCache()
+        self._configured = False
+        self._config_lock = threading.Lock()
+
+    def _configure(self):
+        """首次使用时读取配置并选择引擎: node_pool (常驻进程池) / execjs"""
+        if self._configured:
+            return
+        with self._config_lock:
+            if self._configured:
+                return
+            try:
+                from src.services.config_service import config_manager
+                engine = str(config_manager.get('spider.cipher_engine', 'node_pool'))
+                pool_size = int(config_manager.get('spider.cipher_workers', 4))
+                self.cache.ttl = float(config_manager.get('spider.cipher_cache_ttl', 10))
+            except Exception:
+                engine, pool_size = 'node_pool', 4
+            node_path = shutil.which('node')
+            if engine == 'node_pool' and node_path and os.path.exists(self.js_path):
+                self.pool = NodeCipherPool(self.js_path, size=pool_size, node_path=node_path)
+                log.info(f"Cipher-Text 使用 Node 常驻进程池, 最大进程数: {pool_size}")
+            self._configured = True
+
+    def ensure_workers(self, size):
+        """按爬虫线程数扩大进程池上限（不超过 spider.cipher_max_workers）"""
+        self._configure()
+        if not self.pool:
+            return
+        try:
+            from src.services.config_service import config_manager
+            limit = int(config_manager.get('spider.cipher_max_workers', 8))
+        except Exception:
+            limit = 8
+        self.pool.resize(min(size, limit))
+
     def _init_js_context(self):
         """初始化JS执行环境"""
         try:
             if not os.path.exists(self.js_path):
                 log.error(f"Cipher-Text.js文件不存在: {self.js_path}")
                 return False
-            
+
             with open(self.js_path, 'r', encoding='utf-8') as f:
                 js_code = f.read()
-            
+
             self.js_context = execjs.compile(js_code)
             log.info("Cipher-Text.js加载成功")
             return True
@@ -35,25 +266,58 @@ class CipherTextGenerator:
             log.error(f"初始化JS执行环境失败: {e}")
             self.js_context = None
             return False
-    
-    def generate(self, url):
+
+    def _generate_execjs(self, url, user_agent):
+        if not self.js_context:
+            if not self._init_js_context():
+                return None
+        return self.js_context.call('ascToken', url, user_agent)
+
+    def generate(self, url, user_agent=None):
         """
         生成Cipher-Text参数
         :param url: 原始URL，例如 'https://index.baidu.com/v2/main/index.html#/trend/关键词?words=关键词'
+        :param user_agent: 参与加密的 UA，默认使用模块级随机 UA
         :return: 生成的Cipher-Text值或None（如果生成失败）
         """
-        if not self.js_context:
-            if not self._init_js_context():
-                return None
-        
+        self._configure()
+        user_agent = user_agent or useragent
+        cache_key = (url, user_agent)
+        cipher_text = self.cache.get(cache_key)
+        if cipher_text:
+            return cipher_text
+
         try:
-            cipher_text = self.js_context.call('ascToken', url, useragent)
-            log.debug(f"生成Cipher-Text成功: {cipher_text[:20]}...")
+            if self.pool:
+                try:
+                    cipher_text = self.pool.call(url, user_agent)
+                except Exception as e:
+                    log.warning(f"Node 进程池生成Cipher-Text失败，回退到 execjs: {e}")
+                    cipher_text = self._generate_execjs(url, user_agent)
+            else:
+                cipher_text = self._generate_execjs(url, user_agent)
+            if cipher_text:
+                self.cache.put(cache_key, cipher_text)
+                log.debug(f"生成Cipher-Text成功: {cipher_text[:20]}...")
             return cipher_text
         except Exception as e:
             log.error(f"生成Cipher-Text失败: {e}")
             return None
 
+    def get_stats(self):
+        return {
+            'engine': 'node_pool' if self.pool else 'execjs',
+            'workers': self.pool._created if self.pool else 0,
+            'max_workers': self.pool.size if self.pool else 0,
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+        }
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+
 
 # 创建Cipher-Text生成器单例
-cipher_text_generator = CipherTextGenerator() 
+cipher_text_generator = CipherTextGenerator()
+atexit.register(cipher_text_generator.close)
@@ -0,0 +1,89 @@
+"""
+Cipher-Text 预生成阶段
+流式调度时，任务生成器每产出一个任务就把其关键词放入有界队列，
+后台生产线程提前调用 cipher_text_generator 生成 Cipher-Text 并写入其 TTL 缓存，
+工作线程发请求时直接命中缓存，只做网络 I/O。
+队列满时直接跳过（由工作线程现场生成），不会阻塞任务调度。
+"""
+import queue
+import threading
+from typing import Iterable, Iterator
+
+from src.core.logger import log
+from src.engine.crypto.cipher_generator import cipher_text_generator, build_cipher_url
+
+
+def task_keyword(task) -> str:
+    """任务元组中用于生成 Cipher-Text 的关键词（批量任务取第一个）"""
+    keywords = task[0]
+    return keywords[0] if isinstance(keywords, (list, tuple)) else keywords
+
+
+class CipherTextPrefetcher:
+    """有界队列 + 生产线程，提前生成即将用到的 Cipher-Text"""
+
+    def __init__(self, generator=None, lookahead=64, workers=4):
+        self.generator = generator or cipher_text_generator
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=lookahead)
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self.produced = 0
+        self.skipped = 0
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'cipher-prefetch-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            keyword = self._queue.get()
+            try:
+                if self.generator.generate(build_cipher_url(keyword)):
+                    self.produced += 1
+            except Exception as e:
+                log.debug(f"预生成 Cipher-Text 失败: {keyword}, {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(keyword)
+                self._queue.task_done()
+
+    def submit(self, keyword: str) -> bool:
+        """提交一个关键词的预生成请求；已在队列中或队列已满时返回 False"""
+        if not keyword:
+            return False
+        self._ensure_started()
+        with self._lock:
+            if keyword in self._queued:
+                return False
+            try:
+                self._queue.put_nowait(keyword)
+            except queue.Full:
+                self.skipped += 1
+                return False
+            self._queued.add(keyword)
+        return True
+
+    def wrap(self, tasks: Iterable) -> Iterator:
+        """包装任务迭代器：产出任务的同时提交其 Cipher-Text 预生成"""
+        for task in tasks:
+            self.submit(task_keyword(task))
+            yield task
+
+    def get_stats(self):
+        return {
+            'produced': self.produced,
+            'skipped': self.skipped,
+            'queued': self._queue.qsize(),
+        }
+
+
+cipher_prefetcher = CipherTextPrefetcher()
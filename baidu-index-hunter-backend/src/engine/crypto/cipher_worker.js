@@ -0,0 +1,38 @@
+/*
+ * Cipher-Text 常驻工作进程
+ * 启动时加载一次 Cipher-Text.js，之后按行读取 JSON 请求 {"id", "url", "ua"}，
+ * 逐行输出 {"id", "result"} 或 {"id", "error"}；stdin 关闭时退出。
+ * 用法: node cipher_worker.js /path/to/Cipher-Text.js
+ */
+const fs = require('fs');
+const vm = require('vm');
+const readline = require('readline');
+
+// Cipher-Text.js 末尾带有调试输出，会污染协议通道，加载前屏蔽 console
+console.log = function () {};
+console.info = function () {};
+console.warn = function () {};
+
+const scriptPath = process.argv[2];
+vm.runInThisContext(fs.readFileSync(scriptPath, 'utf8'), { filename: scriptPath });
+
+function reply(message) {
+    process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+readline.createInterface({ input: process.stdin, terminal: false })
+    .on('line', function (line) {
+        if (!line.trim()) return;
+        let request = {};
+        try {
+            request = JSON.parse(line);
+            reply({ id: request.id, result: ascToken(request.url, request.ua) });
+        } catch (e) {
+            reply({ id: request.id, error: String(e && e.message || e) });
+        }
+    })
+    .on('close', function () {
+        process.exit(0);
+    });
+
+reply({ id: 0, ready: true });
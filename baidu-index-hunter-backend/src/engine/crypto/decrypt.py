@@ -0,0 +1,46 @@
+"""
+百度指数数据解密模块
+搜索指数与资讯指数共用：密钥前半部分映射到后半部分，
+每个密钥只构建一次 str.maketrans 转换表并缓存，解密由 str.translate 在 C 层完成
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+@lru_cache(maxsize=4096)
+def get_translation_table(key: str) -> dict:
+    """构建（并缓存）密钥对应的字符转换表"""
+    half = len(key) // 2
+    return str.maketrans(key[:half], key[half:half * 2])
+
+
+def decrypt(key: str, data: str) -> str:
+    """解密百度指数数据，返回逗号分隔的明文序列"""
+    if not key or not data:
+        return ""
+    return data.translate(get_translation_table(key))
+
+
+def parse_series(text: str) -> pd.api.extensions.ExtensionArray:
+    """
+    将逗号分隔的明文序列解析为可空整数数组（Int64）
+    空值（无数据的日期）与非数字记为 <NA>，不当作 0；个别值带小数时返回 Float64，不截断
+    """
+    if not text:
+        return pd.array([], dtype='Int64')
+    values = np.array(text.split(','))
+    try:
+        return pd.array(values.astype(np.int64), dtype='Int64')
+    except ValueError:
+        numbers = pd.to_numeric(values, errors='coerce')
+        present = numbers[~np.isnan(numbers)]
+        if np.array_equal(present, np.floor(present)):
+            return pd.array(numbers, dtype='Float64').astype('Int64')
+        return pd.array(numbers, dtype='Float64')
+
+
+def decrypt_series(key: str, data: str) -> pd.api.extensions.ExtensionArray:
+    """解密并解析为可空整数数组"""
+    return parse_series(decrypt(key, data))
@@ -0,0 +1,191 @@
+"""
+ptbk 解密密钥服务
+搜索指数与资讯指数处理器共用：按 uniqid 缓存解密密钥（LRU + TTL），
+同一 uniqid 的并发请求只发起一次，并支持在收到响应后立即预取密钥
+"""
+import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict
+
+from src.core.logger import log
+from src.core.config import BAIDU_INDEX_API
+from src.engine.core.http_engine import get_http_engine
+
+PTBK_URL = 'https://index.baidu.com/Interface/ptbk'
+
+
+class PtbkKeyCache:
+    """线程安全的 uniqid -> key 缓存，超过容量按 LRU 淘汰，超过 TTL 视为未命中"""
+
+    def __init__(self, maxsize=10000, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, uniqid) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(uniqid)
+            if item is not None:
+                key, expire_at = item
+                if expire_at > time.monotonic():
+                    self._data.move_to_end(uniqid)
+                    self.hits += 1
+                    return key
+                del self._data[uniqid]
+            self.misses += 1
+            return None
+
+    def peek(self, uniqid) -> bool:
+        """是否存在未过期的缓存项（不计入命中统计）"""
+        with self._lock:
+            item = self._data.get(uniqid)
+            return item is not None and item[1] > time.monotonic()
+
+    def put(self, uniqid, key):
+        with self._lock:
+            self._data[uniqid] = (key, time.monotonic() + self.ttl)
+            self._data.move_to_end(uniqid)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0,
+                'evictions': self.evictions,
+            }
+
+
+class PtbkKeyService:
+    """获取解密密钥：缓存 -> 在途请求 -> 网络请求"""
+
+    def __init__(self, maxsize=10000, ttl=600, prefetch_workers=4):
+        self.cache = PtbkKeyCache(maxsize=maxsize, ttl=ttl)
+        self.prefetch_workers = prefetch_workers
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.fetch_count = 0
+        self.prefetch_count = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.prefetch_workers,
+                                                        thread_name_prefix='ptbk-prefetch')
+        return self._executor
+
+    def fetch_key(self, uniqid, cookie, max_retries=3) -> Optional[str]:
+        """从百度接口获取解密密钥，空响应时短暂退避后重试"""
+        self.fetch_count += 1
+        params = {'uniqid': uniqid}
+        headers = {
+            'Accept': 'application/json, text/plain, */*',
+            'Referer': 'https://index.baidu.com/v2/main/index.html',
+            'User-Agent': BAIDU_INDEX_API['user_agent'],
+        }
+        for attempt in range(max_retries):
+            try:
+                response = get_http_engine().get(PTBK_URL, params=params, cookies=cookie,
+                                                 headers=headers, timeout=10)
+                if response.status_code != 200:
+                    log.error(f"获取解密密钥失败: {response.status_code}, {response.text[:200]}")
+                    continue
+                text = response.text.strip()
+                if not text:
+                    log.warning(f"ptbk返回空响应 (尝试 {attempt+1}/{max_retries})")
+                    if attempt < max_retries - 1:
+                        time.sleep(0.2 * (attempt + 1))
+                    continue
+                res_json = response.json()
+                if res_json.get('status') == 0:
+                    return res_json.get('data')
+                log.error(f"ptbk status异常: {res_json}")
+            except (ValueError, json.JSONDecodeError) as e:
+                log.warning(f"ptbk JSON解析失败 (尝试 {attempt+1}/{max_retries}): {e}")
+                if attempt < max_retries - 1:
+                    time.sleep(0.2 * (attempt + 1))
+            except Exception as e:
+                log.error(f"获取解密密钥异常: {e}")
+                return None
+        return None
+
+    def _load(self, uniqid, cookie, max_retries, future: Future):
+        """执行网络请求并写入缓存，结果通过 future 通知等待方"""
+        try:
+            key = self.fetch_key(uniqid, cookie, max_retries)
+            if key:
+                self.cache.put(uniqid, key)
+            future.set_result(key)
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(uniqid, None)
+        return future.result()
+
+    def _claim(self, uniqid):
+        """返回 (future, 是否由当前调用方负责加载)"""
+        with self._lock:
+            future = self._inflight.get(uniqid)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[uniqid] = future
+            return future, True
+
+    def get_key(self, uniqid, cookie, max_retries=3) -> Optional[str]:
+        """获取解密密钥，优先使用缓存与正在进行的预取"""
+        if not uniqid:
+            return None
+        key = self.cache.get(uniqid)
+        if key:
+            return key
+        future, owner = self._claim(uniqid)
+        if owner:
+            return self._load(uniqid, cookie, max_retries, future)
+        try:
+            return future.result(timeout=30)
+        except Exception as e:
+            log.error(f"等待解密密钥预取失败: {e}")
+            return None
+
+    def prefetch(self, uniqid, cookie, max_retries=3):
+        """在后台预取解密密钥，与后续请求/解析并行"""
+        if not uniqid or self.cache.peek(uniqid):
+            return
+        future, owner = self._claim(uniqid)
+        if owner:
+            self.prefetch_count += 1
+            self._get_executor().submit(self._load, uniqid, cookie, max_retries, future)
+
+    def get_stats(self) -> Dict:
+        stats = self.cache.get_stats()
+        stats.update({
+            'fetch_count': self.fetch_count,
+            'prefetch_count': self.prefetch_count,
+            'inflight': len(self._inflight),
+        })
+        return stats
+
+
+ptbk_key_service = PtbkKeyService()
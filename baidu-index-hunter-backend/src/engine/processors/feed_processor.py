@@ -2,64 +2,27 @@
 资讯指数数据处理器
 """
 import pandas as pd
-import requests
 import json
 from datetime import datetime, timedelta
 from src.core.logger import log
 from src.core.config import BAIDU_INDEX_API
+from src.engine.crypto.ptbk_service import ptbk_key_service
+from src.engine.crypto.decrypt import decrypt
 
 class FeedProcessor:
     """资讯指数数据处理器"""
     
     def _decrypt(self, key, data):
-        """解密百度指数数据"""
-        if not key or not data:
-            return ""
-            
+        """解密百度指数数据（按密钥缓存转换表）"""
         try:
-            i = list(key)
-            n = list(data)
-            a = {}
-            r = []
-            
-            # 构建映射字典
-            for A in range(len(i) // 2):
-                a[i[A]] = i[len(i) // 2 + A]
-            
-            # 根据映射解密数据
-            for o in range(len(n)):
-                r.append(a.get(n[o], n[o]))
-            
-            return ''.join(r)
+            return decrypt(key, data)
         except Exception as e:
             log.error(f"解密数据时出错: {e}")
             return ""
 
     def _get_key(self, uniqid, cookie):
-        """从百度接口获取解密密钥"""
-        params = {'uniqid': uniqid}
-        headers = {
-            'Accept': 'application/json, text/plain, */*',
-            'Referer': 'https://index.baidu.com/v2/main/index.html',
-            'User-Agent': BAIDU_INDEX_API['user_agent'],
-        }
-        try:
-            response = requests.get(
-                'https://index.baidu.com/Interface/ptbk', 
-                params=params, 
-                cookies=cookie, 
-                headers=headers,
-                timeout=10
-            )
-            if response.status_code == 200:
-                res_json = response.json()
-                if res_json.get('status') == 0:
-                    return res_json.get('data')
-            log.error(f"获取解密密钥失败: {response.status_code}, {response.text}")
-            return None
-        except Exception as e:
-            log.error(f"获取解密密钥异常: {e}")
-            return None
+        """获取解密密钥（与搜索指数共用按 uniqid 的缓存）"""
+        return ptbk_key_service.get_key(uniqid, cookie)
 
     def process_feed_index_data(self, data, cookie, keyword, city_code, city_name, start_date, end_date, decrypted_data, data_type='day'):
         """处理资讯指数数据"""
@@ -129,6 +129,9 @@ class RegionProcessor:
             
             results = []
             
+            # 获取省份映射表，用于名称和所属大区查询
+            all_provinces = region_manager.get_all_provinces()
+            
             for item in region_data:
                 item_keyword = item.get('key', keyword or '')
                 
@@ -153,9 +156,6 @@ class RegionProcessor:
                     item.get('prov_real', {})
                 )
                 
-                # 获取省份映射表，用于名称和所属大区查询
-                all_provinces = region_manager.get_all_provinces()
-                
                 # 处理省份级别数据
                 # 重命名变量以避免混淆
                 prov_index_map = item.get('prov', {}) or {}
@@ -2,12 +2,12 @@
 搜索指数与趋势指数处理器
 """
 import json
-import time
 import pandas as pd
-import requests
 from datetime import datetime, timedelta
 from src.core.logger import log
 from src.core.config import BAIDU_INDEX_API
+from src.engine.crypto.ptbk_service import ptbk_key_service
+from src.engine.crypto.decrypt import decrypt, parse_series
 from src.services.region_service import get_region_manager
 region_manager = get_region_manager()
 
@@ -96,22 +96,8 @@ class SearchProcessor:
             wise_list = decrypted_wise.split(',') if decrypted_wise else []
             pc_list = decrypted_pc.split(',') if decrypted_pc else []
             
-            # 计算日期列表
-            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            delta = end_dt - start_dt
-            expected_days = delta.days + 1
-            
-            # 规则: 跨度超过366天（考虑到闰年），强制认为周度；否则认为日度
-            if expected_days > 366:
-                interval_days = 7
-                data_type = '周度'
-                # log.info(f"Detect weekly data for {keyword} (Duration > 366 days). Range: {expected_days} days")
-            else:
-                # 即使数据点少，只要是一年内（含闰年），也强制认为是日度（根据用户要求，可能是缺失数据需要补0）
-                interval_days = 1
-                data_type = '日度'
-                # log.info(f"Detect daily data for {keyword} (Duration <= 366 days). Range: {expected_days} days")
+            # 计算日期列表（跨度超过366天按周度，否则按日度并补0）
+            start_dt, end_dt, expected_days, interval_days, data_type = self._get_interval(start_date, end_date)
             
             daily_data = []
             
@@ -146,120 +132,114 @@ class SearchProcessor:
                 idx += 1
             
             # 2. 处理统计摘要 (从 generalRatio 获取)
-            # 注意: API 有时返回 all/wise/pc 为 int(0) 而非 dict，需安全解析
-            if not isinstance(data, dict):
-                return daily_data, {}
-            res_data = data.get('data') or {}
-            if not isinstance(res_data, dict):
-                return daily_data, {}
-            ratio_list = res_data.get('generalRatio') or []
-            if not ratio_list:
-                return daily_data, {}
-            ratio_data = ratio_list[0]
-            if not isinstance(ratio_data, dict):
-                return daily_data, {}
-
-            def _term_dict(terminal):
-                """安全获取终端数据，API 可能返回 int 而非 dict"""
-                v = ratio_data.get(terminal, {})
-                return v if isinstance(v, dict) else {}
-
-            def get_val(terminal, key):
-                term = _term_dict(terminal)
-                val = term.get(key, 0)
-                return val if val is not None else 0
-
-            # 统计值计算需注意：如果是周度，总值计算可能需要调整？
-            # 百度指数的avg通常是日均值。
-            # 总值 = 日均值 * 天数。
-            # 这里保持原逻辑：Total = avg * total_days_in_range
-            
-            stats_record = {
-                '关键词': keyword,
-                '城市代码': city_code,
-                '城市': city_name,
-                '时间范围': f"{start_date} 至 {end_date}",
-                '整体日均值': get_val('all', 'avg'),
-                '整体同比': _term_dict('all').get('yoy', '-'),
-                '整体环比': _term_dict('all').get('qoq', '-'),
-                '移动日均值': get_val('wise', 'avg'),
-                '移动同比': _term_dict('wise').get('yoy', '-'),
-                '移动环比': _term_dict('wise').get('qoq', '-'),
-                'PC日均值': get_val('pc', 'avg'),
-                'PC同比': _term_dict('pc').get('yoy', '-'),
-                'PC环比': _term_dict('pc').get('qoq', '-'),
-                '整体总值': get_val('all', 'avg') * expected_days,
-                '移动总值': get_val('wise', 'avg') * expected_days,
-                'PC总值': get_val('pc', 'avg') * expected_days,
-                '爬取时间': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
+            stats_record = self._build_stats_record(data, keyword, city_code, city_name,
+                                                    start_date, end_date, expected_days)
             return daily_data, stats_record
             
         except Exception as e:
             log.error(f"process_search_index_daily_data error: {e}")
             return [], {}
 
-    def _decrypt(self, key, data):
-        """解密百度指数数据"""
-        if not key or not data:
-            return ""
-            
-        i = list(key)
-        n = list(data)
-        a = {}
-        r = []
-        
-        # 构建映射字典
-        for A in range(len(i) // 2):
-            a[i[A]] = i[len(i) // 2 + A]
+    def _get_interval(self, start_date, end_date):
+        """根据日期跨度判断数据粒度，返回 (起始日期, 结束日期, 天数, 间隔天数, 数据类型)"""
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+        expected_days = (end_dt - start_dt).days + 1
+        # 规则: 跨度超过366天（考虑到闰年），强制认为周度；否则认为日度
+        if expected_days > 366:
+            return start_dt, end_dt, expected_days, 7, '周度'
+        return start_dt, end_dt, expected_days, 1, '日度'
+
+    def build_search_index_daily_frame(self, keyword, city_code, city_name, start_date, end_date,
+                                       decrypted_all, decrypted_wise, decrypted_pc):
+        """
+        列式构建搜索指数日度数据（列与 process_search_index_daily_data 的行格式一致）
+        日期列由 pd.date_range 生成，数值列为解密后的 Int64 数组：空值保留为 <NA>（写出为空，与行格式的 '' 相同），
+        序列短于日期范围时补0、超出截断（与行格式相同）；非数字值记为 <NA>，行格式则原样保留
+        """
+        start_dt, end_dt, _, interval_days, data_type = self._get_interval(start_date, end_date)
+        dates = pd.date_range(start_dt, end_dt, freq=f'{interval_days}D')
+        size = len(dates)
+
+        def _fit(text):
+            return pd.Series(parse_series(text)[:size]).reindex(range(size), fill_value=0).array
+
+        return pd.DataFrame({
+            '关键词': keyword,
+            '城市代码': city_code,
+            '城市': city_name,
+            '日期': dates.strftime('%Y-%m-%d'),
+            '数据类型': data_type,
+            '数据间隔(天)': interval_days,
+            '所属年份': dates.year.astype(str),
+            'PC+移动指数': _fit(decrypted_all),
+            '移动指数': _fit(decrypted_wise),
+            'PC指数': _fit(decrypted_pc),
+            '爬取时间': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+    def _build_stats_record(self, data, keyword, city_code, city_name, start_date, end_date, expected_days):
+        """从 generalRatio 构建统计摘要"""
+        # 注意: API 有时返回 all/wise/pc 为 int(0) 而非 dict，需安全解析
+        if not isinstance(data, dict):
+            return {}
+        res_data = data.get('data') or {}
+        if not isinstance(res_data, dict):
+            return {}
+        ratio_list = res_data.get('generalRatio') or []
+        if not ratio_list:
+            return {}
+        ratio_data = ratio_list[0]
+        if not isinstance(ratio_data, dict):
+            return {}
+
+        def _term_dict(terminal):
+            """安全获取终端数据，API 可能返回 int 而非 dict"""
+            v = ratio_data.get(terminal, {})
+            return v if isinstance(v, dict) else {}
+
+        def get_val(terminal, key):
+            term = _term_dict(terminal)
+            val = term.get(key, 0)
+            return val if val is not None else 0
+
+        # 统计值计算需注意：如果是周度，总值计算可能需要调整？
+        # 百度指数的avg通常是日均值。
+        # 总值 = 日均值 * 天数。
+        # 这里保持原逻辑：Total = avg * total_days_in_range
         
-        # 根据映射解密数据
-        for o in range(len(n)):
-            r.append(a.get(n[o], n[o]))
+        stats_record = {
+            '关键词': keyword,
+            '城市代码': city_code,
+            '城市': city_name,
+            '时间范围': f"{start_date} 至 {end_date}",
+            '整体日均值': get_val('all', 'avg'),
+            '整体同比': _term_dict('all').get('yoy', '-'),
+            '整体环比': _term_dict('all').get('qoq', '-'),
+            '移动日均值': get_val('wise', 'avg'),
+            '移动同比': _term_dict('wise').get('yoy', '-'),
+            '移动环比': _term_dict('wise').get('qoq', '-'),
+            'PC日均值': get_val('pc', 'avg'),
+            'PC同比': _term_dict('pc').get('yoy', '-'),
+            'PC环比': _term_dict('pc').get('qoq', '-'),
+            '整体总值': get_val('all', 'avg') * expected_days,
+            '移动总值': get_val('wise', 'avg') * expected_days,
+            'PC总值': get_val('pc', 'avg') * expected_days,
+            '爬取时间': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
         
-        return ''.join(r)
+        return stats_record
+
+    def _decrypt(self, key, data):
+        """解密百度指数数据（按密钥缓存转换表）"""
+        return decrypt(key, data)
 
     def _get_key(self, uniqid, cookie, max_retries=3):
-        """从百度接口获取解密密钥，空响应时自动重试"""
-        params = {'uniqid': uniqid}
-        headers = {
-            'Accept': 'application/json, text/plain, */*',
-            'Referer': 'https://index.baidu.com/v2/main/index.html',
-            'User-Agent': BAIDU_INDEX_API['user_agent'],
-        }
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(
-                    'https://index.baidu.com/Interface/ptbk',
-                    params=params,
-                    cookies=cookie,
-                    headers=headers,
-                    timeout=10
-                )
-                if response.status_code != 200:
-                    log.error(f"获取解密密钥失败: {response.status_code}, {response.text[:200]}")
-                    continue
-                text = response.text.strip()
-                if not text:
-                    log.warning(f"ptbk返回空响应 (尝试 {attempt+1}/{max_retries})")
-                    if attempt < max_retries - 1:
-                        time.sleep(1)
-                    continue
-                res_json = response.json()
-                if res_json.get('status') == 0:
-                    return res_json.get('data')
-                log.error(f"ptbk status异常: {res_json}")
-            except (ValueError, json.JSONDecodeError) as e:
-                log.warning(f"ptbk JSON解析失败 (尝试 {attempt+1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(1)
-            except Exception as e:
-                log.error(f"获取解密密钥异常: {e}")
-                return None
-        return None
+        """获取解密密钥（按 uniqid 缓存，空响应时自动重试）"""
+        return ptbk_key_service.get_key(uniqid, cookie, max_retries)
 
-    def process_multi_search_index_data(self, data, cookie, keywords, city_code, city_name, start_date, end_date):
+    def process_multi_search_index_data(self, data, cookie, keywords, city_code, city_name, start_date, end_date,
+                                        columnar=False):
         """
         处理多个关键词的搜索指数数据
         :param data: API返回的原始数据
@@ -269,6 +249,7 @@ class SearchProcessor:
         :param city_name: 城市名称
         :param start_date: 开始日期
         :param end_date: 结束日期
+        :param columnar: 为 True 时日度数据以 DataFrame 返回（列式构建，不生成逐日字典）
         :return: (daily_data_list, stats_record_list) 元组
         """
         if not data or not data.get('data') or not data['data'].get('userIndexes'):
@@ -327,6 +308,18 @@ class SearchProcessor:
                         'status': 0
                     }
                     
+                    if columnar:
+                        all_daily_data.append(self.build_search_index_daily_frame(
+                            keyword, city_code, city_name, start_date, end_date,
+                            decrypted_all, decrypted_wise, decrypted_pc
+                        ))
+                        expected_days = self._get_interval(start_date, end_date)[2]
+                        stats_record = self._build_stats_record(single_data, keyword, city_code, city_name,
+                                                                start_date, end_date, expected_days)
+                        if stats_record:
+                            all_stats_records.append(stats_record)
+                        continue
+                    
                     # 调用单个处理逻辑
                     daily_data, stats_record = self.process_search_index_daily_data(
                         single_data, cookie, keyword, city_code, city_name, 
@@ -340,7 +333,10 @@ class SearchProcessor:
                         
                 except Exception as e:
                     log.error(f"处理关键词 '{keyword}' 时出错: {e}")
-                    
+            
+            if columnar:
+                frames = [f for f in all_daily_data if not f.empty]
+                return (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()), all_stats_records
             return all_daily_data, all_stats_records
             
         except Exception as e:
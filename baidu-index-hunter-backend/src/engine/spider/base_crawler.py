@@ -5,27 +5,61 @@
 import os
 import sys
 import json
+import asyncio
 import time
 import signal
 import threading
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import chain
 from datetime import datetime, timedelta, date
 from typing import List, Dict, Optional, Any, Set, Tuple
 from src.core.logger import log
 from src.services.storage_service import storage_service
+from src.services.output_sinks import create_sink
+from src.services.async_writer import AsyncBatchWriter
+from src.services.retry_scheduler import RetryScheduler
+from src.services.concurrency_controller import AIMDController
+from src.services.date_planner import plan_date_windows, split_window_results
+from src.services.response_cache import get_response_cache
 from src.services.cookie_rotator import cookie_rotator
+from src.utils.rate_limiter import cookie_rate_limiter
+from src.utils.decorators import enable_deferred_retries
 from src.services.progress_manager import ProgressManager
+from src.services.completion_index import CompletionSet
+from src.services.stats_aggregator import stats_aggregator
 from src.core.config import BAIDU_INDEX_API, OUTPUT_DIR
-from src.engine.crypto.cipher_generator import cipher_text_generator
+from src.engine.crypto.cipher_generator import cipher_text_generator, build_cipher_url
+from src.engine.crypto.cipher_prefetcher import cipher_prefetcher
+from src.engine.crypto.ptbk_service import ptbk_key_service
 import traceback
 
 class CrawlerInterrupted(Exception):
     """爬虫任务被中断异常"""
     pass
 
+class ReplayMissError(Exception):
+    """回放模式下请求未命中响应缓存"""
+    pass
+
+
+def _advance_steps(step, value):
+    """推进请求步骤生成器一步；StopIteration 不能穿过 Future，转换为 (True, 返回值)"""
+    try:
+        return False, step(value)
+    except StopIteration as stop:
+        return True, stop.value
+
 class BaseCrawler:
     """所有百度指数爬虫的基类"""
     
+    # 合并日期窗口拆分统计摘要时重新计算的字段（见 date_planner），由趋势类爬虫设置
+    window_value_fields: Dict[str, Tuple[str, str]] = {}
+    # 主请求方法名：延迟重试沿用该方法 @retry 声明的重试次数与退避，未设置时使用 spider.retry_times
+    retry_budget_method: Optional[str] = None
+    # 输出列类型声明（输出名 data/stats -> 列名 -> string/float64/int64），用于数值与文本混合的列
+    output_column_types: Dict[str, Dict[str, str]] = {}
+    
     def __init__(self, task_type: str = "unknown"):
         self.task_type = task_type
         self.task_id = None
@@ -44,6 +78,8 @@ class BaseCrawler:
         self.data_cache = []
         self.stats_cache = []
         self.cache_limit = 1000
+        # 输出写入器：'data' / 'stats' -> OutputSink，按 output_format 在首次写入时创建
+        self._sinks = {}
         self.task_lock = threading.Lock()
         self.save_lock = threading.Lock()
         
@@ -51,8 +87,8 @@ class BaseCrawler:
         self.total_tasks = 0
         self.completed_tasks = 0
         self.failed_tasks = 0
-        self.completed_keywords = set()
-        self.failed_keywords = set()
+        self.completed_keywords = CompletionSet()
+        self.failed_keywords = CompletionSet()
         
         self.cookie_rotator = cookie_rotator
         self.is_running = True # 运行状态标志
@@ -71,13 +107,79 @@ class BaseCrawler:
         self._progress_min_change = 0.01      # %：进度变化最小阈值
         self._db_update_interval = 5          # 秒：DB 更新最小间隔
         
+        # ptbk 密钥预取：收到响应后立即在后台获取解密密钥
+        from src.services.config_service import config_manager
+        self.ptbk_prefetch = config_manager.get_bool('spider.ptbk_prefetch', False)
+        # 列式输出：日度数据以 DataFrame 批次进入缓存，落盘时直接拼接
+        self.columnar_output = config_manager.get_bool('spider.columnar_output', True)
+        # 任务调度: batch (一次性生成并提交全部任务) / streaming (生成器按需产出，仅保留有限的在途窗口)
+        self.task_scheduling = config_manager.get_str('spider.task_scheduling', 'batch').lower()
+        self.stream_window = config_manager.get_int('spider.stream_window', 0)
+        # 流式调度时提前生成即将用到的 Cipher-Text
+        self.cipher_prefetch = config_manager.get_bool('spider.cipher_prefetch', True)
+        # 并发线程数（搜索/资讯爬虫在子类中按各自逻辑覆盖）
+        self.max_workers = config_manager.get_int('spider.max_workers', 5)
+        # 异步写入：flush 只把批次放入有界队列，由后台线程落盘并写统计
+        self.async_writer = config_manager.get_bool('spider.async_writer', True)
+        self.writer_queue_size = config_manager.get_int('spider.writer_queue_size', 8)
+        self._writer: Optional[AsyncBatchWriter] = None
+        # 重试模式: deferred (失败任务进入退避队列，到期后重新提交) / inline (装饰器内休眠重试)
+        self.retry_mode = config_manager.get_str('spider.retry_mode', 'deferred').lower()
+        max_retries = config_manager.get_int('spider.retry_times', 2)
+        base_delay = config_manager.get_float('spider.retry_base_delay', 2.0)
+        backoff = 2.0
+        budget = getattr(getattr(type(self), self.retry_budget_method or '', None), 'retry_budget', None)
+        if budget:
+            max_retries, base_delay, backoff = budget
+        self.retry_scheduler = RetryScheduler(
+            max_retries=max_retries, base_delay=base_delay, backoff=backoff,
+            max_delay=config_manager.get_float('spider.retry_max_delay', 60.0),
+        )
+        # 日期窗口合并：多个请求范围合并为不超过 366 天的请求，结果再按范围拆分
+        # 拆分后的范围没有接口返回的同比/环比（记为 '-'），因此默认关闭
+        self.merge_date_ranges = config_manager.get_bool('spider.merge_date_ranges', False)
+        self._window_parts: Dict[Tuple[str, str], Tuple[Tuple[str, str], ...]] = {}
+        # 响应缓存：相同接口与参数在 TTL 内直接读取磁盘缓存（见 response_cache）
+        self.response_cache_enabled = config_manager.get_bool('spider.response_cache', False)
+        # 爬取模式: online (访问百度接口) / replay (只从响应缓存重建输出，不访问网络)
+        self.crawl_mode = config_manager.get_str('spider.crawl_mode', 'online').lower()
+        # 并发控制: static (固定 max_workers 与请求间隔) / aimd (按接口反馈自适应调整并发与节奏，隐含流式调度)
+        self.concurrency_control = config_manager.get_str('spider.concurrency_control', 'static').lower()
+        self.concurrency_controller: Optional[AIMDController] = None
+        if self.concurrency_control == 'aimd':
+            self.concurrency_controller = AIMDController(
+                initial_limit=self.max_workers,
+                min_limit=config_manager.get_int('spider.aimd_min_workers', 1),
+                max_limit=config_manager.get_int('spider.aimd_max_workers', 32),
+                sample_size=config_manager.get_int('spider.aimd_sample_size', 20),
+                latency_target=config_manager.get_float('spider.aimd_latency_target', 5.0),
+            )
+        
         self.setup_signal_handlers()
 
     def _report_cookie_status(self, account_id: str, is_valid: bool, permanent: bool = False):
         """报告Cookie状态并更新统计"""
         if not is_valid:
             self.cookie_ban_count += 1
-        return self.cookie_rotator.report_cookie_status(account_id, is_valid, permanent)
+        return self.cookie_rotator.report_cookie_status(account_id, is_valid, permanent, endpoint=self.task_type)
+
+    def _release_cookie(self, account_id: Optional[str]):
+        """请求结束后释放 Cookie 租约（集群模式）"""
+        if account_id:
+            self.cookie_rotator.release_cookie(account_id)
+
+    def _prefetch_ptbk_key(self, data: Dict, cookie_dict: Dict):
+        """预取模式下按响应中的 uniqid 在后台获取解密密钥"""
+        if not self.ptbk_prefetch or not isinstance(data, dict):
+            return
+        res_data = data.get('data')
+        if isinstance(res_data, dict) and res_data.get('uniqid'):
+            ptbk_key_service.prefetch(res_data['uniqid'], cookie_dict)
+
+    def _wait_rate_limit(self, account_id: str, endpoint: Optional[str] = None) -> float:
+        """按 Cookie 账号的令牌桶限速，返回实际等待秒数；自适应并发时按本任务控制器的节奏放缩间隔"""
+        pace = self.concurrency_controller.pace if self.concurrency_controller is not None else 1.0
+        return cookie_rate_limiter.wait(account_id, endpoint or self.task_type, pace=pace)
 
 
     def _apply_output_format(self, output_format=None, **kwargs):
@@ -94,6 +196,128 @@ class BaseCrawler:
             except Exception:
                 self.output_format = 'csv'
 
+    def _apply_crawl_mode(self, crawl_mode=None):
+        """从参数中读取爬取模式（online / replay），未指定时沿用全局配置"""
+        if crawl_mode and crawl_mode in ('online', 'replay'):
+            self.crawl_mode = crawl_mode
+        if self.replay_mode:
+            log.info(f"[{self.task_type}] 回放模式：仅从响应缓存重建输出，不访问网络")
+
+    @property
+    def replay_mode(self) -> bool:
+        return self.crawl_mode == 'replay'
+
+    def _cached_fetch(self, endpoint: str, params: Dict[str, Any], fetch):
+        """
+        经响应缓存获取接口数据：命中直接返回，未命中时调用 fetch() 并缓存非空结果
+        回放模式忽略 TTL，未命中时抛出 ReplayMissError，不调用 fetch
+        """
+        if not (self.response_cache_enabled or self.replay_mode):
+            return fetch()
+        cache = get_response_cache()
+        payload = cache.get(endpoint, params, ignore_ttl=self.replay_mode)
+        if payload is not None:
+            return payload
+        if self.replay_mode:
+            raise ReplayMissError(f"回放模式下缓存未命中: {endpoint} {params}")
+        result = fetch()
+        if result:
+            cache.put(endpoint, params, result)
+        return result
+
+    def _cached_index_fetch(self, endpoint: str, params: Dict[str, Any], fetch):
+        """
+        趋势类接口（搜索/资讯指数）的缓存获取，fetch() 返回 (data, cookie_dict)
+        缓存内容为响应与对应的 ptbk 解密密钥，命中时把密钥放回 ptbk 缓存，解密不再请求网络
+        """
+        return self._run_request_steps(self._cached_index_steps(endpoint, params, self._call_steps(fetch)))
+
+    def _cached_index_steps(self, endpoint: str, params: Dict[str, Any], steps):
+        """_cached_index_fetch 的请求步骤版本：steps 为获取 (data, cookie_dict) 的请求步骤生成器"""
+        if not (self.response_cache_enabled or self.replay_mode):
+            return (yield from steps)
+        cache = get_response_cache()
+        payload = cache.get(endpoint, params, ignore_ttl=self.replay_mode)
+        if payload is None:
+            if self.replay_mode:
+                raise ReplayMissError(f"回放模式下缓存未命中: {endpoint} {params}")
+            fetched = yield from steps
+            if fetched:
+                data, cookie_dict = fetched
+                res_data = data.get('data') if isinstance(data, dict) else None
+                uniqid = res_data.get('uniqid') if isinstance(res_data, dict) else None
+                key = ptbk_key_service.get_key(uniqid, cookie_dict) if uniqid else None
+                # 取不到密钥的响应无法离线解密，不写入缓存
+                if key or not uniqid:
+                    cache.put(endpoint, params, {'response': data, 'ptbk': key})
+            return fetched
+        data = payload['response']
+        res_data = data.get('data') if isinstance(data, dict) else None
+        if payload.get('ptbk') and isinstance(res_data, dict) and res_data.get('uniqid'):
+            ptbk_key_service.cache.put(res_data['uniqid'], payload['ptbk'])
+        return data, {}
+
+    # --- 请求步骤 (Request Steps) ---
+    # 搜索/资讯指数的任务写成生成器：每个 yield 出一次请求的参数（http_engine.get/request 的关键字参数），
+    # 驱动方发出请求后把响应（或异常）送回。同步驱动在当前线程调用 http_engine.get；
+    # 异步引擎下由事件循环驱动，步骤之间的计算在线程池中执行，等待响应时不占用线程。
+
+    @staticmethod
+    def _call_steps(func, *args):
+        """把普通调用包装为不发出请求的步骤生成器（同步路径沿用 @retry 装饰的接口方法）"""
+        return func(*args)
+        yield  # 使函数成为生成器
+
+    def _run_request_steps(self, steps):
+        """在当前线程驱动请求步骤，返回生成器的返回值"""
+        send, value = steps.send, None
+        while True:
+            done, request = _advance_steps(send, value)
+            if done:
+                return request
+            try:
+                send, value = steps.send, self.http_engine.get(**request)
+            except Exception as e:
+                send, value = steps.throw, e
+
+    async def _drive_request_steps(self, executor, steps):
+        """在事件循环中驱动请求步骤：生成器在 executor 的线程中推进，请求经 http_engine.request 等待"""
+        loop = asyncio.get_running_loop()
+        send, value = steps.send, None
+        try:
+            while True:
+                done, request = await loop.run_in_executor(executor, _advance_steps, send, value)
+                if done:
+                    return request
+                try:
+                    send, value = steps.send, await self.http_engine.request(**request)
+                except Exception as e:
+                    send, value = steps.throw, e
+        finally:
+            # 任务被取消时关闭生成器，释放其持有的 Cookie 租约
+            if not steps.gi_running:
+                steps.close()
+
+    def _submit_request_steps(self, executor, steps):
+        """提交请求步骤到异步引擎的事件循环，返回 concurrent.futures.Future"""
+        return self.http_engine.run(self._drive_request_steps(executor, steps))
+
+    @property
+    def request_pipeline_enabled(self) -> bool:
+        """异步引擎下以请求步骤驱动任务；装饰器内重试（inline）需要在线程中休眠，此时仍在线程池中执行"""
+        engine = getattr(self, 'http_engine', None)
+        return engine is not None and engine.name == 'async' and self.deferred_retry_enabled
+
+    def _task_steps(self, task: Any):
+        """单个任务的请求步骤生成器，返回值与 _process_task 相同（由搜索/资讯指数爬虫实现）"""
+        raise NotImplementedError
+
+    def _submit_task(self, executor, task: Any):
+        """提交单个任务，返回 Future：异步引擎下由事件循环驱动 _task_steps，否则在线程池中执行 _process_task"""
+        if self.request_pipeline_enabled:
+            return self._submit_request_steps(executor, self._task_steps(task))
+        return executor.submit(self._process_task, task)
+
     def _apply_output_settings(self, output_dir=None, output_name=None):
         """
         应用输出目录和文件名设置。
@@ -143,14 +367,18 @@ class BaseCrawler:
         if self.progress_manager:
             self.progress_manager.close()
             self.progress_manager = None
-        self.completed_keywords = set()
-        self.failed_keywords = set()
+        self.completed_keywords = CompletionSet()
+        self.failed_keywords = CompletionSet()
         self.completed_tasks = 0
         self.failed_tasks = 0
         self.start_time = None
         self.output_files = []
         self.data_cache = []
         self.stats_cache = []
+        self.retry_scheduler.reset()
+        # 上一个任务的批次必须写入上一个任务的输出文件
+        self._drain_writer()
+        self._close_sinks()
         self.is_running = True
         # 重置进度报告器（延迟初始化，首次 _maybe_report_progress 时设置实际起始时间）
         self._progress_start_time = 0.0
@@ -199,9 +427,11 @@ class BaseCrawler:
         self._finish_progress_bar()
         log.info(f"[{self.task_type}] 接收到退出信号，正在保存数据并强制退出...")
         self.is_running = False # 设置停止标志
-        self._flush_buffer(force=True)
+        self._flush_all()
         if self.progress_manager:
             self.progress_manager.close()
+        # os._exit 不会触发 atexit，这里手动写入统计增量
+        stats_aggregator.stop()
         log.info(f"数据和检查点已保存。任务ID: {self.task_id}")
         # 使用 os._exit(1) 确保在多线程环境下也能强制终止终端
         import os
@@ -213,6 +443,187 @@ class BaseCrawler:
             log.info(f"[{self.task_type}] 检查到停止信号，中断执行。任务ID: {self.task_id}")
             raise CrawlerInterrupted("Task cancelled or interrupted")
 
+    @property
+    def streaming_enabled(self) -> bool:
+        # 自适应并发通过在途窗口生效，需要流式调度
+        return self.task_scheduling == 'streaming' or self.concurrency_controller is not None
+
+    def _get_stream_window(self) -> int:
+        """
+        在途任务窗口大小，自适应并发时为控制器当前上限；
+        未配置时为线程数的 2 倍，异步引擎下等待响应不占线程，为引擎的在途请求上限
+        """
+        if self.concurrency_controller is not None:
+            return self.concurrency_controller.window
+        try:
+            window = int(self.stream_window)
+        except (TypeError, ValueError):
+            window = 0
+        if window > 0:
+            return window
+        if self.request_pipeline_enabled:
+            return max(1, int(self.http_engine.max_inflight))
+        return max(1, getattr(self, 'max_workers', 1) * 2)
+
+    def _pool_size(self) -> int:
+        """线程池大小：自适应并发时需容纳控制器允许的最大并发"""
+        size = max(1, int(self.max_workers))
+        if self.concurrency_controller is not None:
+            size = max(size, self.concurrency_controller.max_limit)
+        return size
+
+    def _record_response(self, outcome: str, latency: Optional[float] = None):
+        """向自适应并发控制器报告一次请求结果（见 concurrency_controller.status_outcome）"""
+        if self.concurrency_controller is not None:
+            self.concurrency_controller.record(outcome, latency)
+
+    @staticmethod
+    def _peek_tasks(tasks):
+        """取出生成器的第一个任务用于判断是否为空，返回 (是否有任务, 完整迭代器)"""
+        tasks = iter(tasks)
+        first = next(tasks, None)
+        if first is None:
+            return False, iter(())
+        return True, chain([first], tasks)
+
+    def _with_cipher_prefetch(self, tasks):
+        """流式调度下为任务迭代器加上 Cipher-Text 预生成阶段"""
+        if self.cipher_prefetch:
+            return cipher_prefetcher.wrap(tasks)
+        return tasks
+
+    @property
+    def deferred_retry_enabled(self) -> bool:
+        # 回放模式下未命中缓存的任务重试也不会命中
+        return self.retry_mode == 'deferred' and not self.replay_mode
+
+    def _worker_initializer(self):
+        """线程池 initializer：延迟重试模式下工作线程内的 @retry 不再休眠"""
+        return enable_deferred_retries if self.deferred_retry_enabled else None
+
+    def _defer_retry(self, task: Any, keys: List[str]) -> bool:
+        """
+        失败任务放入延迟重试队列，返回是否已安排重试；
+        未启用延迟重试或已达最大重试次数时返回 False，由调用方标记失败
+        """
+        if not self.deferred_retry_enabled:
+            return False
+        delay = self.retry_scheduler.schedule(keys, task)
+        if delay is None:
+            log.warning(f"[{self.task_type}] 任务重试次数已用尽: {keys[:3]}")
+            return False
+        attempts = self.retry_scheduler.attempts(keys)
+        log.warning(f"[{self.task_type}] 任务失败，{delay:.1f} 秒后第 {attempts} 次重试: {keys[:3]}")
+        return True
+
+    def _run_streaming(self, executor, tasks, on_done, window: Optional[int] = None, func=None,
+                       task_keys=None, with_task: bool = False) -> int:
+        """
+        流式调度：从任务迭代器按需提交，在途 future 不超过 window，
+        每完成一个即调用 on_done(future)（with_task 时为 on_done(future, task)）并补充新任务。返回提交的任务数
+        func 为在线程池中执行的函数，默认经 _submit_task 提交 self._process_task（异步引擎下为请求步骤）
+        延迟重试队列中已到期的任务优先补充；仍在退避期内的恢复任务（task_keys 判断）先入队等待
+        """
+        # 未指定窗口时每次补充前重新读取，自适应并发调整后立即生效
+        current_window = (lambda: window) if window else self._get_stream_window
+        submit_task = (lambda task: executor.submit(func, task)) if func else \
+            (lambda task: self._submit_task(executor, task))
+        retry = self.retry_scheduler if self.deferred_retry_enabled else None
+        tasks = iter(tasks)
+        inflight = {}
+        submitted = 0
+        exhausted = False
+
+        def submit(task):
+            nonlocal submitted
+            inflight[submit_task(task)] = task
+            submitted += 1
+
+        def fill():
+            nonlocal exhausted
+            limit = current_window()
+            if retry is not None and len(retry) and len(inflight) < limit:
+                for task in retry.pop_due(limit=limit - len(inflight)):
+                    submit(task)
+            while not exhausted and len(inflight) < limit:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                    break
+                if retry is not None and task_keys is not None and retry.defer(task_keys(task), task):
+                    continue
+                submit(task)
+
+        try:
+            fill()
+            while inflight or (retry is not None and len(retry)):
+                if not inflight:
+                    # 只剩退避中的任务：在调度线程上等待最早到期的一个，工作线程不被占用
+                    self.check_running()
+                    time.sleep(min(retry.next_delay() or 0, 1.0))
+                    fill()
+                    continue
+                timeout = retry.next_delay() if retry is not None and len(retry) else None
+                done, _ = wait(inflight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = inflight.pop(future)
+                    self.check_running()
+                    if with_task:
+                        on_done(future, task)
+                    else:
+                        on_done(future)
+                fill()
+        except BaseException:
+            for future in inflight:
+                future.cancel()
+            raise
+        return submitted
+
+    def _run_task_items(self, tasks: List[Any], task_keys, on_result) -> int:
+        """
+        并发执行任务项（画像类爬虫共用）
+        - task_keys(task) 返回该任务对应的完成键列表，键全部已完成的任务直接跳过（按键恢复，与完成顺序无关）
+        - 在 max_workers 个线程中执行 _process_task，在途任务不超过流式窗口
+        - 每完成一个任务，在 task_lock 下调用 on_result(task, result) 并按键标记完成；
+          失败则进入延迟重试队列，重试用尽后按键标记失败
+        请求节奏由各请求内的 _wait_rate_limit（账号令牌桶）与 Cookie 池控制。返回本次执行的任务数
+        """
+        pending = (task for task in tasks
+                   if not all(key in self.completed_keywords for key in task_keys(task)))
+
+        def run(task):
+            # 请求结果由各爬虫的接口方法按响应 status 报告给并发控制器
+            self.check_running()
+            try:
+                return task, self._process_task(task), None
+            except CrawlerInterrupted:
+                raise
+            except Exception as e:
+                return task, None, e
+
+        def on_done(future):
+            task, result, error = future.result()
+            keys = task_keys(task)
+            if error is None:
+                try:
+                    with self.task_lock:
+                        on_result(task, result)
+                        self._mark_items_completed(keys)
+                    self._flush_buffer()
+                    return
+                except Exception as e:
+                    error = e
+            if self._defer_retry(task, keys):
+                return
+            log.error(f"[{self.task_type}] Task failed: {task}, Error: {error}")
+            with self.task_lock:
+                self._mark_items_failed(keys)
+            self._update_task_db_status('running', error_message=str(error))
+
+        with ThreadPoolExecutor(max_workers=self._pool_size(),
+                                initializer=self._worker_initializer()) as executor:
+            return self._run_streaming(executor, pending, on_done, func=run, task_keys=task_keys)
+
     def _generate_task_id(self):
         """生成唯一的任务ID"""
         import uuid
@@ -288,11 +699,10 @@ class BaseCrawler:
             log.error(f"DB Status Update Error: {e}")
 
     def _update_spider_statistics(self, data_count: int):
-        """更新当日爬虫抓取总量统计"""
+        """更新当日爬虫抓取总量统计（写回聚合器累加，后台定时入库）"""
         if data_count <= 0: return
         try:
-            from src.data.repositories.statistics_repository import statistics_repo
-            statistics_repo.increment_crawled_count(self.task_type, data_count)
+            stats_aggregator.increment_crawled_count(self.task_type, data_count)
         except Exception as e:
             log.error(f"Stats Update Error: {e}")
 
@@ -357,6 +767,30 @@ class BaseCrawler:
                 ranges.append((f"{year}-01-01", end_date))
         return ranges
 
+    def _plan_date_windows(self, date_ranges: List) -> List[Tuple[str, str]]:
+        """将请求的日期范围合并为请求窗口，返回窗口列表并记录每个窗口覆盖的原始范围"""
+        self._window_parts = {}
+        if not self.merge_date_ranges:
+            return [tuple(r) for r in date_ranges]
+        windows = plan_date_windows(date_ranges)
+        for window in windows:
+            self._window_parts[(window.start, window.end)] = window.parts
+        if len(windows) < len(date_ranges):
+            log.info(f"[{self.task_type}] 日期范围合并: {len(date_ranges)} 个范围 -> {len(windows)} 次请求")
+        return [(window.start, window.end) for window in windows]
+
+    def _window_task_keys(self, keywords: List[str], city_code, start_date: str, end_date: str) -> List[str]:
+        """日期窗口任务的完成键：关键词 × 窗口覆盖的每个请求范围"""
+        parts = self._window_parts.get((start_date, end_date)) or ((start_date, end_date),)
+        return [f"{kw}_{city_code}_{part_start}_{part_end}" for kw in keywords for part_start, part_end in parts]
+
+    def _split_window_results(self, daily, stats_records: List[Dict], start_date: str, end_date: str):
+        """将合并窗口的结果按原始请求范围拆分（未合并的窗口原样返回）"""
+        parts = self._window_parts.get((start_date, end_date))
+        if not parts:
+            return daily, stats_records
+        return split_window_results(daily, stats_records, start_date, end_date, parts, self.window_value_fields)
+
     # --- HTTP & Cookie Utils ---
 
         return account_id, cookie_dict
@@ -375,10 +809,8 @@ class BaseCrawler:
         }
 
     def _get_cipher_text(self, keyword: str) -> str:
-        """获取 Cipher-Text 参数 (通用)"""
-        encoded_keyword = keyword.replace(' ', '%20')
-        cipher_url = f'{BAIDU_INDEX_API["referer"]}#/trend/{encoded_keyword}?words={encoded_keyword}'
-        return cipher_text_generator.generate(cipher_url)
+        """获取 Cipher-Text 参数 (通用，优先命中预生成结果)"""
+        return cipher_text_generator.generate(build_cipher_url(keyword))
 
     def _update_ab_sr_cookies(self) -> bool:
         """更新所有账号的 ab_sr cookie (通用)"""
@@ -409,47 +841,114 @@ class BaseCrawler:
 
     # --- 持久化与缓存 (Persistence & Caching) ---
 
+    def _cache_daily_data(self, daily_data):
+        """将日度数据放入缓存，DataFrame 批次整体保存，行字典逐条追加"""
+        if isinstance(daily_data, pd.DataFrame):
+            if not daily_data.empty:
+                self.data_cache.append(daily_data)
+        elif daily_data:
+            self.data_cache.extend(daily_data)
+
+    def _cached_row_count(self) -> int:
+        """缓存中的数据行数（DataFrame 批次按行数计）"""
+        return sum(len(item) if isinstance(item, pd.DataFrame) else 1 for item in self.data_cache)
+
+    @staticmethod
+    def _build_frame(items: List) -> pd.DataFrame:
+        """将缓存内容（行字典与 DataFrame 批次混合）合并为一个 DataFrame"""
+        frames = [item for item in items if isinstance(item, pd.DataFrame)]
+        if len(frames) == len(items):
+            return pd.concat(frames, ignore_index=True)
+        records = [item for item in items if not isinstance(item, pd.DataFrame)]
+        if not frames:
+            return pd.DataFrame(records)
+        return pd.concat([pd.DataFrame(records)] + frames, ignore_index=True)
+
     def _flush_buffer(self, force: bool = False):
-        """将缓存数据持久化到文件并同步数据库统计"""
-        with self.save_lock:
+        """将缓存数据持久化到文件并同步数据库统计（异步写入时只负责入队）"""
+        with self.task_lock:
             data_to_save, stats_to_save = [], []
-            with self.task_lock:
-                if (force or len(self.data_cache) >= self.cache_limit) and self.data_cache:
-                    data_to_save, self.data_cache = list(self.data_cache), []
-                if (force or len(self.stats_cache) >= 1) and self.stats_cache: # 统计数据及时入库
-                    stats_to_save, self.stats_cache = list(self.stats_cache), []
-            
-            if not data_to_save and not stats_to_save: return
-                
+            if (force or self._cached_row_count() >= self.cache_limit) and self.data_cache:
+                data_to_save, self.data_cache = list(self.data_cache), []
+            if (force or len(self.stats_cache) >= 1) and self.stats_cache: # 统计数据及时入库
+                stats_to_save, self.stats_cache = list(self.stats_cache), []
+        
+        if not data_to_save and not stats_to_save: return
+        
+        if self.async_writer:
+            # 队列已满时在此阻塞，形成背压
+            self._get_writer().submit((data_to_save, stats_to_save))
+        else:
+            self._persist_batches([(data_to_save, stats_to_save)])
+
+    def _get_writer(self) -> AsyncBatchWriter:
+        if self._writer is None:
+            self._writer = AsyncBatchWriter(
+                self._persist_batches,
+                max_pending=self.writer_queue_size,
+                name=f'{self.task_type}-writer',
+            )
+        return self._writer
+
+    def _drain_writer(self):
+        """等待后台写入线程写完所有已提交的批次"""
+        if self._writer is not None:
+            self._writer.drain()
+
+    def _flush_all(self):
+        """强制刷写缓存，等待后台写入完成并关闭输出文件（任务结束/暂停/退出时调用）"""
+        self._flush_buffer(force=True)
+        self._drain_writer()
+        with self.save_lock:
+            self._close_sinks()
+
+    def _persist_batches(self, batches: List[Tuple[List, List]]):
+        """合并若干 (数据, 统计) 批次后写入输出文件、统计表并保存检查点"""
+        data_to_save = [item for data, _ in batches for item in data]
+        stats_to_save = [item for _, stats in batches for item in stats]
+        with self.save_lock:
             try:
                 from src.data.repositories.statistics_repository import statistics_repo
                 
-                file_prefix = self._get_file_prefix()
-                
                 if data_to_save:
-                    path = os.path.join(self.output_path, f"{file_prefix}_data.csv")
-                    storage_service.append_to_csv(pd.DataFrame(data_to_save), path)
-                    self._update_spider_statistics(len(data_to_save))
-                    if path not in self.output_files:
-                        self.output_files.append(path)
+                    df = self._build_frame(data_to_save)
+                    self._write_output('data', df)
+                    self._update_spider_statistics(len(df))
                 
                 if stats_to_save:
-                    # 持久化到 CSV
-                    path = os.path.join(self.output_path, f"{file_prefix}_stats.csv")
-                    storage_service.append_to_csv(pd.DataFrame(stats_to_save), path)
-                    if path not in self.output_files:
-                        self.output_files.append(path)
+                    # 持久化到输出文件
+                    self._write_output('stats', pd.DataFrame(stats_to_save))
                     
                     # 持久化到数据库
                     for item in stats_to_save:
                         item['task_id'] = self.task_id # 确保有 task_id
                     statistics_repo.save_task_statistics_batch(stats_to_save)
                 
-                # 每次执行 flush 都尝试保存检查点
+                # 每次写入都尝试保存检查点
                 self._save_global_checkpoint()
             except Exception as e:
                 log.error(f"Flush Buffer Error: {e}")
 
+    def _write_output(self, name: str, df: pd.DataFrame):
+        """通过对应的写入器追加数据（name: data / stats），应在 save_lock 下调用"""
+        sink = self._sinks.get(name)
+        if sink is None:
+            base_path = os.path.join(self.output_path, f"{self._get_file_prefix()}_{name}")
+            sink = self._sinks[name] = create_sink(self.output_format, base_path,
+                                                   self.output_column_types.get(name))
+        sink.write(df)
+        if sink.path not in self.output_files:
+            self.output_files.append(sink.path)
+
+    def _close_sinks(self):
+        """关闭所有写入器（Parquet 在关闭时写入文件尾）"""
+        sinks, self._sinks = self._sinks, {}
+        for sink in sinks.values():
+            try:
+                sink.close()
+            except Exception as e:
+                log.error(f"关闭输出文件失败 {sink.path}: {e}")
+
     def _add_task_log(self, level: str, message: str, details: Optional[Dict] = None):
         """记录任务日志到数据库"""
         try:
@@ -460,9 +959,8 @@ class BaseCrawler:
 
     def _get_checkpoint_data(self) -> Dict:
         """获取需要持久化的检查点数据，子类可扩展"""
+        # 已完成/失败项由 ProgressManager 的完成索引单独持久化，这里不再展开为列表
         data = {
-            'completed_keywords': list(self.completed_keywords),
-            'failed_keywords': list(self.failed_keywords),
             'completed_tasks': self.completed_tasks,
             'failed_tasks': self.failed_tasks,
             'total_tasks': self.total_tasks,
@@ -478,6 +976,10 @@ class BaseCrawler:
             data['output_name'] = self.output_name
         if self.custom_output_dir:
             data['custom_output_dir'] = self.custom_output_dir
+        # 延迟重试中的任务：重试次数与到期时间（断点续爬后继续退避）
+        retry_state = self.retry_scheduler.snapshot()
+        if retry_state:
+            data['retry_state'] = retry_state
         return data
 
     def _init_progress_manager(self, db_path: str):
@@ -485,6 +987,9 @@ class BaseCrawler:
         if self.progress_manager:
             self.progress_manager.close()
         self.progress_manager = ProgressManager(db_path, self.task_id)
+        # 与进度管理器共用完成索引，避免内存中保存两份
+        self.completed_keywords = self.progress_manager.completed
+        self.failed_keywords = self.progress_manager.failed
 
     def _save_global_checkpoint(self):
         """
@@ -500,6 +1005,8 @@ class BaseCrawler:
         elif self.checkpoint_path:
             try:
                 checkpoint_data = self._get_checkpoint_data()
+                checkpoint_data['completed_keywords'] = list(self.completed_keywords)
+                checkpoint_data['failed_keywords'] = list(self.failed_keywords)
                 storage_service.save_pickle(checkpoint_data, self.checkpoint_path)
             except Exception as e:
                 log.error(f"Save Checkpoint Error: {e}")
@@ -550,6 +1057,8 @@ class BaseCrawler:
                         )
                         self._init_progress_manager(new_db_path)
                         self.progress_manager.migrate_from_dict(data)
+                        data = dict(data, completed_keywords=self.progress_manager.completed,
+                                    failed_keywords=self.progress_manager.failed)
                         
                         # 恢复实例状态
                         self._restore_from_checkpoint(data)
@@ -572,10 +1081,10 @@ class BaseCrawler:
     def _restore_from_checkpoint(self, data: Dict):
         """从检查点字典恢复实例状态（通用逻辑，子类可调用 super 后提取额外字段）"""
         completed_keywords = data.get('completed_keywords', [])
-        self.completed_keywords = set(completed_keywords) if isinstance(completed_keywords, list) else completed_keywords
+        self.completed_keywords = completed_keywords if isinstance(completed_keywords, CompletionSet) else CompletionSet(completed_keywords)
         
         failed_keywords = data.get('failed_keywords', [])
-        self.failed_keywords = set(failed_keywords) if isinstance(failed_keywords, list) else failed_keywords
+        self.failed_keywords = failed_keywords if isinstance(failed_keywords, CompletionSet) else CompletionSet(failed_keywords)
         
         # 使用实际集合大小，比存储的计数器更准确（防止崩溃导致计数器不一致）
         self.completed_tasks = len(self.completed_keywords)
@@ -603,6 +1112,7 @@ class BaseCrawler:
             self.output_name = data['output_name']
         if data.get('custom_output_dir'):
             self.custom_output_dir = data['custom_output_dir']
+        self.retry_scheduler.restore(data.get('retry_state'))
 
     def _mark_items_completed(self, keys: List[str]):
         """
@@ -611,6 +1121,7 @@ class BaseCrawler:
         """
         self.completed_keywords.update(keys)
         self.completed_tasks += len(keys)
+        self.retry_scheduler.discard(keys)
         if self.progress_manager:
             self.progress_manager.mark_completed(keys)
         self._maybe_report_progress()
@@ -622,6 +1133,7 @@ class BaseCrawler:
         """
         self.failed_keywords.update(keys)
         self.failed_tasks += len(keys)
+        self.retry_scheduler.discard(keys)
         if self.progress_manager:
             self.progress_manager.mark_failed(keys)
         self._maybe_report_progress()
@@ -885,7 +1397,7 @@ class BaseCrawler:
     def _convert_output_files(self):
         """
         将输出文件从 CSV 转换为用户指定的格式。
-        仅在 output_format != 'csv' 且任务有输出文件时执行。
+        仅在 output_format != 'csv' 且任务有输出文件时执行；已由原生写入器（如 Parquet）输出的文件不再转换。
         """
         if self.output_format == 'csv' or not self.output_files:
             return
@@ -907,7 +1419,7 @@ class BaseCrawler:
 
     def _finalize_crawl(self, status: str, message: Optional[str] = None) -> bool:
         """爬取结束后的通用清理逻辑"""
-        self._flush_buffer(force=True)
+        self._flush_all()
         
         # 格式转换（CSV → 用户指定格式）
         if status in ('completed', 'failed'):
@@ -936,15 +1448,17 @@ class BaseCrawler:
         # 更新数据库中的任务状态
         self._update_task_db_status(status, progress=100, error_message=message)
         
+        if self.concurrency_controller is not None:
+            log.info(f"[{self.task_type}] 自适应并发: {self.concurrency_controller.get_stats()}")
+        
         # 记录汇总统计到 spider_statistics
         try:
-            from src.data.repositories.statistics_repository import statistics_repo
             duration = 0
             if self.start_time:
                 duration = (datetime.now() - self.start_time).total_seconds()
             
             # 这里的 total_delta 等是相对于该任务的
-            statistics_repo.update_spider_summary(
+            stats_aggregator.record_task_summary(
                 task_type=self.task_type,
                 total_delta=1, # 一个任务实例
                 completed_delta=1 if status == 'completed' else 0,
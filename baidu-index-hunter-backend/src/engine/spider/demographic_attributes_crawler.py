@@ -8,10 +8,15 @@ from src.core.logger import log
 from src.utils.decorators import retry
 from src.engine.spider.base_crawler import BaseCrawler, CrawlerInterrupted
 from src.services.processor_service import data_processor
+from src.services.concurrency_controller import OUTCOME_ERROR, status_outcome
 
 class DemographicAttributesCrawler(BaseCrawler):
     """人群属性爬虫，负责获取百度指数的人群属性数据（性别、年龄等）"""
     
+    retry_budget_method = 'get_demographic_attributes'
+    # TGI 为空时记为 '-'；比例可能为整数或小数
+    output_column_types = {'data': {'比例': 'float64', 'TGI': 'string'}}
+    
     def __init__(self):
         """初始化人群属性爬虫"""
         super().__init__(task_type="demographic")
@@ -33,7 +38,10 @@ class DemographicAttributesCrawler(BaseCrawler):
         """
         处理单个任务（一批关键词）
         """
-        result = self.get_demographic_attributes(batch_keywords)
+        result = self._cached_fetch(
+            'demographic_attributes', {'wordlist': batch_keywords},
+            lambda: self.get_demographic_attributes(batch_keywords)
+        )
         
         if not result:
             raise Exception("Failed to get demographic attributes from API")
@@ -53,13 +61,14 @@ class DemographicAttributesCrawler(BaseCrawler):
         获取人群属性数据 API 请求
         使用 wordlist[] 参数格式批量查询关键词
         """
+        account_id = None
         try:
             account_id, cookie_dict = self._get_cookie_dict()
             if not cookie_dict:
                 return None
             
-            from src.utils.rate_limiter import rate_limiter
-            rate_limiter.wait()
+            # 按账号令牌桶限速
+            self._wait_rate_limit(account_id)
             
             import requests
             
@@ -73,6 +82,7 @@ class DemographicAttributesCrawler(BaseCrawler):
             params = [('wordlist[]', kw) for kw in keywords]
             
             log.info(f"[{self.task_type}] Requesting demographic attributes: {keywords}")
+            started = time.monotonic()
             response = requests.get(
                 url=self.social_api_url,
                 headers=headers,
@@ -80,30 +90,40 @@ class DemographicAttributesCrawler(BaseCrawler):
                 params=params,
                 timeout=15
             )
+            latency = time.monotonic() - started
             
             if response.status_code != 200:
+                self._record_response(OUTCOME_ERROR, latency)
                 log.error(f"[{self.task_type}] HTTP Error: {response.status_code}")
-                self.cookie_rotator.report_cookie_status(account_id, False)
+                self.cookie_rotator.report_cookie_status(account_id, False, endpoint=self.task_type)
                 return None
             
-            result = response.json()
+            try:
+                result = response.json()
+            except ValueError:
+                self._record_response(status_outcome(None, has_body=False), latency)
+                raise
+            self._record_response(status_outcome(result.get('status')), latency)
             log.info(f"[{self.task_type}] API Response status: {result.get('status')}")
             
             if result.get('status') != 0:
                 msg = result.get('message', '')
                 log.error(f"[{self.task_type}] API Error: {msg}")
                 if "not login" in msg.lower():
-                    self.cookie_rotator.report_cookie_status(account_id, False, permanent=True)
+                    self.cookie_rotator.report_cookie_status(account_id, False, permanent=True, endpoint=self.task_type)
                 else:
-                    self.cookie_rotator.report_cookie_status(account_id, False)
+                    self.cookie_rotator.report_cookie_status(account_id, False, endpoint=self.task_type)
                 return None
                 
-            self.cookie_rotator.report_cookie_status(account_id, True)
+            self.cookie_rotator.report_cookie_status(account_id, True, endpoint=self.task_type)
             return result
             
         except Exception as e:
             log.error(f"[{self.task_type}] Request Error: {e}")
             return None
+        finally:
+            # 集群模式下释放 Cookie 租约
+            self._release_cookie(account_id)
 
     def crawl(self, keywords: List[str], output_format=None, output_dir=None, output_name=None, **kwargs):
         """
@@ -111,6 +131,7 @@ class DemographicAttributesCrawler(BaseCrawler):
         """
         self._apply_output_format(output_format or kwargs.get('output_format'))
         self._apply_output_settings(output_dir, output_name)
+        self._apply_crawl_mode(kwargs.get('crawl_mode'))
         
         # 1. 初始化任务
         if kwargs.get('resume') and (kwargs.get('task_id') or kwargs.get('checkpoint_task_id')):
@@ -130,49 +151,35 @@ class DemographicAttributesCrawler(BaseCrawler):
         
         # 2. 准备任务
         tasks = self._prepare_tasks(keywords, **kwargs)
-        self.total_tasks = len(tasks)
-        
-        # 3. 恢复后的起始索引
-        start_index = self.completed_tasks
+        # 进度按关键词计数（完成/失败均按批次内的关键词标记）
+        self.total_tasks = sum(len(batch) for batch in tasks)
         
         self._update_task_db_status('running', 0)
         self._add_task_log('info', f"开始执行人口属性爬取任务，总关键词数: {len(keywords)}")
         
-        try:
-            for i in range(start_index, len(tasks)):
-                self.check_running()
-                batch = tasks[i]
-                try:
-                    df = self._process_task(batch)
-                    
-                    with self.task_lock:
-                        if df is not None and not df.empty:
-                            # 整个任务只保留一次“全网分布”数据
-                            if self.all_network_processed:
-                                df = df[df['关键词'] != '全网分布']
-                            elif '全网分布' in df['关键词'].values:
-                                self.all_network_processed = True
-                                
-                            if not df.empty:
-                                self.data_cache.extend(df.to_dict('records'))
-                                
-                                # 生成统计信息并存入 stats_cache
-                                from src.engine.processors.demographic_processor import demographic_processor
-                                for kw in batch:
-                                    stats = demographic_processor.process_demographic_stats(df, kw)
-                                    if stats:
-                                        self.stats_cache.append(stats)
-                                
-                        self._mark_items_completed(list(batch))
-                            
-                    self._flush_buffer()
-                    
-                except Exception as e:
-                    self.failed_tasks += 1
-                    log.error(f"[{self.task_type}] Batch failed: {batch}, Error: {e}")
-                    self._update_task_db_status('running', error_message=str(e))
+        from src.engine.processors.demographic_processor import demographic_processor
+        
+        def on_result(batch, df):
+            if df is None or df.empty:
+                return
+            # 整个任务只保留一次“全网分布”数据
+            if self.all_network_processed:
+                df = df[df['关键词'] != '全网分布']
+            elif '全网分布' in df['关键词'].values:
+                self.all_network_processed = True
                 
-                time.sleep(1)
+            if not df.empty:
+                self.data_cache.extend(df.to_dict('records'))
+                
+                # 生成统计信息并存入 stats_cache
+                for kw in batch:
+                    stats = demographic_processor.process_demographic_stats(df, kw)
+                    if stats:
+                        self.stats_cache.append(stats)
+        
+        try:
+            # 3. 并发执行，已完成的批次按关键词跳过
+            self._run_task_items(tasks, list, on_result)
 
             return self._finalize_crawl('completed')
             
@@ -5,16 +5,19 @@ import urllib.parse
 from typing import List, Dict, Any, Optional, Union, Tuple
 import os
 import json
-import requests
+import time
 import traceback
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from src.core.logger import log
-from src.utils.rate_limiter import rate_limiter
+from src.utils.rate_limiter import cookie_rate_limiter
 from src.utils.decorators import retry
-from src.engine.crypto.cipher_generator import cipher_text_generator
+from src.engine.crypto.cipher_generator import cipher_text_generator, build_cipher_url
+from src.engine.core.http_engine import get_http_engine
 from src.services.processor_service import data_processor
+from src.services.concurrency_controller import status_outcome, OUTCOME_ERROR
+from src.services.date_planner import FEED_VALUE_FIELDS
 from src.core.config import BAIDU_INDEX_API, OUTPUT_DIR
 from fake_useragent import UserAgent
 from src.engine.spider.base_crawler import BaseCrawler, CrawlerInterrupted
@@ -27,6 +30,11 @@ class NoCookieAvailableError(Exception):
 class FeedIndexCrawler(BaseCrawler):
     """百度资讯指数爬虫类"""
     
+    window_value_fields = FEED_VALUE_FIELDS
+    retry_budget_method = '_get_feed_index'
+    # 同比/环比可能为 '-'
+    output_column_types = {'stats': {'资讯指数同比': 'string', '资讯指数环比': 'string'}}
+    
     def __init__(self):
         """初始化爬虫"""
         super().__init__(task_type="feed_index")
@@ -40,10 +48,13 @@ class FeedIndexCrawler(BaseCrawler):
         
         # 设置线程池最大工作线程数 (从配置服务加载，如果基类未提供)
         from src.services.config_service import config_manager
-        self.max_workers = int(config_manager.get('spider.max_workers', 5))
-        self.timeout = int(config_manager.get('spider.timeout', 15))
-        self.retry_times = int(config_manager.get('spider.retry_times', 2))
-        log.info(f"爬虫配置已加载: max_workers={self.max_workers}, timeout={self.timeout}, retry_times={self.retry_times}")
+        self.max_workers = config_manager.get_int('spider.max_workers', 5)
+        self.timeout = config_manager.get_int('spider.timeout', 15)
+        self.retry_times = config_manager.get_int('spider.retry_times', 2)
+        # HTTP 引擎: sync (requests 连接池) / async (aiohttp 事件循环)，按账号复用长连接
+        self.http_engine = get_http_engine(config_manager.get('spider.engine', 'sync'))
+        cipher_text_generator.ensure_workers(self.max_workers)
+        log.info(f"爬虫配置已加载: max_workers={self.max_workers}, timeout={self.timeout}, retry_times={self.retry_times}, engine={self.http_engine.name}")
         
     # setup_signal_handlers, handle_exit, _generate_task_id, _update_task_db_status, _update_spider_statistics, _flush_buffer 均由 BaseCrawler 提供
     
@@ -75,18 +86,17 @@ class FeedIndexCrawler(BaseCrawler):
     @retry(max_retries=3, delay=2)
     def _get_cipher_text(self, keyword):
         """获取Cipher-Text参数"""
-        encoded_keyword = keyword.replace(' ', '%20')
-        cipher_url = f'{BAIDU_INDEX_API["referer"]}#/trend/{encoded_keyword}?words={encoded_keyword}'
-        return cipher_text_generator.generate(cipher_url)
+        return cipher_text_generator.generate(build_cipher_url(keyword))
     
     @retry(max_retries=3, delay=2)
     
     @retry(max_retries=3, delay=2)
     def _get_feed_index(self, area, keywords, start_date=None, end_date=None, days=None):
         """获取资讯指数数据"""
-        # 使用rate_limiter来限制请求频率
-        rate_limiter.wait()
-        
+        return self._run_request_steps(self._feed_index_request(area, keywords, start_date, end_date, days))
+
+    def _feed_index_request(self, area, keywords, start_date=None, end_date=None, days=None):
+        """_get_feed_index 的请求步骤（见 BaseCrawler._run_request_steps），返回 (data, cookie_dict) 或 None"""
         # 构建word参数
         word_param_list = []
         for keyword in keywords:
@@ -112,63 +122,78 @@ class FeedIndexCrawler(BaseCrawler):
             # 修改这里：不再等待，而是抛出特定异常，以便上层处理
             log.warning("所有Cookie均被锁定，无法继续爬取")
             raise NoCookieAvailableError("所有Cookie均被锁定，无法继续爬取")
+        try:
+            # 按账号令牌桶限速
+            self._wait_rate_limit(account_id)
             
-        # 获取Cipher-Text
-        cipher_text = self._get_cipher_text(keywords[0])
+            # 获取Cipher-Text
+            cipher_text = self._get_cipher_text(keywords[0])
         
-        headers = {
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Cache-Control': 'no-cache',
-            'Cipher-Text': cipher_text,
-            'Connection': 'keep-alive',
-            'Pragma': 'no-cache',
-            'Referer': BAIDU_INDEX_API['referer'],
-            'User-Agent': self.ua.random,
-        }
+            headers = {
+                'Accept': 'application/json, text/plain, */*',
+                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+                'Cache-Control': 'no-cache',
+                'Cipher-Text': cipher_text,
+                'Connection': 'keep-alive',
+                'Pragma': 'no-cache',
+                'Referer': BAIDU_INDEX_API['referer'],
+                'User-Agent': self.ua.random,
+            }
         
-        response = requests.get(url, cookies=cookie_dict, headers=headers)
+            started = time.monotonic()
+            response = yield {'url': url, 'cookies': cookie_dict, 'headers': headers,
+                              'timeout': self.timeout, 'pool_key': account_id}
+            latency = response.elapsed if response.elapsed is not None else time.monotonic() - started
         
-        if response.status_code != 200:
-            log.error(f"请求失败: {response.status_code}")
-            return None
+            if response.status_code != 200:
+                log.error(f"请求失败: {response.status_code}")
+                self._record_response(OUTCOME_ERROR, latency)
+                return None
             
-        data = response.json()
-        res_data = data.get('data', {})
+            if not response.text.strip():
+                self._record_response(status_outcome(None, has_body=False), latency)
+            data = response.json()
+            res_data = data.get('data', {})
         
-        # 检查响应状态
-        status = data.get('status')
-        if status == 10001:  # 请求被锁定
-            log.warning(f"Cookie被临时锁定: {account_id}")
-            self.cookie_rotator.report_cookie_status(account_id, False)
-            return None
-        elif status == 10000:  # 未登录
-            log.warning(f"Cookie无效或已过期: {account_id}")
-            self.cookie_rotator.report_cookie_status(account_id, False, permanent=True)
-            return None
-        elif status == 1:  # 无数据 (正常情况，如日期太早)
-            log.info(f"关键词 {keywords} 在城市 {area} 无数据 (status: 1)")
-            return data, cookie_dict
-        elif status != 0:
-            log.error(f"请求失败: {data}")
-            return None
+            # 检查响应状态
+            status = data.get('status')
+            self._record_response(status_outcome(status), latency)
+            if status == 10001:  # 请求被锁定
+                log.warning(f"Cookie被临时锁定: {account_id}")
+                self._report_cookie_status(account_id, False)
+                return None
+            elif status == 10000:  # 未登录
+                log.warning(f"Cookie无效或已过期: {account_id}")
+                self._report_cookie_status(account_id, False, permanent=True)
+                return None
+            elif status == 1:  # 无数据 (正常情况，如日期太早)
+                log.info(f"关键词 {keywords} 在城市 {area} 无数据 (status: 1)")
+                return data, cookie_dict
+            elif status != 0:
+                log.error(f"请求失败: {data}")
+                return None
         
-        # 打印调试信息：检查返回的数据结构
-        log.debug(f"API响应状态: status={status}, 关键词数量: {len(keywords)}, 城市代码: {area}")
-        if res_data and res_data.get('index'):
-            index_list = res_data.get('index', [])
-            log.debug(f"返回的index数组长度: {len(index_list)}")
-            for idx, index_item in enumerate(index_list):
-                key_info = index_item.get('key', [])
-                data_type = index_item.get('type', 'unknown')
-                raw_data_len = len(index_item.get('data', ''))
-                log.debug(f"index[{idx}]: key={json.dumps(key_info, ensure_ascii=False)}, type={data_type}, data长度={raw_data_len}")
-                if raw_data_len == 0:
-                    log.warning(f"警告: index[{idx}] 的data字段为空! key={json.dumps(key_info, ensure_ascii=False)}")
-        else:
-            log.warning(f"API返回数据格式异常: data字段={data.get('data')}, message={data.get('message', '')}")
+            cookie_rate_limiter.report_success(account_id, self.task_type)
+            self._prefetch_ptbk_key(data, cookie_dict)
+            # 打印调试信息：检查返回的数据结构
+            log.debug(f"API响应状态: status={status}, 关键词数量: {len(keywords)}, 城市代码: {area}")
+            if res_data and res_data.get('index'):
+                index_list = res_data.get('index', [])
+                log.debug(f"返回的index数组长度: {len(index_list)}")
+                for idx, index_item in enumerate(index_list):
+                    key_info = index_item.get('key', [])
+                    data_type = index_item.get('type', 'unknown')
+                    raw_data_len = len(index_item.get('data', ''))
+                    log.debug(f"index[{idx}]: key={json.dumps(key_info, ensure_ascii=False)}, type={data_type}, data长度={raw_data_len}")
+                    if raw_data_len == 0:
+                        log.warning(f"警告: index[{idx}] 的data字段为空! key={json.dumps(key_info, ensure_ascii=False)}")
+            else:
+                log.warning(f"API返回数据格式异常: data字段={data.get('data')}, message={data.get('message', '')}")
             
-        return data, cookie_dict
+            return data, cookie_dict
+        finally:
+            # 集群模式下释放 Cookie 租约
+            self._release_cookie(account_id)
     
     def _process_feed_index_data(self, data, cookie, keyword, city_code, city_name, start_date, end_date):
         """处理资讯指数数据（单个关键词）"""
@@ -185,10 +210,17 @@ class FeedIndexCrawler(BaseCrawler):
     
     def _process_task(self, task_data):
         """
-        处理单个任务的函数，用于线程池
+        处理单个任务的函数，用于线程池（接口请求经 @retry 装饰的 _get_feed_index）
+        日期窗口由多个请求范围合并而来时，结果按范围拆分，完成键对应每个 关键词 × 请求范围
+        """
+        return self._run_request_steps(self._task_steps(task_data, fetch=self._get_feed_index))
+
+    def _task_steps(self, task_data, fetch=None):
+        """
+        单个任务的请求步骤（异步引擎下由事件循环驱动，见 BaseCrawler._submit_task）
+        fetch 为同步请求方法时直接调用，否则由 _feed_index_request 产生请求步骤
         """
         self.check_running()
-        rate_limiter.wait()
         
         # 判断第一个参数是单个关键词还是关键词列表
         if isinstance(task_data[0], list):
@@ -205,53 +237,43 @@ class FeedIndexCrawler(BaseCrawler):
         
         log.debug(f"开始处理任务: {task_desc}, 日期: {start_date} 至 {end_date}")
         
+        task_keys = self._task_keys(task_data)
+        # 单关键词、单范围时沿用字符串键，其余情况返回键列表
+        result_keys = task_keys if is_batch or len(task_keys) > 1 else task_keys[0]
+        
         # 检查任务是否已完成（成功完成的任务跳过，失败的任务需要重试）
-        if not is_batch:
-            task_key = f"{keyword}_{city_code}_{start_date}_{end_date}"
-            if task_key in self.completed_keywords:
-                # 如果任务已完成，直接返回None，不增加completed_tasks计数
-                return None
-            # 如果任务之前失败过，从失败集合中移除（准备重试）
-            if task_key in self.failed_keywords:
-                with self.task_lock:
+        if all(task_key in self.completed_keywords for task_key in task_keys):
+            # 如果任务已完成，直接返回None，不增加completed_tasks计数
+            return None
+        # 如果任务之前失败过，从失败集合中移除（准备重试）
+        retry_keys = [task_key for task_key in task_keys if task_key in self.failed_keywords]
+        if retry_keys:
+            with self.task_lock:
+                for task_key in retry_keys:
                     self.failed_keywords.discard(task_key)
-        else:
-            # 批量模式下，检查所有关键词是否都已完成
-            all_completed = True
-            for keyword in keywords:
-                task_key = f"{keyword}_{city_code}_{start_date}_{end_date}"
-                if task_key not in self.completed_keywords:
-                    all_completed = False
-                    break
-                # 如果任务之前失败过，从失败集合中移除（准备重试）
-                if task_key in self.failed_keywords:
-                    with self.task_lock:
-                        self.failed_keywords.discard(task_key)
-            
-            if all_completed:
-                return None
         
         try:
             # 获取数据
-            result = self._get_feed_index(city_code, keywords, start_date, end_date)
+            if fetch is not None:
+                steps = self._call_steps(fetch, city_code, keywords, start_date, end_date)
+            else:
+                steps = self._feed_index_request(city_code, keywords, start_date, end_date)
+            result = yield from self._cached_index_steps(
+                'feed_index',
+                {'area': city_code, 'words': keywords, 'startDate': start_date, 'endDate': end_date},
+                steps
+            )
             if not result:
                 log.warning(f"获取数据失败，标记为失败任务: {task_desc}")
-                
                 # 返回失败标记，不保存空数据
-                if not is_batch:
-                    return task_key, None, None, False
-                else:
-                    return [f"{kw}_{city_code}_{start_date}_{end_date}" for kw in keywords], None, None, False
+                return result_keys, None, None, False
         except NoCookieAvailableError:
             # 向上层抛出异常，通知主线程暂停任务
             raise
         except Exception as e:
             log.error(f"处理任务时出错: {e}")
             # 返回失败标记，不保存空数据
-            if not is_batch:
-                return task_key, None, None, False
-            else:
-                return [f"{kw}_{city_code}_{start_date}_{end_date}" for kw in keywords], None, None, False
+            return result_keys, None, None, False
         
         data, cookie = result
         
@@ -264,11 +286,14 @@ class FeedIndexCrawler(BaseCrawler):
             
             # 如果处理结果为None，标记为失败
             if daily_data is None or stats_record is None:
-                log.warning(f"处理数据失败，标记为失败任务: {task_key}")
-                return task_key, None, None, False
+                log.warning(f"处理数据失败，标记为失败任务: {result_keys}")
+                return result_keys, None, None, False
             
+            if isinstance(result_keys, list):
+                daily_data, stats_records = self._split_window_results(daily_data, [stats_record], start_date, end_date)
+                return result_keys, daily_data, stats_records, True
             # 成功获取数据
-            return task_key, daily_data, stats_record, True
+            return result_keys, daily_data, stats_record, True
         else:
             # 批量处理多个关键词
             daily_data_list, stats_records_list = self._process_multi_feed_index_data(
@@ -278,13 +303,66 @@ class FeedIndexCrawler(BaseCrawler):
             # 如果处理结果为空，标记为失败
             if not daily_data_list or not stats_records_list:
                 log.warning(f"批量处理数据失败，标记为失败任务: {city_code}, {start_date}-{end_date}, 关键词数量: {len(keywords)}")
-                return [f"{kw}_{city_code}_{start_date}_{end_date}" for kw in keywords], None, None, False
+                return result_keys, None, None, False
             
+            daily_data_list, stats_records_list = self._split_window_results(
+                daily_data_list, stats_records_list, start_date, end_date
+            )
             # 成功获取数据
-            return [f"{kw}_{city_code}_{start_date}_{end_date}" for kw in keywords], daily_data_list, stats_records_list, True
+            return result_keys, daily_data_list, stats_records_list, True
     
     # _process_year_range, _load_keywords_from_file, _load_cities_from_file, _load_date_ranges_from_file, _save_data_to_file(_flush_buffer), _fast_count_csv_rows 均由 BaseCrawler 提供
     
+    def _iter_tasks(self, keywords, date_ranges, batch_size):
+        """按 关键词批次 × 城市 × 日期范围 依次产出未完成的任务"""
+        for i in range(0, len(keywords), batch_size):
+            batch = keywords[i:i+batch_size]
+            for city_code, city_name in self.city_dict.items():
+                for start_date, end_date in date_ranges:
+                    task_keys = self._window_task_keys(batch, city_code, start_date, end_date)
+                    if all(tk in self.completed_keywords for tk in task_keys): continue
+                    yield (batch if batch_size > 1 else batch[0], city_code, city_name, start_date, end_date)
+
+    def _task_keys(self, task_data):
+        """任务对应的完成键（与 _process_task 返回的键一致）"""
+        keywords = task_data[0] if isinstance(task_data[0], list) else [task_data[0]]
+        city_code, _, start_date, end_date = task_data[1:]
+        return self._window_task_keys(keywords, city_code, start_date, end_date)
+
+    def _handle_task_future(self, future, task=None):
+        """汇总单个任务结果（Cookie 耗尽异常向上抛出）"""
+        try:
+            result = future.result()
+            if not result: return
+            
+            # result: (keys, daily, stats, success) or similar
+            if len(result) == 4:
+                task_keys, daily_data, stats_records, success = result
+                is_batch = isinstance(task_keys, list)
+                keys = task_keys if is_batch else [task_keys]
+                
+                if success and daily_data:
+                    if is_batch:
+                        self.data_cache.extend(daily_data)
+                        self.stats_cache.extend(stats_records)
+                    else:
+                        self.data_cache.extend(daily_data)
+                        self.stats_cache.append(stats_records)
+                    
+                    self._mark_items_completed(keys)
+                elif not (task is not None and self._defer_retry(task, keys)):
+                    self._mark_items_failed(keys)
+            
+            if (self.completed_tasks + self.failed_tasks) % 10 == 0:
+                self._save_global_checkpoint()
+                if len(self.data_cache) >= 100: self._flush_buffer()
+
+        except NoCookieAvailableError:
+            raise
+        except Exception as e:
+            log.error(f"Task error: {e}")
+            log.error(traceback.format_exc())
+
     def crawl(self, task_id=None, keywords=None, cities=None, date_ranges=None, days=None, 
               keywords_file=None, cities_file=None, date_ranges_file=None,
               year_range=None, resume=False, checkpoint_task_id=None, total_tasks=None, batch_size=5,
@@ -294,6 +372,7 @@ class FeedIndexCrawler(BaseCrawler):
             # 设置输出格式和输出路径设置
             self._apply_output_format(output_format or kwargs.get('output_format'))
             self._apply_output_settings(output_dir, output_name)
+            self._apply_crawl_mode(kwargs.get('crawl_mode'))
             
             # 从 kwargs 提取参数，防止 UnboundLocalError 并确保与基类一致
             resume = kwargs.get('resume', resume)
@@ -365,62 +444,41 @@ class FeedIndexCrawler(BaseCrawler):
             log.info(f"Task ID: {self.task_id}, Total: {self.total_tasks}")
 
             # 3. 准备子任务
-            all_tasks = []
-            batch_size = min(batch_size, 5)
-            for i in range(0, len(keywords), batch_size):
-                batch = keywords[i:i+batch_size]
-                for city_code, city_name in self.city_dict.items():
-                    for start_date, end_date in date_ranges:
-                        task_keys = [f"{kw}_{city_code}_{start_date}_{end_date}" for kw in batch]
-                        if all(tk in self.completed_keywords for tk in task_keys): continue
-                        all_tasks.append((batch if batch_size > 1 else batch[0], city_code, city_name, start_date, end_date))
+            tasks = self._iter_tasks(keywords, self._plan_date_windows(date_ranges), min(batch_size, 5))
+            if self.streaming_enabled:
+                has_tasks, tasks = self._peek_tasks(tasks)
+            else:
+                tasks = list(tasks)
+                has_tasks = bool(tasks)
 
-            if not all_tasks:
+            if not has_tasks:
                 log.info("All tasks completed")
                 self._update_task_db_status('completed', progress=100)
                 return True
 
             # 4. 执行抓取
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_task = {executor.submit(self._process_task, task): task for task in all_tasks}
-                for future in as_completed(future_to_task):
-                    self.check_running()
-                    try:
-                        result = future.result()
-                        if not result: continue
-                        
-                        # result: (keys, daily, stats, success) or similar
-                        if len(result) == 4:
-                            task_keys, daily_data, stats_records, success = result
-                            is_batch = isinstance(task_keys, list)
-                            keys = task_keys if is_batch else [task_keys]
-                            
-                            if success and daily_data:
-                                if is_batch:
-                                    self.data_cache.extend(daily_data)
-                                    self.stats_cache.extend(stats_records)
-                                else:
-                                    self.data_cache.extend(daily_data)
-                                    self.stats_cache.append(stats_records)
-                                
-                                self._mark_items_completed(keys)
-                            else:
-                                self._mark_items_failed(keys)
-                        
-                        if (self.completed_tasks + self.failed_tasks) % 10 == 0:
-                            self._save_global_checkpoint()
-                            if len(self.data_cache) >= 100: self._flush_buffer()
-
-                    except NoCookieAvailableError:
-                        log.error("No cookies available, pausing task")
-                        self._flush_buffer(force=True)
-                        self._update_task_db_status('paused', error_message="No cookies available")
-                        return False
-                    except Exception as e:
-                        log.error(f"Task error: {e}")
-                        log.error(traceback.format_exc())
+            future_to_task = {}
+            with ThreadPoolExecutor(max_workers=self._pool_size(), initializer=self._worker_initializer()) as executor:
+                try:
+                    if self.streaming_enabled:
+                        self._run_streaming(executor, self._with_cipher_prefetch(tasks), self._handle_task_future,
+                                            task_keys=self._task_keys, with_task=True)
+                    else:
+                        future_to_task = {self._submit_task(executor, task): task for task in tasks}
+                        for future in as_completed(future_to_task):
+                            self.check_running()
+                            self._handle_task_future(future, future_to_task[future])
+                        # 批量提交的任务跑完后，继续执行延迟重试队列中的任务
+                        self._run_streaming(executor, (), self._handle_task_future, with_task=True)
+                except NoCookieAvailableError:
+                    log.error("No cookies available, pausing task")
+                    self._flush_all()
+                    self._update_task_db_status('paused', error_message="No cookies available")
+                    for f in future_to_task: f.cancel()
+                    return False
 
             # 5. 完成
+            status = 'failed' if self.failed_tasks > 0 else 'completed'
             msg = f"Completed with {self.failed_tasks} failed items" if status == 'failed' else None
             return self._finalize_crawl(status, msg)
 
@@ -433,7 +491,7 @@ class FeedIndexCrawler(BaseCrawler):
         except Exception as e:
             log.error(f"Crawl master loop failed: {e}")
             log.error(traceback.format_exc())
-            self._flush_buffer(force=True)
+            self._flush_all()
             if self.progress_manager:
                 self.progress_manager.close()
                 self.progress_manager = None
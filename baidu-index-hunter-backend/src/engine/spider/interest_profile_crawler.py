@@ -8,10 +8,15 @@ from src.core.logger import log
 from src.utils.decorators import retry
 from src.engine.spider.base_crawler import BaseCrawler, CrawlerInterrupted
 from src.services.processor_service import data_processor
+from src.services.concurrency_controller import OUTCOME_ERROR, status_outcome
 
 class InterestProfileCrawler(BaseCrawler):
     """兴趣分布爬虫，负责获取百度指数的人群兴趣画像数据"""
     
+    retry_budget_method = 'get_interest_profiles'
+    # TGI 为空时记为 '-'；占比可能为整数或小数
+    output_column_types = {'data': {'占比': 'float64', 'TGI': 'string'}}
+    
     def __init__(self):
         """初始化兴趣分布爬虫"""
         super().__init__(task_type="interest_profile")
@@ -42,7 +47,10 @@ class InterestProfileCrawler(BaseCrawler):
         :return: 处理后的数据 DataFrame
         """
         # 获取兴趣分布数据
-        result = self.get_interest_profiles(batch_keywords)
+        result = self._cached_fetch(
+            'interest_profile', {'wordlist': batch_keywords},
+            lambda: self.get_interest_profiles(batch_keywords)
+        )
         
         if not result:
             raise Exception("Failed to get interest profiles from API")
@@ -63,14 +71,15 @@ class InterestProfileCrawler(BaseCrawler):
         获取兴趣分布数据 API 请求
         使用 wordlist[] 参数格式批量查询关键词
         """
+        account_id = None
         try:
             # 获取可用Cookie (使用基类方法)
             account_id, cookie_dict = self._get_cookie_dict()
             if not cookie_dict:
                 return None
             
-            from src.utils.rate_limiter import rate_limiter
-            rate_limiter.wait()
+            # 按账号令牌桶限速
+            self._wait_rate_limit(account_id)
             
             import requests
             
@@ -85,6 +94,7 @@ class InterestProfileCrawler(BaseCrawler):
             params.append(('typeid', typeid or ''))
             
             log.info(f"[{self.task_type}] Requesting interest profiles: {keywords}")
+            started = time.monotonic()
             response = requests.get(
                 url=self.interest_api_url,
                 headers=headers,
@@ -92,30 +102,40 @@ class InterestProfileCrawler(BaseCrawler):
                 params=params,
                 timeout=15
             )
+            latency = time.monotonic() - started
             
             if response.status_code != 200:
+                self._record_response(OUTCOME_ERROR, latency)
                 log.error(f"[{self.task_type}] HTTP Error: {response.status_code}")
-                self.cookie_rotator.report_cookie_status(account_id, False)
+                self.cookie_rotator.report_cookie_status(account_id, False, endpoint=self.task_type)
                 return None
             
-            result = response.json()
+            try:
+                result = response.json()
+            except ValueError:
+                self._record_response(status_outcome(None, has_body=False), latency)
+                raise
+            self._record_response(status_outcome(result.get('status')), latency)
             log.info(f"[{self.task_type}] API Response status: {result.get('status')}")
             
             if result.get('status') != 0:
                 msg = result.get('message', '')
                 log.error(f"[{self.task_type}] API Error: {msg}")
                 if "not login" in msg.lower():
-                    self.cookie_rotator.report_cookie_status(account_id, False, permanent=True)
+                    self.cookie_rotator.report_cookie_status(account_id, False, permanent=True, endpoint=self.task_type)
                 else:
-                    self.cookie_rotator.report_cookie_status(account_id, False)
+                    self.cookie_rotator.report_cookie_status(account_id, False, endpoint=self.task_type)
                 return None
                 
-            self.cookie_rotator.report_cookie_status(account_id, True)
+            self.cookie_rotator.report_cookie_status(account_id, True, endpoint=self.task_type)
             return result
             
         except Exception as e:
             log.error(f"[{self.task_type}] Request Error: {e}")
             return None
+        finally:
+            # 集群模式下释放 Cookie 租约
+            self._release_cookie(account_id)
 
     def crawl(self, keywords: List[str], output_format=None, output_dir=None, output_name=None, **kwargs):
         """
@@ -128,6 +148,7 @@ class InterestProfileCrawler(BaseCrawler):
         """
         self._apply_output_format(output_format or kwargs.get('output_format'))
         self._apply_output_settings(output_dir, output_name)
+        self._apply_crawl_mode(kwargs.get('crawl_mode'))
         
         # 1. 初始化任务
         if kwargs.get('resume') and (kwargs.get('task_id') or kwargs.get('checkpoint_task_id')):
@@ -147,65 +168,45 @@ class InterestProfileCrawler(BaseCrawler):
         
         # 2. 准备任务
         tasks = self._prepare_tasks(keywords, **kwargs)
-        self.total_tasks = len(tasks)
+        # 进度按关键词计数（完成/失败均按批次内的关键词标记）
+        self.total_tasks = sum(len(batch) for batch in tasks)
         
-        # 3. 恢复后的起始索引
-        start_index = self.completed_tasks
-        if start_index > 0:
-            log.info(f"[{self.task_type}] Resuming from batch index {start_index}")
+        # 3. 恢复时按已完成的关键词跳过
+        if self.completed_tasks > 0:
+            log.info(f"[{self.task_type}] Resuming, {self.completed_tasks} keywords already completed")
         
-        # 4. 执行循环
+        # 4. 并发执行
         self._update_task_db_status('running', 0)
         self._add_task_log('info', f"开始执行兴趣分布爬取任务，总关键词数: {len(keywords)}")
         
-        try:
-            for i in range(start_index, len(tasks)):
-                # 检查运行状态，支持快速停止
-                self.check_running()
-                
-                batch = tasks[i]
+        def on_result(batch, df):
+            if df is None or df.empty:
+                return
+            # 整个任务只保留一次“全网分布”数据
+            if self.all_network_processed:
+                df = df[df['关键词'] != '全网分布']
+            elif '全网分布' in df['关键词'].values:
+                self.all_network_processed = True
                 
-                try:
-                    df = self._process_task(batch)
-                    
-                    with self.task_lock:
-                        if df is not None and not df.empty:
-                            # 整个任务只保留一次“全网分布”数据
-                            if self.all_network_processed:
-                                df = df[df['关键词'] != '全网分布']
-                            elif '全网分布' in df['关键词'].values:
-                                self.all_network_processed = True
-                                
-                            if not df.empty:
-                                self.data_cache.extend(df.to_dict('records'))
-                                
-                                # 生成统计信息并存入 stats_cache
-                                for kw in batch:
-                                    kw_df = df[df['关键词'] == kw]
-                                    if not kw_df.empty:
-                                        self.stats_cache.append({
-                                            'task_id': self.task_id,
-                                            '关键词': kw,
-                                            '数据类型': self.task_type,
-                                            '数据周期': kw_df.iloc[0]['数据周期'],
-                                            '数据项数量': len(kw_df),
-                                            '成功数量': 1,
-                                            '失败数量': 0,
-                                        })
-                        
-                        self._mark_items_completed(list(batch))
-                            
-                    # 触发缓存刷新和检查点保存
-                    self._flush_buffer()
-                    
-                except Exception as e:
-                    self.failed_tasks += 1
-                    log.error(f"[{self.task_type}] Batch failed: {batch}, Error: {e}")
-                    # 也是一种推进
-                    self._update_task_db_status('running', error_message=str(e))
+            if not df.empty:
+                self.data_cache.extend(df.to_dict('records'))
                 
-                # 简单的流控，避免过快
-                time.sleep(1)
+                # 生成统计信息并存入 stats_cache
+                for kw in batch:
+                    kw_df = df[df['关键词'] == kw]
+                    if not kw_df.empty:
+                        self.stats_cache.append({
+                            'task_id': self.task_id,
+                            '关键词': kw,
+                            '数据类型': self.task_type,
+                            '数据周期': kw_df.iloc[0]['数据周期'],
+                            '数据项数量': len(kw_df),
+                            '成功数量': 1,
+                            '失败数量': 0,
+                        })
+        
+        try:
+            self._run_task_items(tasks, list, on_result)
 
             # 5. 完成
             return self._finalize_crawl('completed')
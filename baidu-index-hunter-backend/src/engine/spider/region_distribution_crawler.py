@@ -9,10 +9,15 @@ from src.core.logger import log
 from src.utils.decorators import retry
 from src.engine.spider.base_crawler import BaseCrawler, CrawlerInterrupted
 from src.services.processor_service import data_processor
+from src.services.concurrency_controller import OUTCOME_ERROR, status_outcome
 
 class RegionDistributionCrawler(BaseCrawler):
     """地域分布爬虫，负责获取百度指数的地域分布数据"""
     
+    retry_budget_method = 'get_region_distribution'
+    # 大区汇总行的代码为 '-'
+    output_column_types = {'data': {'代码': 'string', '真实占比': 'float64'}}
+    
     # 预定义的天数选项
     DAYS_OPTIONS = [7, 30, 90, 180, 365]
 
@@ -42,11 +47,16 @@ class RegionDistributionCrawler(BaseCrawler):
         """
         处理单个任务
         """
-        result = self.get_region_distribution(
-            keywords=[task_item['keyword']], 
-            region=task_item['region'],
-            start_date=task_item['start_date'],
-            end_date=task_item['end_date']
+        result = self._cached_fetch(
+            'region_distribution',
+            {'words': [task_item['keyword']], 'region': task_item['region'],
+             'startDate': task_item['start_date'], 'endDate': task_item['end_date']},
+            lambda: self.get_region_distribution(
+                keywords=[task_item['keyword']], 
+                region=task_item['region'],
+                start_date=task_item['start_date'],
+                end_date=task_item['end_date']
+            )
         )
         
         if not result:
@@ -78,6 +88,7 @@ class RegionDistributionCrawler(BaseCrawler):
         """
         获取地域分布数据 API 请求
         """
+        account_id = None
         try:
             account_id, cookie_dict = self._get_cookie_dict()
             if not cookie_dict:
@@ -98,8 +109,8 @@ class RegionDistributionCrawler(BaseCrawler):
             query_string = urllib.parse.urlencode(url_params)
             url = f'{self.region_api_url}?{query_string}'
             
-            from src.utils.rate_limiter import rate_limiter
-            rate_limiter.wait()
+            # 按账号令牌桶限速
+            self._wait_rate_limit(account_id)
             
             import requests
             
@@ -111,34 +122,50 @@ class RegionDistributionCrawler(BaseCrawler):
             headers['Referer'] = self.region_api_url
             
             log.info(f"[{self.task_type}] Requesting: {keywords_str} Region:{region} Date:{start_date}-{end_date}")
+            started = time.monotonic()
             response = requests.get(
                 url=url,
                 headers=headers,
                 cookies=cookie_dict,
                 timeout=15
             )
+            latency = time.monotonic() - started
             
             if response.status_code != 200:
-                self.cookie_rotator.report_cookie_status(account_id, False)
+                self._record_response(OUTCOME_ERROR, latency)
+                self.cookie_rotator.report_cookie_status(account_id, False, endpoint=self.task_type)
                 return None
                 
-            result = response.json()
+            try:
+                result = response.json()
+            except ValueError:
+                self._record_response(status_outcome(None, has_body=False), latency)
+                raise
+            self._record_response(status_outcome(result.get('status')), latency)
             log.info(f"[{self.task_type}] API Response: {result}")
             if result.get('status') != 0:
                 msg = result.get('message', '')
                 log.error(f"[{self.task_type}] API Error: {msg}")
                 if "not login" in msg:
-                    self.cookie_rotator.report_cookie_status(account_id, False, permanent=True)
+                    self.cookie_rotator.report_cookie_status(account_id, False, permanent=True, endpoint=self.task_type)
                 else:
-                    self.cookie_rotator.report_cookie_status(account_id, False)
+                    self.cookie_rotator.report_cookie_status(account_id, False, endpoint=self.task_type)
                 return None
                 
-            self.cookie_rotator.report_cookie_status(account_id, True)
+            self.cookie_rotator.report_cookie_status(account_id, True, endpoint=self.task_type)
             return result
             
         except Exception as e:
             log.error(f"[{self.task_type}] Request Error: {e}")
             return None
+        finally:
+            # 集群模式下释放 Cookie 租约
+            self._release_cookie(account_id)
+
+    @staticmethod
+    def _task_keys(task_item: Dict) -> List[str]:
+        """任务对应的完成键"""
+        return [f"{task_item['keyword']}_{task_item['region']}_{task_item['start_date']}"]
 
     def _generate_date_ranges(self, days=None, start_date=None, end_date=None, year_range=None) -> List[Tuple[str, str]]:
         """
@@ -182,6 +209,7 @@ class RegionDistributionCrawler(BaseCrawler):
         """
         self._apply_output_format(output_format or kwargs.get('output_format'))
         self._apply_output_settings(output_dir, output_name)
+        self._apply_crawl_mode(kwargs.get('crawl_mode'))
         
         if isinstance(keywords, str):
             keywords = keywords.split(',') if ',' in keywords else [keywords]
@@ -214,35 +242,18 @@ class RegionDistributionCrawler(BaseCrawler):
         tasks = self._prepare_tasks(keywords, regions, date_ranges)
         self.total_tasks = len(tasks)
         
-        # 3. 恢复后的起始索引
-        start_index = self.completed_tasks
-        
         self._update_task_db_status('running', 0)
         
+        def on_result(task_item, result):
+            df, stats = result
+            if df is not None and not df.empty:
+                self.data_cache.extend(df.to_dict('records'))
+            if stats:
+                self.stats_cache.append(stats)
+        
         try:
-            for i in range(start_index, len(tasks)):
-                self.check_running()
-                task_item = tasks[i]
-                try:
-                    df, stats = self._process_task(task_item)
-                    
-                    with self.task_lock:
-                        if df is not None and not df.empty:
-                            self.data_cache.extend(df.to_dict('records'))
-                        
-                        if stats:
-                            self.stats_cache.append(stats)
-                        
-                        self._mark_items_completed([f"{task_item['keyword']}_{task_item['region']}_{task_item['start_date']}"])
-                    
-                    self._flush_buffer()
-                    
-                except Exception as e:
-                    self.failed_tasks += 1
-                    log.error(f"[{self.task_type}] Task failed: {task_item}, Error: {e}")
-                    self._update_task_db_status('running', error_message=str(e))
-                
-                time.sleep(1)
+            # 3. 并发执行，已完成的任务按键跳过
+            self._run_task_items(tasks, self._task_keys, on_result)
 
             return self._finalize_crawl('completed')
             
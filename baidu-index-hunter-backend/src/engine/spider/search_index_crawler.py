@@ -4,15 +4,20 @@
 import urllib.parse
 import os
 import json
+import time
 import requests
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from src.core.logger import log
-from src.utils.rate_limiter import rate_limiter
 from src.utils.decorators import retry
-from src.engine.crypto.cipher_generator import cipher_text_generator
+from src.utils.rate_limiter import cookie_rate_limiter
+from src.engine.crypto.cipher_generator import cipher_text_generator, build_cipher_url
+from src.engine.core.http_engine import get_http_engine
 from src.services.processor_service import data_processor
+from src.services.concurrency_controller import status_outcome, OUTCOME_ERROR
+from src.services.batch_planner import search_batch_planner, is_compound, MAX_BATCH_SIZE
+from src.services.date_planner import SEARCH_VALUE_FIELDS
 from src.core.config import BAIDU_INDEX_API, OUTPUT_DIR
 from src.engine.spider.base_crawler import BaseCrawler, CrawlerInterrupted
 
@@ -33,22 +38,36 @@ class SearchIndexAPIError(Exception):
 class SearchIndexCrawler(BaseCrawler):
     """百度搜索指数爬虫类（并行版本）"""
     
+    window_value_fields = SEARCH_VALUE_FIELDS
+    retry_budget_method = '_get_search_index'
+    # 同比/环比可能为 '-'
+    output_column_types = {'stats': {f"{prefix}{field}": 'string'
+                                     for prefix in ('整体', '移动', 'PC') for field in ('同比', '环比')}}
+    
     def __init__(self):
         """初始化爬虫"""
         super().__init__(task_type="search_index")
         
         # 爬虫特定配置
         from src.services.config_service import config_manager
-        self.max_workers = int(config_manager.get('spider.max_workers', 5))
-        self.timeout = int(config_manager.get('spider.timeout', 15))
-        self.retry_times = int(config_manager.get('spider.retry_times', 2))
+        self.max_workers = config_manager.get_int('spider.max_workers', 5)
+        self.timeout = config_manager.get_int('spider.timeout', 15)
+        self.retry_times = config_manager.get_int('spider.retry_times', 2)
+        # HTTP 引擎: sync (requests 连接池) / async (aiohttp 事件循环)
+        self.engine = config_manager.get('spider.engine', 'sync')
+        self.http_engine = get_http_engine(self.engine)
+        if self.http_engine.name == 'async':
+            # 异步引擎下工作线程只执行请求之间的计算（签名、解密、解析），等待响应不占线程（见 BaseCrawler._submit_task）
+            self.max_workers = max(self.max_workers, int(config_manager.get('spider.async_workers', 64)))
+        
+        cipher_text_generator.ensure_workers(self.max_workers)
         
         self.current_keyword_index = 0
         self.current_city_index = 0
         self.current_date_range_index = 0
         self.city_dict = {}
         
-        log.info(f"SearchIndexCrawler 爬虫配置已加载: max_workers={self.max_workers}, timeout={self.timeout}, retry_times={self.retry_times}")
+        log.info(f"SearchIndexCrawler 爬虫配置已加载: max_workers={self.max_workers}, timeout={self.timeout}, retry_times={self.retry_times}, engine={self.http_engine.name}")
         
     # --- 覆盖基类方法以处理特定的状态 ---
 
@@ -90,7 +109,10 @@ class SearchIndexCrawler(BaseCrawler):
 
     def _fetch_search_index_raw(self, area, keywords, start_date, end_date):
         """内部方法：发起单次 API 请求，不包含重试逻辑"""
-        rate_limiter.wait()
+        return self._run_request_steps(self._search_index_request(area, keywords, start_date, end_date))
+
+    def _search_index_request(self, area, keywords, start_date, end_date):
+        """单次 API 请求的请求步骤（见 BaseCrawler._run_request_steps），返回 (data, cookie_dict)"""
         word_param = self._build_word_param(keywords)
         encoded_word = urllib.parse.quote(word_param)
         url = f"{BAIDU_INDEX_API['search_url']}?area={area}&word={encoded_word}&startDate={start_date}&endDate={end_date}"
@@ -98,53 +120,71 @@ class SearchIndexCrawler(BaseCrawler):
         account_id, cookie_dict = self._get_cookie_dict()
         if not cookie_dict:
             raise NoCookieAvailableError("所有Cookie均被锁定，无法继续爬取")
+        try:
+            self._wait_rate_limit(account_id)
 
-        cipher_text = self._get_cipher_text(keywords[0])
-        headers = self._get_common_headers(cipher_text)
-        response = requests.get(url, cookies=cookie_dict, headers=headers)
+            cipher_text = self._get_cipher_text(keywords[0])
+            headers = self._get_common_headers(cipher_text)
+            started = time.monotonic()
+            response = yield {'url': url, 'cookies': cookie_dict, 'headers': headers,
+                              'timeout': self.timeout, 'pool_key': account_id}
+            latency = response.elapsed if response.elapsed is not None else time.monotonic() - started
 
-        if response.status_code != 200:
-            raise SearchIndexAPIError(response.status_code, f"HTTP {response.status_code}")
+            if response.status_code != 200:
+                self._record_response(OUTCOME_ERROR, latency)
+                raise SearchIndexAPIError(response.status_code, f"HTTP {response.status_code}")
 
-        text = response.text.strip()
-        if not text:
-            raise SearchIndexAPIError(0, "API返回空响应")
-        try:
-            data = json.loads(text)
-        except (ValueError, json.JSONDecodeError) as e:
-            raise SearchIndexAPIError(0, f"API返回非JSON: {e}")
+            text = response.text.strip()
+            if not text:
+                self._record_response(status_outcome(None, has_body=False), latency)
+                raise SearchIndexAPIError(0, "API返回空响应")
+            try:
+                data = json.loads(text)
+            except (ValueError, json.JSONDecodeError) as e:
+                self._record_response(status_outcome(None, has_body=False), latency)
+                raise SearchIndexAPIError(0, f"API返回非JSON: {e}")
 
-        status = data.get('status')
-        if status == 10001:
-            log.warning(f"Cookie被临时锁定: {account_id}")
-            self._report_cookie_status(account_id, False)
-            raise SearchIndexAPIError(status, "Cookie被临时锁定", data)
-        elif status == 10000:
-            log.warning(f"Cookie无效或已过期: {account_id}")
-            self._report_cookie_status(account_id, False, permanent=True)
-            raise SearchIndexAPIError(status, "Cookie无效或已过期", data)
-        elif status != 0:
-            log.error(f"请求失败: {data}")
-            raise SearchIndexAPIError(status, data.get('message', 'unknown'), data)
+            status = data.get('status')
+            self._record_response(status_outcome(status), latency)
+            if status == 10001:
+                log.warning(f"Cookie被临时锁定: {account_id}")
+                self._report_cookie_status(account_id, False)
+                raise SearchIndexAPIError(status, "Cookie被临时锁定", data)
+            elif status == 10000:
+                log.warning(f"Cookie无效或已过期: {account_id}")
+                self._report_cookie_status(account_id, False, permanent=True)
+                raise SearchIndexAPIError(status, "Cookie无效或已过期", data)
+            elif status != 0:
+                log.error(f"请求失败: {data}")
+                raise SearchIndexAPIError(status, data.get('message', 'unknown'), data)
 
+            cookie_rate_limiter.report_success(account_id, self.task_type)
+            self._prefetch_ptbk_key(data, cookie_dict)
+        finally:
+            self._release_cookie(account_id)
         return data, cookie_dict
 
     @retry(max_retries=5, delay=2, exceptions=(SearchIndexAPIError,))
     def _get_search_index(self, area, keywords, start_date, end_date):
         """获取搜索指数数据。多关键词遇 10002 时自动回退为逐关键词请求，确保不丢数据"""
+        return self._run_request_steps(self._search_index_steps(area, keywords, start_date, end_date))
+
+    def _search_index_steps(self, area, keywords, start_date, end_date):
+        """_get_search_index 的请求步骤（不含重试，失败由延迟重试队列处理）"""
         try:
-            return self._fetch_search_index_raw(area, keywords, start_date, end_date)
+            return (yield from self._search_index_request(area, keywords, start_date, end_date))
         except SearchIndexAPIError as e:
             # status 10002 (bad request) 且多关键词时：回退为逐关键词请求并合并结果
             if e.status == 10002 and len(keywords) > 1:
                 log.warning(f"多关键词请求 10002，回退为逐关键词请求: {keywords}")
+                search_batch_planner.record_conflict(keywords)
                 merged_user_indexes = []
                 merged_general_ratio = []
                 first_cookie = None
                 first_uniqid = None
                 for kw in keywords:
                     try:
-                        single_data, cookie_dict = self._fetch_search_index_raw(area, [kw], start_date, end_date)
+                        single_data, cookie_dict = yield from self._search_index_request(area, [kw], start_date, end_date)
                         first_cookie = first_cookie or cookie_dict
                         res = single_data.get('data', {})
                         uidx = res.get('userIndexes', [])
@@ -173,89 +213,81 @@ class SearchIndexCrawler(BaseCrawler):
     def _process_search_index_data(self, data, cookie, keyword, city_code, city_name, start_date, end_date):
         """处理搜索指数数据 (单关键词)"""
         daily_list, stats_list = data_processor.process_multi_search_index_data(
-            data, cookie, [keyword], city_code, city_name, start_date, end_date
+            data, cookie, [keyword], city_code, city_name, start_date, end_date, columnar=self.columnar_output
         )
-        log.debug(f"Processed single keyword data. Daily items: {len(daily_list) if daily_list else 0}")
+        log.debug(f"Processed single keyword data. Daily items: {len(daily_list) if daily_list is not None else 0}")
         # Return the full list for daily_data, but stats is one record per keyword range
         return daily_list, (stats_list[0] if stats_list else None)
 
     def _process_multi_search_index_data(self, data, cookie, keywords, city_code, city_name, start_date, end_date):
         """处理多关键词搜索指数数据"""
         return data_processor.process_multi_search_index_data(
-            data, cookie, keywords, city_code, city_name, start_date, end_date
+            data, cookie, keywords, city_code, city_name, start_date, end_date, columnar=self.columnar_output
         )
     
     # _process_year_range, _load_keywords_from_file, _load_cities_from_file, _load_date_ranges_from_file 均由 BaseCrawler 统一提供
     
     def _process_task(self, task_data):
         """
-        处理单个任务的函数，用于线程池
+        处理单个任务的函数，用于线程池（接口请求经 @retry 装饰的 _get_search_index）
+        日期窗口由多个请求范围合并而来时，结果按范围拆分，完成键对应每个 关键词 × 请求范围
+        """
+        return self._run_request_steps(self._task_steps(task_data, fetch=self._get_search_index))
+
+    def _task_steps(self, task_data, fetch=None):
+        """
+        单个任务的请求步骤（异步引擎下由事件循环驱动，见 BaseCrawler._submit_task）
+        fetch 为同步请求方法时直接调用，否则由 _search_index_steps 产生请求步骤
         """
         self.check_running()
-        rate_limiter.wait()
         
         # 判断第一个参数是单个关键词还是关键词列表
         if isinstance(task_data[0], list):
             keywords = task_data[0]
-            city_code, city_name, start_date, end_date = task_data[1:]
             is_batch = True
         else:
             keyword = task_data[0]
             keywords = [keyword]
-            city_code, city_name, start_date, end_date = task_data[1:]
             is_batch = False
+        city_code, city_name, start_date, end_date = task_data[1:]
+        
+        task_keys = self._task_keys(task_data)
+        # 单关键词、单范围时沿用字符串键，其余情况返回键列表
+        result_keys = task_keys if is_batch or len(task_keys) > 1 else task_keys[0]
         
         # 检查任务是否已完成（成功完成的任务跳过，失败的任务需要重试）
-        if not is_batch:
-            task_key = f"{keyword}_{city_code}_{start_date}_{end_date}"
-            if task_key in self.completed_keywords:
-                # 如果任务已完成，直接返回None，不增加completed_tasks计数
-                return None
-            # 如果任务之前失败过，从失败集合中移除（准备重试）
-            if task_key in self.failed_keywords:
-                with self.task_lock:
+        if all(task_key in self.completed_keywords for task_key in task_keys):
+            # 如果任务已完成，直接返回None，不增加completed_tasks计数
+            return None
+        # 如果任务之前失败过，从失败集合中移除（准备重试）
+        retry_keys = [task_key for task_key in task_keys if task_key in self.failed_keywords]
+        if retry_keys:
+            with self.task_lock:
+                for task_key in retry_keys:
                     self.failed_keywords.discard(task_key)
-        else:
-            # 批量模式下，检查所有关键词是否都已完成
-            all_completed = True
-            for keyword in keywords:
-                task_key = f"{keyword}_{city_code}_{start_date}_{end_date}"
-                if task_key not in self.completed_keywords:
-                    all_completed = False
-                    break
-                # 如果任务之前失败过，从失败集合中移除（准备重试）
-                if task_key in self.failed_keywords:
-                    with self.task_lock:
-                        self.failed_keywords.discard(task_key)
-            
-            if all_completed:
-                return None
         
         try:
             # 获取数据
-            result = self._get_search_index(city_code, keywords, start_date, end_date)
+            if fetch is not None:
+                steps = self._call_steps(fetch, city_code, keywords, start_date, end_date)
+            else:
+                steps = self._search_index_steps(city_code, keywords, start_date, end_date)
+            result = yield from self._cached_index_steps(
+                'search_index',
+                {'area': city_code, 'words': keywords, 'startDate': start_date, 'endDate': end_date},
+                steps
+            )
             if not result:
                 log.warning(f"获取数据失败，标记为失败任务: {city_code}, {start_date}-{end_date}, 关键词数量: {len(keywords)}")
-                
                 # 返回失败标记，不保存空数据
-                if not is_batch:
-                    # 单关键词模式 - 返回失败标记
-                    return task_key, None, None, False
-                else:
-                    # 批量模式 - 返回失败标记
-                    return [f"{kw}_{city_code}_{start_date}_{end_date}" for kw in keywords], None, None, False
+                return result_keys, None, None, False
         except NoCookieAvailableError:
             # 向上层抛出异常，通知主线程暂停任务
             raise
         except Exception as e:
             log.error(f"处理任务时出错: {e}")
             # 返回失败标记，不保存空数据
-            if not is_batch:
-                # 单关键词模式 - 返回失败标记
-                return task_key, None, None, False
-            else:
-                # 批量模式 - 返回失败标记
-                return [f"{kw}_{city_code}_{start_date}_{end_date}" for kw in keywords], None, None, False
+            return result_keys, None, None, False
         
         data, cookie = result
         
@@ -268,11 +300,14 @@ class SearchIndexCrawler(BaseCrawler):
             
             # 如果处理结果为None，标记为失败
             if daily_data is None or stats_record is None:
-                log.warning(f"处理数据失败，标记为失败任务: {task_key}")
-                return task_key, None, None, False
+                log.warning(f"处理数据失败，标记为失败任务: {result_keys}")
+                return result_keys, None, None, False
             
+            if isinstance(result_keys, list):
+                daily_data, stats_records = self._split_window_results(daily_data, [stats_record], start_date, end_date)
+                return result_keys, daily_data, stats_records, True
             # 成功获取数据
-            return task_key, daily_data, stats_record, True
+            return result_keys, daily_data, stats_record, True
         else:
             # 批量处理多个关键词
             daily_data_list, stats_records_list = self._process_multi_search_index_data(
@@ -280,14 +315,71 @@ class SearchIndexCrawler(BaseCrawler):
             )
             
             # 如果处理结果为空，标记为失败
-            if not daily_data_list or not stats_records_list:
+            if daily_data_list is None or len(daily_data_list) == 0 or not stats_records_list:
                 log.warning(f"批量处理数据失败，标记为失败任务: {city_code}, {start_date}-{end_date}, 关键词数量: {len(keywords)}")
-                return [f"{kw}_{city_code}_{start_date}_{end_date}" for kw in keywords], None, None, False
+                return result_keys, None, None, False
             
+            daily_data_list, stats_records_list = self._split_window_results(
+                daily_data_list, stats_records_list, start_date, end_date
+            )
             # 成功获取数据
-            return [f"{kw}_{city_code}_{start_date}_{end_date}" for kw in keywords], daily_data_list, stats_records_list, True
+            return result_keys, daily_data_list, stats_records_list, True
 
     
+    def _task_keys(self, task_data):
+        """任务对应的完成键（与 _process_task 返回的键一致）"""
+        keywords = task_data[0] if isinstance(task_data[0], list) else [task_data[0]]
+        city_code, _, start_date, end_date = task_data[1:]
+        return self._window_task_keys(keywords, city_code, start_date, end_date)
+
+    def _iter_tasks(self, keywords, date_ranges, batch_size):
+        """按 关键词(批次) × 城市 × 日期范围 依次产出未完成的任务，批次由 search_batch_planner 规划"""
+        for unit in search_batch_planner.plan(keywords, batch_size):
+            for city_code, city_name in self.city_dict.items():
+                for start_date, end_date in date_ranges:
+                    units = [unit]
+                    # 运行中新发现的 10002 冲突组合：拆分后再产出
+                    if isinstance(unit, list) and search_batch_planner.is_conflicting(unit):
+                        units = search_batch_planner.split(unit)
+                    for task_unit in units:
+                        task = (task_unit, city_code, city_name, start_date, end_date)
+                        # 检查任务（批次中的所有关键词）是否都已完成
+                        if all(key in self.completed_keywords for key in self._task_keys(task)):
+                            log.debug(f"跳过已完成的任务: {task_unit}, {city_code}, {start_date}-{end_date}")
+                            continue
+                        yield task
+
+
+    def _handle_task_future(self, future, task=None):
+        """汇总单个任务结果：更新进度、写入缓存并按需落盘（Cookie 耗尽异常向上抛出）"""
+        try:
+            result = future.result()
+            if not result: return
+            
+            is_batch = isinstance(result[0], list)
+            task_keys, daily_data, stats_records, is_success = result # 此时应统一为4个返回值
+            
+            with self.task_lock:
+                keys = task_keys if is_batch else [task_keys]
+                if is_success:
+                    self._mark_items_completed(keys)
+                    if daily_data is not None: self._cache_daily_data(daily_data)
+                    if stats_records:
+                        if isinstance(stats_records, list): self.stats_cache.extend(stats_records)
+                        else: self.stats_cache.append(stats_records)
+                elif not (task is not None and self._defer_retry(task, keys)):
+                    self._mark_items_failed(keys)
+                
+                if self.completed_tasks % 20 == 0: self._save_global_checkpoint()
+
+            if self._cached_row_count() >= 200:
+                self._flush_buffer()
+
+        except NoCookieAvailableError:
+            raise
+        except Exception as e:
+            log.error(f"子任务异常: {e}")
+
     def crawl(self, task_id=None, keywords=None, cities=None, date_ranges=None, days=None, 
               keywords_file=None, cities_file=None, date_ranges_file=None,
               year_range=None, resume=False, checkpoint_task_id=None, total_tasks=None, batch_size=5,
@@ -316,6 +408,7 @@ class SearchIndexCrawler(BaseCrawler):
         # 设置输出格式和输出路径设置
         self._apply_output_format(output_format)
         self._apply_output_settings(output_dir, output_name)
+        self._apply_crawl_mode(kwargs.get('crawl_mode'))
         
         # 设置任务ID和检查点路径
         if resume and checkpoint_task_id:
@@ -413,102 +506,49 @@ class SearchIndexCrawler(BaseCrawler):
         
         # 开始爬取
         try:
-            # 准备所有任务
-            all_tasks = []
-            
-            # 二词联查（含+）必须逐词请求，不能批量
-            has_compound = any('+' in kw for kw in keywords)
-            if has_compound:
-                batch_size = 1
-                log.info("检测到二词联查关键词，强制逐词请求")
-            else:
-                batch_size = min(batch_size, 5)
+            # 二词联查（含+）必须逐词请求，由批次规划器单独成组，其余关键词仍按批次请求
+            batch_size = min(batch_size, MAX_BATCH_SIZE)
+            compound_count = sum(1 for kw in keywords if is_compound(kw))
+            if compound_count:
+                log.info(f"检测到 {compound_count} 个二词联查关键词，单独请求")
             log.info(f"批量处理关键词，每批次最多 {batch_size} 个关键词")
             
-            # 按batch_size将关键词分组
-            keyword_batches = []
-            for i in range(0, len(keywords), batch_size):
-                keyword_batches.append(keywords[i:i+batch_size])
-            
-            # 如果batch_size为1或者只有一个关键词，使用原来的方式
-            if batch_size == 1 or len(keywords) == 1:
-                for keyword in keywords:
-                    for city_code, city_name in self.city_dict.items():
-                        for start_date, end_date in date_ranges:
-                            task_key = f"{keyword}_{city_code}_{start_date}_{end_date}"
-                            # 检查任务是否已完成
-                            if task_key in self.completed_keywords:
-                                log.debug(f"跳过已完成的任务: {task_key}")
-                                continue
-                            all_tasks.append((keyword, city_code, city_name, start_date, end_date))
+            tasks = self._iter_tasks(keywords, self._plan_date_windows(date_ranges), batch_size)
+            if self.streaming_enabled:
+                has_tasks, tasks = self._peek_tasks(tasks)
+                log.info(f"流式调度任务，在途窗口 {self._get_stream_window()}，使用 {self.max_workers} 个线程")
             else:
-                # 批量处理模式
-                for keyword_batch in keyword_batches:
-                    for city_code, city_name in self.city_dict.items():
-                        for start_date, end_date in date_ranges:
-                            # 检查该批次中的所有关键词是否都已完成
-                            all_completed = True
-                            for keyword in keyword_batch:
-                                task_key = f"{keyword}_{city_code}_{start_date}_{end_date}"
-                                if task_key not in self.completed_keywords:
-                                    all_completed = False
-                                    break
-                            
-                            if all_completed:
-                                log.debug(f"跳过已完成的批次任务: {city_code}, {start_date}-{end_date}, 关键词数量: {len(keyword_batch)}")
-                                continue
-                                    
-                            all_tasks.append((keyword_batch, city_code, city_name, start_date, end_date))
-            
-            # 更新实际总任务数为需要执行的任务数量
-            # self.total_tasks = len(all_tasks)
-            log.info(f"准备执行 {len(all_tasks)} 个任务，使用 {self.max_workers} 个线程")
+                tasks = list(tasks)
+                has_tasks = bool(tasks)
+                log.info(f"准备执行 {len(tasks)} 个任务，使用 {self.max_workers} 个线程")
             
             # 如果所有任务都已完成
-            if not all_tasks:
+            if not has_tasks:
                 log.info("所有任务都已完成，无需执行")
                 self._update_task_db_status('completed', progress=100)
                 return True
             
             # 使用线程池执行任务
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_task = {executor.submit(self._process_task, task): task for task in all_tasks}
-                
-                for future in as_completed(future_to_task):
-                    # 每次结果返回前检查是否停止
-                    self.check_running()
-                    try:
-                        result = future.result()
-                        if not result: continue
-                        
-                        is_batch = isinstance(result[0], list)
-                        task_keys, daily_data, stats_records, is_success = result # 此时应统一为4个返回值
-                        
-                        with self.task_lock:
-                            if is_success:
-                                keys = task_keys if is_batch else [task_keys]
-                                self._mark_items_completed(keys)
-                                if daily_data: self.data_cache.extend(daily_data)
-                                if stats_records:
-                                    if isinstance(stats_records, list): self.stats_cache.extend(stats_records)
-                                    else: self.stats_cache.append(stats_records)
-                            else:
-                                keys = task_keys if is_batch else [task_keys]
-                                self._mark_items_failed(keys)
-                            
-                            if self.completed_tasks % 20 == 0: self._save_global_checkpoint()
-
-                        if len(self.data_cache) >= 200:
-                            self._flush_buffer()
-
-                    except NoCookieAvailableError:
-                        log.error("Cookie 耗尽，暂停任务")
-                        self._flush_buffer(force=True)
-                        self._update_task_db_status('paused', error_message="所有 Cookie 均被锁定，等待自动恢复")
-                        for f in future_to_task: f.cancel()
-                        return False
-                    except Exception as e:
-                        log.error(f"子任务异常: {e}")
+            future_to_task = {}
+            with ThreadPoolExecutor(max_workers=self._pool_size(), initializer=self._worker_initializer()) as executor:
+                try:
+                    if self.streaming_enabled:
+                        self._run_streaming(executor, self._with_cipher_prefetch(tasks), self._handle_task_future,
+                                            task_keys=self._task_keys, with_task=True)
+                    else:
+                        future_to_task = {self._submit_task(executor, task): task for task in tasks}
+                        for future in as_completed(future_to_task):
+                            # 每次结果返回前检查是否停止
+                            self.check_running()
+                            self._handle_task_future(future, future_to_task[future])
+                        # 批量提交的任务跑完后，继续执行延迟重试队列中的任务
+                        self._run_streaming(executor, (), self._handle_task_future, with_task=True)
+                except NoCookieAvailableError:
+                    log.error("Cookie 耗尽，暂停任务")
+                    self._flush_all()
+                    self._update_task_db_status('paused', error_message="所有 Cookie 均被锁定，等待自动恢复")
+                    for f in future_to_task: f.cancel()
+                    return False
 
             status = 'failed' if self.failed_tasks > 0 else 'completed'
             msg = f"完成但有 {self.failed_tasks} 项失败" if status == 'failed' else "所有任务已完成"
@@ -523,7 +563,7 @@ class SearchIndexCrawler(BaseCrawler):
             return self._finalize_crawl('cancelled', "Task interrupted")
         except Exception as e:
             log.error(f"爬取主流程失败: {e}")
-            self._flush_buffer(force=True)
+            self._flush_all()
             if self.progress_manager:
                 self.progress_manager.close()
                 self.progress_manager = None
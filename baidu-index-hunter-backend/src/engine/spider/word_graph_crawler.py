@@ -9,10 +9,14 @@ from src.core.logger import log
 from src.utils.decorators import retry
 from src.engine.spider.base_crawler import BaseCrawler, CrawlerInterrupted
 from src.services.processor_service import data_processor
+from src.services.concurrency_controller import OUTCOME_ERROR, status_outcome
 
 class WordGraphCrawler(BaseCrawler):
     """需求图谱爬虫，负责获取百度指数的需求图谱数据"""
     
+    retry_budget_method = 'get_word_graph'
+    output_column_types = {'data': {'变化率': 'float64', '相关度': 'float64'}}
+    
     def __init__(self):
         """初始化需求图谱爬虫"""
         super().__init__(task_type="word_graph")
@@ -40,7 +44,10 @@ class WordGraphCrawler(BaseCrawler):
         keyword = task_item['keyword']
         date = task_item['date']
         
-        result = self.get_word_graph(keyword, date)
+        result = self._cached_fetch(
+            'word_graph', {'wordlist': [keyword], 'datelist': date},
+            lambda: self.get_word_graph(keyword, date)
+        )
         
         if not result:
              raise Exception(f"Failed to get word graph for {keyword} at {date}")
@@ -50,11 +57,17 @@ class WordGraphCrawler(BaseCrawler):
         
         return df
 
+    @staticmethod
+    def _task_keys(task_item: Dict) -> List[str]:
+        """任务对应的完成键"""
+        return [f"{task_item['keyword']}_{task_item['date']}"]
+
     @retry(max_retries=2)
     def get_word_graph(self, keyword: str, datelist: str) -> Optional[Dict]:
         """
         获取需求图谱数据 API 请求
         """
+        account_id = None
         try:
             account_id, cookie_dict = self._get_cookie_dict()
             if not cookie_dict:
@@ -63,41 +76,52 @@ class WordGraphCrawler(BaseCrawler):
             # 构造URL
             url = f'{self.word_graph_url}?wordlist[]={keyword}&datelist={datelist}'
             
-            from src.utils.rate_limiter import rate_limiter
-            rate_limiter.wait()
+            # 按账号令牌桶限速
+            self._wait_rate_limit(account_id)
             
             import requests
             headers = self._get_common_headers("")
             headers['Referer'] = self.word_graph_url
             
             log.info(f"[{self.task_type}] Requesting: {keyword} @ {datelist}")
+            started = time.monotonic()
             response = requests.get(
                 url=url,
                 headers=headers,
                 cookies=cookie_dict,
                 timeout=15
             )
+            latency = time.monotonic() - started
             
             if response.status_code != 200:
-                self.cookie_rotator.report_cookie_status(account_id, False)
+                self._record_response(OUTCOME_ERROR, latency)
+                self.cookie_rotator.report_cookie_status(account_id, False, endpoint=self.task_type)
                 return None
                 
-            result = response.json()
+            try:
+                result = response.json()
+            except ValueError:
+                self._record_response(status_outcome(None, has_body=False), latency)
+                raise
+            self._record_response(status_outcome(result.get('status')), latency)
             if result.get('status') != 0:
                 msg = result.get('message', '')
                 log.error(f"[{self.task_type}] API Error: {msg}")
                 if "not login" in msg:
-                    self.cookie_rotator.report_cookie_status(account_id, False, permanent=True)
+                    self.cookie_rotator.report_cookie_status(account_id, False, permanent=True, endpoint=self.task_type)
                 else:
-                    self.cookie_rotator.report_cookie_status(account_id, False)
+                    self.cookie_rotator.report_cookie_status(account_id, False, endpoint=self.task_type)
                 return None
                 
-            self.cookie_rotator.report_cookie_status(account_id, True)
+            self.cookie_rotator.report_cookie_status(account_id, True, endpoint=self.task_type)
             return result
             
         except Exception as e:
             log.error(f"[{self.task_type}] Request Error: {e}")
             return None
+        finally:
+            # 集群模式下释放 Cookie 租约
+            self._release_cookie(account_id)
 
     def crawl(self, keywords: Union[List[str], str], 
               datelists: Optional[List[str]] = None, 
@@ -109,6 +133,7 @@ class WordGraphCrawler(BaseCrawler):
         """
         self._apply_output_format(output_format or kwargs.get('output_format'))
         self._apply_output_settings(output_dir, output_name)
+        self._apply_crawl_mode(kwargs.get('crawl_mode'))
         
         if isinstance(keywords, str):
             keywords = [keywords]
@@ -155,32 +180,15 @@ class WordGraphCrawler(BaseCrawler):
         tasks = self._prepare_tasks(keywords, datelists)
         self.total_tasks = len(tasks)
         
-        # 3. 恢复检查点
-        start_index = self.completed_tasks
-        
         self._update_task_db_status('running', 0)
         
+        def on_result(task_item, df):
+            if df is not None and not df.empty:
+                self.data_cache.extend(df.to_dict('records'))
+        
         try:
-            for i in range(start_index, len(tasks)):
-                self.check_running()
-                task_item = tasks[i]
-                try:
-                    df = self._process_task(task_item)
-                    
-                    with self.task_lock:
-                        if df is not None and not df.empty:
-                            self.data_cache.extend(df.to_dict('records'))
-                        
-                        self._mark_items_completed([f"{task_item['keyword']}_{task_item['date']}"])
-                    
-                    self._flush_buffer()
-                    
-                except Exception as e:
-                    self.failed_tasks += 1
-                    log.error(f"[{self.task_type}] Task failed: {task_item}, Error: {e}")
-                    self._update_task_db_status('running', error_message=str(e))
-                
-                time.sleep(1)
+            # 3. 并发执行，已完成的任务按键跳过
+            self._run_task_items(tasks, self._task_keys, on_result)
 
             return self._finalize_crawl('completed')
             
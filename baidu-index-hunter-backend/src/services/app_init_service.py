@@ -20,6 +20,7 @@ def init_app_data(force=False):
         log.info("正在初始化系统配置...")
         config_manager.refresh_cache()
         config_manager.init_default_configs()
+        config_manager.start_background_refresh()
 
         # 2. 同步区域数据到Redis
         log.info("正在同步区域数据到Redis...")
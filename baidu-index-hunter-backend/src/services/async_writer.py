@@ -0,0 +1,85 @@
+"""
+异步批量写入器
+抓取线程只负责把待写批次放入有界队列，后台线程合并排队中的批次后统一落盘/入库。
+队列满时 submit 阻塞（背压），drain 等待所有已提交批次写完。
+"""
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+from src.core.logger import log
+
+_STOP = object()
+
+
+class AsyncBatchWriter:
+    """单线程后台写入器：handler(items) 每次接收合并后的一组批次"""
+
+    def __init__(self, handler: Callable[[List[Any]], None], max_pending: int = 8,
+                 max_merge: int = 32, name: str = 'batch-writer'):
+        self.handler = handler
+        self.max_merge = max(1, max_merge)
+        self.name = name
+        self._queue = queue.Queue(maxsize=max(1, max_pending))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches_written = 0
+        self.blocked_submits = 0
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def submit(self, item: Any):
+        """提交一个批次；队列已满时阻塞直到写入线程腾出空间"""
+        self._ensure_started()
+        if self._queue.full():
+            self.blocked_submits += 1
+        self._queue.put(item)
+
+    def drain(self):
+        """等待所有已提交的批次写入完成"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self):
+        """写完剩余批次后停止后台线程"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+
+    def pending_count(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            items = [item]
+            stop = False
+            # 合并已在排队的批次，一次写入
+            while len(items) < self.max_merge:
+                try:
+                    extra = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is _STOP:
+                    stop = True
+                    break
+                items.append(extra)
+            try:
+                self.handler(items)
+                self.batches_written += len(items)
+            except Exception as e:
+                log.error(f"[{self.name}] 写入失败: {e}")
+            finally:
+                for _ in range(len(items) + (1 if stop else 0)):
+                    self._queue.task_done()
+            if stop:
+                return
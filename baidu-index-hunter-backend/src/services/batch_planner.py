@@ -0,0 +1,96 @@
+"""
+关键词批次规划
+搜索指数接口一次最多查询 5 个关键词，二词联查（含 +）的关键词必须单独请求。
+规划器把普通关键词装满批次、把联查关键词单独成组，并记住触发过 10002 的关键词组合，
+之后的批次避开这些组合，不再先失败一次再逐词回退。
+"""
+import threading
+from typing import FrozenSet, Iterable, List, Set, Union
+
+from src.core.logger import log
+
+MAX_BATCH_SIZE = 5
+
+# 规划单元：str 为单关键词请求，list 为多关键词批量请求
+PlanUnit = Union[str, List[str]]
+
+
+def is_compound(keyword: str) -> bool:
+    """二词联查关键词（A+B）"""
+    return '+' in keyword
+
+
+class KeywordBatchPlanner:
+    """按批次上限与已知冲突组合对关键词分组"""
+
+    def __init__(self, max_batch: int = MAX_BATCH_SIZE):
+        self.max_batch = max_batch
+        self._conflicts: Set[FrozenSet[str]] = set()
+        self._lock = threading.Lock()
+
+    def record_conflict(self, keywords: Iterable[str]):
+        """记录触发 10002 回退的关键词组合"""
+        combo = frozenset(keywords)
+        if len(combo) < 2:
+            return
+        with self._lock:
+            if combo not in self._conflicts:
+                self._conflicts.add(combo)
+                log.info(f"记录 10002 冲突关键词组合，后续批次将拆分: {sorted(combo)}")
+
+    def is_conflicting(self, keywords: Iterable[str]) -> bool:
+        """组合中是否包含已知冲突组合"""
+        if not self._conflicts:
+            return False
+        # 工作线程可能同时 record_conflict，在锁内取快照后再遍历
+        with self._lock:
+            conflicts = tuple(self._conflicts)
+        combo = frozenset(keywords)
+        return any(conflict <= combo for conflict in conflicts)
+
+    def _pack(self, keywords: List[str], batch_size: int) -> List[List[str]]:
+        """依次放入第一个不超限且不构成冲突组合的批次（首次适配）"""
+        batches: List[List[str]] = []
+        open_batches: List[List[str]] = []  # 未装满的批次，无冲突时至多一个
+        for keyword in keywords:
+            for batch in open_batches:
+                if not self.is_conflicting(batch + [keyword]):
+                    batch.append(keyword)
+                    if len(batch) >= batch_size:
+                        open_batches.remove(batch)
+                    break
+            else:
+                batch = [keyword]
+                batches.append(batch)
+                if batch_size > 1:
+                    open_batches.append(batch)
+        return batches
+
+    def plan(self, keywords: List[str], batch_size: int = MAX_BATCH_SIZE) -> List[PlanUnit]:
+        """
+        规划请求单元：普通关键词按 batch_size 打包（list），
+        联查关键词与 batch_size 为 1 时的关键词单独请求（str）
+        """
+        batch_size = max(1, min(batch_size, self.max_batch))
+        plain, compound = [], []
+        for keyword in keywords:
+            (compound if is_compound(keyword) else plain).append(keyword)
+
+        if batch_size == 1:
+            return plain + compound
+        return self._units(self._pack(plain, batch_size)) + compound
+
+    @staticmethod
+    def _units(groups: List[List[str]]) -> List[PlanUnit]:
+        return [group if len(group) > 1 else group[0] for group in groups]
+
+    def split(self, batch: List[str]) -> List[PlanUnit]:
+        """将已知冲突的批次重新拆分，避免冲突组合"""
+        return self._units(self._pack(list(batch), len(batch)))
+
+    def clear(self):
+        with self._lock:
+            self._conflicts.clear()
+
+
+search_batch_planner = KeywordBatchPlanner()
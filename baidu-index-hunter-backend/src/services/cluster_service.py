@@ -0,0 +1,191 @@
+"""
+集群协调模块
+在多个后端节点/进程共享同一个 Redis 时，Cookie 租约与限速桶都保存在 Redis 中，
+通过 Lua 脚本保证获取与释放的原子性，避免多个节点同时使用同一账号导致 10001 锁定
+"""
+import os
+import time
+import uuid
+import socket
+import threading
+from typing import List, Optional
+
+from src.core.logger import log
+from src.core.config import CLUSTER_CONFIG
+
+
+# 按顺序尝试候选账号，成功 SET NX 的第一个即为租到的账号
+# KEYS: 候选账号的租约键; ARGV[1]=持有者标识, ARGV[2]=租约毫秒
+ACQUIRE_LEASE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if redis.call('SET', key, ARGV[1], 'NX', 'PX', ARGV[2]) then
+        return i
+    end
+end
+return 0
+"""
+
+# 仅由持有者释放租约
+# KEYS[1]=租约键; ARGV[1]=持有者标识
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# GCRA 令牌桶：返回需要等待的毫秒数，时间取 Redis 服务器时间避免节点间时钟偏差
+# KEYS[1]=桶键(hash); ARGV[1]=间隔毫秒, ARGV[2]=突发容量, ARGV[3]=最大连续失败次数, ARGV[4]=失败倍数
+RESERVE_SLOT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call('HGET', KEYS[1], 'tat') or '0')
+local fails = tonumber(redis.call('HGET', KEYS[1], 'fails') or '0')
+local penalty = tonumber(redis.call('HGET', KEYS[1], 'penalty') or '0')
+local interval = tonumber(ARGV[1]) * math.pow(tonumber(ARGV[4]), math.min(fails, tonumber(ARGV[3])))
+local burst = tonumber(ARGV[2])
+if tat < now then
+    tat = now
+end
+local wait = tat - (burst - 1) * interval - now
+if wait < 0 then
+    wait = 0
+end
+if penalty - now > wait then
+    wait = penalty - now
+end
+redis.call('HSET', KEYS[1], 'tat', tostring(math.floor(tat + interval)))
+redis.call('PEXPIRE', KEYS[1], math.floor(wait + interval * burst) + 60000)
+return math.floor(wait)
+"""
+
+# 记录失败：连续失败超过阈值时推迟桶的可用时间
+# KEYS[1]=桶键; ARGV[1]=最大连续失败次数, ARGV[2]=失败倍数, ARGV[3]=基础间隔毫秒
+REPORT_FAILURE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local fails = redis.call('HINCRBY', KEYS[1], 'fails', 1)
+local backoff = 0
+if fails >= tonumber(ARGV[1]) then
+    backoff = math.floor(tonumber(ARGV[3]) * math.pow(tonumber(ARGV[2]), fails))
+    local penalty = tonumber(redis.call('HGET', KEYS[1], 'penalty') or '0')
+    if now + backoff > penalty then
+        redis.call('HSET', KEYS[1], 'penalty', tostring(now + backoff))
+    end
+end
+redis.call('PEXPIRE', KEYS[1], backoff + 600000)
+return backoff
+"""
+
+
+class ClusterCoordinator:
+    """基于 Redis 的 Cookie 租约与分布式限速桶"""
+
+    def __init__(self, redis_client=None, key_prefix=None, node_id=None):
+        self._redis = redis_client
+        self.key_prefix = key_prefix or CLUSTER_CONFIG.get('key_prefix', 'baidu_index:cluster')
+        self.node_id = node_id or CLUSTER_CONFIG.get('node_id') or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_ttl = CLUSTER_CONFIG.get('lease_ttl', 30)
+        self.lease_wait_timeout = CLUSTER_CONFIG.get('lease_wait_timeout', 60)
+        self._scripts = {}
+        self._lock = threading.Lock()
+        # 每个线程持有的租约使用独立标识，避免同节点线程误释放彼此的租约
+        self._local = threading.local()
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            from src.core.redis import redis_client
+            self._redis = redis_client
+        return self._redis
+
+    def _script(self, name, source):
+        script = self._scripts.get(name)
+        if script is None:
+            with self._lock:
+                script = self._scripts.get(name)
+                if script is None:
+                    script = self.redis.register_script(source)
+                    self._scripts[name] = script
+        return script
+
+    def _lease_key(self, account_id):
+        return f"{self.key_prefix}:lease:{account_id}"
+
+    def _bucket_key(self, key):
+        return f"{self.key_prefix}:bucket:{key}"
+
+    def _owner(self):
+        owner = getattr(self._local, 'owner', None)
+        if owner is None:
+            owner = f"{self.node_id}:{uuid.uuid4().hex[:8]}"
+            self._local.owner = owner
+        return owner
+
+    # --- Cookie 租约 ---
+
+    def try_acquire_lease(self, candidates: List[str], ttl: Optional[float] = None) -> Optional[str]:
+        """按顺序尝试租用候选账号，全部被占用时返回 None"""
+        if not candidates:
+            return None
+        ttl_ms = int((ttl or self.lease_ttl) * 1000)
+        keys = [self._lease_key(account_id) for account_id in candidates]
+        index = self._script('acquire', ACQUIRE_LEASE_SCRIPT)(keys=keys, args=[self._owner(), ttl_ms])
+        index = int(index or 0)
+        return candidates[index - 1] if index > 0 else None
+
+    def acquire_lease(self, candidates: List[str], ttl: Optional[float] = None,
+                      wait_timeout: Optional[float] = None) -> Optional[str]:
+        """
+        租用一个账号，全部被其他节点/线程占用时轮询等待
+        :return: 租到的账号ID，超时返回 None
+        """
+        deadline = time.monotonic() + (self.lease_wait_timeout if wait_timeout is None else wait_timeout)
+        delay = 0.02
+        while True:
+            try:
+                account_id = self.try_acquire_lease(candidates, ttl)
+            except Exception as e:
+                log.error(f"获取Cookie租约失败: {e}")
+                return None
+            if account_id or time.monotonic() >= deadline:
+                return account_id
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def release_lease(self, account_id: str) -> bool:
+        """释放当前线程持有的账号租约"""
+        try:
+            released = self._script('release', RELEASE_LEASE_SCRIPT)(
+                keys=[self._lease_key(account_id)], args=[self._owner()]
+            )
+            return bool(released)
+        except Exception as e:
+            log.error(f"释放Cookie租约失败: {e}")
+            return False
+
+    # --- 分布式限速桶 ---
+
+    def reserve_slot(self, key: str, interval: float, capacity: int = 1,
+                     max_consecutive_failures: int = 3, failure_multiplier: float = 1.2) -> float:
+        """在 Redis 令牌桶中预约一次请求，返回需要等待的秒数"""
+        wait_ms = self._script('reserve', RESERVE_SLOT_SCRIPT)(
+            keys=[self._bucket_key(key)],
+            args=[int(interval * 1000), max(1, int(capacity)), max_consecutive_failures, failure_multiplier]
+        )
+        return int(wait_ms or 0) / 1000.0
+
+    def report_success(self, key: str):
+        self.redis.hset(self._bucket_key(key), 'fails', 0)
+
+    def report_failure(self, key: str, default_interval: float, max_consecutive_failures: int = 3,
+                       failure_multiplier: float = 1.2) -> float:
+        """记录一次失败，返回桶被推迟的秒数"""
+        backoff_ms = self._script('failure', REPORT_FAILURE_SCRIPT)(
+            keys=[self._bucket_key(key)],
+            args=[max_consecutive_failures, failure_multiplier, int(default_interval * 1000)]
+        )
+        return int(backoff_ms or 0) / 1000.0
+
+
+cluster_coordinator = ClusterCoordinator()
@@ -0,0 +1,141 @@
+"""
+紧凑的任务完成索引
+
+task_key 形如 "关键词_城市代码_开始日期_结束日期"，按从右往左的前三个 '_' 拆分为
+关键词 + 组合（城市/日期范围等）两部分，分别字典编码为小整数，
+每个关键词持有一个按组合编号索引的位图（bytearray）。
+
+300 关键词 × 5200 组合（400 城市 × 13 年）约 200KB，
+而等量字符串集合约需数百 MB；序列化为 zlib 压缩的位图矩阵，恢复只需毫秒级。
+拆分后重新用 '_' 拼接即为原始 task_key，因此编码无损（其他爬虫的 2/3 段键同样适用）。
+"""
+import json
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple
+
+
+class CompletionSet:
+    """支持 set 常用接口（in / add / update / discard / len / iter）的位图集合"""
+
+    def __init__(self, keys: Optional[Iterable[str]] = None):
+        self._keyword_ids = {}
+        self._keywords = []
+        self._slot_ids = {}
+        self._slots = []
+        self._bitmaps = []
+        self._count = 0
+        if keys:
+            self.update(keys)
+
+    @staticmethod
+    def _split(key: str) -> Tuple[str, Optional[str]]:
+        parts = key.rsplit('_', 3)
+        if len(parts) == 1:
+            return key, None
+        return parts[0], key[len(parts[0]) + 1:]
+
+    def _lookup(self, key: str) -> Tuple[Optional[int], Optional[int]]:
+        keyword, slot = self._split(key)
+        return self._keyword_ids.get(keyword), self._slot_ids.get(slot)
+
+    def __contains__(self, key) -> bool:
+        if not isinstance(key, str):
+            return False
+        kid, sid = self._lookup(key)
+        if kid is None or sid is None:
+            return False
+        bitmap = self._bitmaps[kid]
+        byte = sid >> 3
+        return byte < len(bitmap) and bool(bitmap[byte] & (1 << (sid & 7)))
+
+    def add(self, key: str):
+        keyword, slot = self._split(key)
+        kid = self._keyword_ids.get(keyword)
+        if kid is None:
+            kid = len(self._keywords)
+            self._keyword_ids[keyword] = kid
+            self._keywords.append(keyword)
+            self._bitmaps.append(bytearray())
+        sid = self._slot_ids.get(slot)
+        if sid is None:
+            sid = len(self._slots)
+            self._slot_ids[slot] = sid
+            self._slots.append(slot)
+
+        bitmap = self._bitmaps[kid]
+        byte, mask = sid >> 3, 1 << (sid & 7)
+        if byte >= len(bitmap):
+            bitmap.extend(b'\0' * (byte + 1 - len(bitmap)))
+        if not bitmap[byte] & mask:
+            bitmap[byte] |= mask
+            self._count += 1
+
+    def update(self, keys: Iterable[str]):
+        for key in keys:
+            self.add(key)
+
+    def discard(self, key: str):
+        kid, sid = self._lookup(key)
+        if kid is None or sid is None:
+            return
+        bitmap = self._bitmaps[kid]
+        byte, mask = sid >> 3, 1 << (sid & 7)
+        if byte < len(bitmap) and bitmap[byte] & mask:
+            bitmap[byte] &= ~mask & 0xFF
+            self._count -= 1
+
+    def remove(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        self.discard(key)
+
+    def clear(self):
+        self.__init__()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __iter__(self) -> Iterator[str]:
+        for kid, keyword in enumerate(list(self._keywords)):
+            bitmap = bytes(self._bitmaps[kid])
+            for byte_index, value in enumerate(bitmap):
+                if not value:
+                    continue
+                for bit in range(8):
+                    if value & (1 << bit):
+                        slot = self._slots[(byte_index << 3) | bit]
+                        yield keyword if slot is None else f"{keyword}_{slot}"
+
+    def __repr__(self) -> str:
+        return f"CompletionSet(items={self._count}, keywords={len(self._keywords)}, slots={len(self._slots)})"
+
+    # --- 序列化 ---
+
+    def to_payload(self) -> Tuple[str, bytes]:
+        """返回 (字典 JSON, zlib 压缩的位图矩阵)，每个关键词占等宽的一行"""
+        keywords = list(self._keywords)
+        slots = list(self._slots)
+        width = (len(slots) + 7) >> 3
+        rows = bytearray()
+        for kid in range(len(keywords)):
+            row = bytes(self._bitmaps[kid])[:width]
+            rows += row + b'\0' * (width - len(row))
+        dictionary = json.dumps({'keywords': keywords, 'slots': slots, 'width': width}, ensure_ascii=False)
+        return dictionary, zlib.compress(bytes(rows))
+
+    @classmethod
+    def from_payload(cls, dictionary: str, bitmap: bytes) -> 'CompletionSet':
+        data = json.loads(dictionary) if dictionary else {}
+        result = cls()
+        result._keywords = list(data.get('keywords', []))
+        result._slots = list(data.get('slots', []))
+        result._keyword_ids = {k: i for i, k in enumerate(result._keywords)}
+        result._slot_ids = {s: i for i, s in enumerate(result._slots)}
+        width = data.get('width', 0)
+        raw = zlib.decompress(bitmap) if bitmap else b''
+        result._bitmaps = [bytearray(raw[i * width:(i + 1) * width]) for i in range(len(result._keywords))]
+        result._count = bin(int.from_bytes(raw, 'big')).count('1') if raw else 0
+        return result
@@ -0,0 +1,146 @@
+"""
+自适应并发控制器 (AIMD)
+根据百度接口的反馈调整在途并发数与 Cookie 请求节奏：
+- 一个采样窗口内全部正常（无锁定/限流，延迟未超标）时并发数加性增加，节奏逐步加快
+- 出现 10001 锁定时立即乘性减小并放慢节奏（每个采样窗口至多一次，并发请求同时被锁只算一次过载）；
+  10002、空响应等限流信号或延迟超标按窗口比例判断
+在不手工调 spider.max_workers 的情况下收敛到当前 Cookie 池可承受的最快速率。
+"""
+import threading
+from typing import Callable, Dict, Optional
+
+from src.core.logger import log
+
+# 请求结果分类
+OUTCOME_SUCCESS = 'success'
+OUTCOME_LOCKED = 'locked'        # 10001 Cookie 被临时锁定
+OUTCOME_THROTTLED = 'throttled'  # 10002、空响应等疑似限流
+OUTCOME_ERROR = 'error'          # 其他失败（网络、HTTP 状态码、登录失效等）
+
+
+def status_outcome(status, has_body: bool = True) -> str:
+    """将百度接口返回的 status 映射为结果分类"""
+    if not has_body:
+        return OUTCOME_THROTTLED
+    if status in (0, 1):
+        return OUTCOME_SUCCESS
+    if status == 10001:
+        return OUTCOME_LOCKED
+    if status == 10002:
+        return OUTCOME_THROTTLED
+    return OUTCOME_ERROR
+
+
+class AIMDController:
+    """
+    加性增/乘性减控制器
+    limit: 在途任务上限（流式窗口）；pace: Cookie 令牌桶请求间隔的倍数（<1 加快，>1 放慢）
+    """
+
+    def __init__(self, initial_limit: int = 5, min_limit: int = 1, max_limit: int = 32,
+                 increase_step: float = 1.0, decrease_factor: float = 0.5, sample_size: int = 20,
+                 throttle_threshold: float = 0.05, error_threshold: float = 0.3,
+                 latency_target: float = 5.0, min_pace: float = 0.5, max_pace: float = 8.0,
+                 pace_step: float = 0.05, pace_backoff: float = 1.5,
+                 on_pace_change: Optional[Callable[[float], None]] = None):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(max(int(initial_limit), self.min_limit), self.max_limit))
+        self.increase_step = increase_step
+        self.decrease_factor = min(max(decrease_factor, 0.1), 0.95)
+        self.sample_size = max(1, int(sample_size))
+        self.throttle_threshold = throttle_threshold
+        self.error_threshold = error_threshold
+        self.latency_target = latency_target
+        self.min_pace = min_pace
+        self.max_pace = max_pace
+        self.pace_step = pace_step
+        self.pace_backoff = max(1.0, pace_backoff)
+        self.pace = 1.0
+        self.on_pace_change = on_pace_change
+        self._lock = threading.Lock()
+        self._reset_window()
+
+        # 累计统计
+        self.increases = 0
+        self.decreases = 0
+        self.totals: Dict[str, int] = {}
+
+    def _reset_window(self):
+        self._counts: Dict[str, int] = {}
+        self._samples = 0
+        self._latency_sum = 0.0
+        self._latency_samples = 0
+        self._window_decreased = False
+
+    @property
+    def window(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def record(self, outcome: str, latency: Optional[float] = None):
+        """记录一次请求结果，满足条件时调整并发与节奏"""
+        pace = None
+        with self._lock:
+            self._counts[outcome] = self._counts.get(outcome, 0) + 1
+            self.totals[outcome] = self.totals.get(outcome, 0) + 1
+            self._samples += 1
+            if latency is not None:
+                self._latency_sum += latency
+                self._latency_samples += 1
+
+            if outcome == OUTCOME_LOCKED and not self._window_decreased:
+                # 锁定是最强的过载信号，不等窗口结束；本窗口内后续的锁定留到窗口结束时判断
+                pace = self._decrease('Cookie 锁定', slow_down=True)
+                self._window_decreased = True
+            elif self._samples >= self.sample_size:
+                pace = self._evaluate()
+        if pace is not None and self.on_pace_change:
+            try:
+                self.on_pace_change(pace)
+            except Exception as e:
+                log.error(f"更新请求节奏失败: {e}")
+
+    def _evaluate(self) -> Optional[float]:
+        """窗口结束时按限流率、错误率与平均延迟决定增减，返回变化后的节奏（未变化为 None）"""
+        samples = self._samples
+        throttle_rate = self._counts.get(OUTCOME_THROTTLED, 0) / samples
+        error_rate = self._counts.get(OUTCOME_ERROR, 0) / samples
+        avg_latency = self._latency_sum / self._latency_samples if self._latency_samples else 0.0
+
+        if self._counts.get(OUTCOME_LOCKED, 0):
+            return self._decrease('Cookie 锁定', slow_down=True)
+        if throttle_rate > self.throttle_threshold:
+            return self._decrease(f"限流率 {throttle_rate:.0%}", slow_down=True)
+        if error_rate > self.error_threshold:
+            return self._decrease(f"错误率 {error_rate:.0%}", slow_down=False)
+        if self.latency_target and avg_latency > self.latency_target:
+            return self._decrease(f"平均延迟 {avg_latency:.2f}s", slow_down=False)
+        return self._increase()
+
+    def _increase(self) -> Optional[float]:
+        old_pace = self.pace
+        self.limit = min(float(self.max_limit), self.limit + self.increase_step)
+        self.pace = max(self.min_pace, self.pace - self.pace_step)
+        self.increases += 1
+        self._reset_window()
+        return self.pace if self.pace != old_pace else None
+
+    def _decrease(self, reason: str, slow_down: bool) -> Optional[float]:
+        old_pace = self.pace
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+        if slow_down:
+            self.pace = min(self.max_pace, max(1.0, self.pace) * self.pace_backoff)
+        self.decreases += 1
+        self._reset_window()
+        log.info(f"并发控制: {reason}，并发降至 {self.window}，请求间隔倍数 {self.pace:.2f}")
+        return self.pace if self.pace != old_pace else None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'limit': self.window,
+                'pace': round(self.pace, 3),
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'outcomes': dict(self.totals),
+            }
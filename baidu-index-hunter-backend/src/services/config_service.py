@@ -6,6 +6,8 @@ import os
 import sys
 import json
 import time
+import threading
+from types import MappingProxyType
 from typing import Dict, Any, Optional, Union
 from datetime import datetime
 
@@ -13,22 +15,73 @@ from src.core.logger import log
 # from src.data.repositories.mysql_manager import MySQLManager # Removed
 from src.data.repositories.config_repository import config_repo
 
+# 配置变更通知频道：set/delete 后发布，其他进程收到后在后台重新加载快照
+CONFIG_CHANNEL = "baidu_index:config_changed"
+
+_MISSING = object()
+
+
+class ConfigSnapshot:
+    """不可变配置快照，附带按类型解析后的值缓存"""
+
+    __slots__ = ('values', 'version', 'parsed')
+
+    def __init__(self, values: Dict[str, Any], version: int = 0):
+        self.values = MappingProxyType(dict(values))
+        self.version = version
+        # (key, 类型) -> 解析后的值；快照不可变，因此只需按快照缓存
+        self.parsed = {}
+
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ('1', 'true', 'yes', 'on'):
+            return True
+        if lowered in ('0', 'false', 'no', 'off', ''):
+            return False
+        raise ValueError(value)
+    if isinstance(value, (int, float)):
+        return bool(value)
+    raise ValueError(value)
+
+
 class ConfigManager:
-    """配置管理器，用于从数据库中读取和更新系统配置"""
+    """配置管理器，用于从数据库中读取和更新系统配置
+
+    读取只访问内存中的不可变快照（单次引用替换，无锁）；
+    数据库重新加载由后台线程按 cache_ttl 周期执行，或在收到 Redis 变更通知时立即执行。
+    """
     
     def __init__(self):
         """初始化配置管理器"""
         # self.mysql = MySQLManager() # Removed
         self.repo = config_repo
-        self.config_cache = {}
+        self._snapshot = ConfigSnapshot({})
         self.last_refresh_time = 0
-        self.cache_ttl = 300  # 缓存有效期（秒）
+        self.cache_ttl = 300  # 缓存有效期（秒），即后台刷新间隔
+        self._write_lock = threading.Lock()
+        self._refresh_event = threading.Event()
+        self._refresh_thread = None
+        self._listener_thread = None
+        self._redis_client = None
         
         # 初始加载配置
         self.refresh_cache()
     
+    @property
+    def config_cache(self) -> MappingProxyType:
+        """当前配置快照（只读）"""
+        return self._snapshot.values
+    
+    def _swap(self, values: Dict[str, Any]):
+        """以新的不可变快照整体替换当前快照"""
+        self._snapshot = ConfigSnapshot(values, self._snapshot.version + 1)
+    
     def refresh_cache(self) -> bool:
-        """刷新配置缓存"""
+        """从数据库重新加载配置并替换快照"""
         try:
             # 从 Repository 加载所有配置 (返回 Dict[str, str])
             raw_configs = self.repo.get_all_as_dict()
@@ -46,9 +99,10 @@ class ConfigManager:
                     
                     new_cache[key] = value
                 
-                self.config_cache = new_cache
+                with self._write_lock:
+                    self._swap(new_cache)
                 self.last_refresh_time = time.time()
-                log.debug(f"配置缓存已刷新，共加载 {len(self.config_cache)} 项配置")
+                log.debug(f"配置缓存已刷新，共加载 {len(new_cache)} 项配置")
                 return True
             else:
                 log.warning("未从数据库加载到任何配置")
@@ -58,15 +112,100 @@ class ConfigManager:
             log.error(f"刷新配置缓存失败: {e}")
             return False
     
+    # --- 后台刷新与变更通知 ---
+    
+    def start_background_refresh(self):
+        """启动后台刷新线程与 Redis 变更订阅（重复调用无副作用）"""
+        if self._refresh_thread is None or not self._refresh_thread.is_alive():
+            with self._write_lock:
+                if self._refresh_thread is None or not self._refresh_thread.is_alive():
+                    self._refresh_thread = threading.Thread(target=self._refresh_loop, name='config-refresh', daemon=True)
+                    self._refresh_thread.start()
+                    self._listener_thread = threading.Thread(target=self._listen_loop, name='config-listener', daemon=True)
+                    self._listener_thread.start()
+    
+    def _refresh_loop(self):
+        while True:
+            # 到达刷新间隔或收到变更通知时重新加载
+            self._refresh_event.wait(self.cache_ttl)
+            self._refresh_event.clear()
+            self.refresh_cache()
+    
+    def _get_redis(self):
+        if self._redis_client is None:
+            import redis
+            from src.core.config import REDIS_CONFIG
+            self._redis_client = redis.Redis(
+                host=REDIS_CONFIG['host'],
+                port=REDIS_CONFIG['port'],
+                db=REDIS_CONFIG['db'],
+                password=REDIS_CONFIG['password'],
+                decode_responses=True
+            )
+        return self._redis_client
+    
+    def _listen_loop(self):
+        """订阅配置变更频道；连接失败时退避重试，期间仍按 cache_ttl 周期刷新"""
+        retry_delay = 5
+        while True:
+            try:
+                pubsub = self._get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CONFIG_CHANNEL)
+                retry_delay = 5
+                for message in pubsub.listen():
+                    if message and message.get('type') == 'message':
+                        self._refresh_event.set()
+            except Exception as e:
+                log.debug(f"配置变更订阅中断，{retry_delay}秒后重试: {e}")
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 300)
+    
+    def _publish_change(self, key: str):
+        try:
+            self._get_redis().publish(CONFIG_CHANNEL, key)
+        except Exception as e:
+            log.debug(f"发布配置变更通知失败: {e}")
+    
+    # --- 读取 ---
+    
     def get(self, key: str, default: Any = None) -> Any:
         """
-        获取配置项
+        获取配置项（只读内存快照，不访问数据库；快照由 init_app_data 启动的后台线程刷新）
         """
-        # 检查缓存是否过期
-        if time.time() - self.last_refresh_time > self.cache_ttl:
-            self.refresh_cache()
-        
-        return self.config_cache.get(key, default)
+        return self._snapshot.values.get(key, default)
+    
+    def _get_typed(self, key: str, default: Any, kind: str, parser) -> Any:
+        snapshot = self._snapshot
+        cache_key = (key, kind)
+        value = snapshot.parsed.get(cache_key, _MISSING)
+        if value is _MISSING:
+            raw = snapshot.values.get(key, _MISSING)
+            if raw is _MISSING or raw is None:
+                value = None
+            else:
+                try:
+                    value = parser(raw)
+                except (TypeError, ValueError):
+                    log.warning(f"配置项 {key} 的值无法解析为 {kind}: {raw!r}")
+                    value = None
+            snapshot.parsed[cache_key] = value
+        return default if value is None else value
+    
+    def get_int(self, key: str, default: int = 0) -> int:
+        """获取整数配置（兼容 "10" / 10.0 等写法），缺失或无法解析时返回默认值"""
+        return self._get_typed(key, default, 'int', lambda v: int(float(v)))
+    
+    def get_float(self, key: str, default: float = 0.0) -> float:
+        """获取浮点数配置"""
+        return self._get_typed(key, default, 'float', float)
+    
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        """获取布尔配置（接受 true/false、1/0、yes/no、on/off）"""
+        return self._get_typed(key, default, 'bool', _parse_bool)
+    
+    def get_str(self, key: str, default: str = '') -> str:
+        """获取字符串配置"""
+        return self._get_typed(key, default, 'str', str)
     
     def set(self, key: str, value: Any) -> bool:
         """
@@ -83,7 +222,11 @@ class ConfigManager:
             self.repo.set_config(key, value_str)
             
             # 更新缓存
-            self.config_cache[key] = value
+            with self._write_lock:
+                values = dict(self._snapshot.values)
+                values[key] = value
+                self._swap(values)
+            self._publish_change(key)
             
             log.info(f"配置已更新: {key}")
             return True
@@ -99,8 +242,12 @@ class ConfigManager:
         try:
             if self.repo.delete_by_key(key):
                 # 从缓存中移除
-                if key in self.config_cache:
-                    del self.config_cache[key]
+                with self._write_lock:
+                    values = dict(self._snapshot.values)
+                    if key in values:
+                        del values[key]
+                        self._swap(values)
+                self._publish_change(key)
                 
                 log.info(f"配置已删除: {key}")
                 return True
@@ -119,11 +266,7 @@ class ConfigManager:
         返回:
             Dict[str, Any]: 所有配置项的字典
         """
-        # 检查缓存是否过期
-        if time.time() - self.last_refresh_time > self.cache_ttl:
-            self.refresh_cache()
-        
-        return self.config_cache.copy()
+        return dict(self._snapshot.values)
     
     def get_by_prefix(self, prefix: str) -> Dict[str, Any]:
         """
@@ -135,11 +278,7 @@ class ConfigManager:
         返回:
             Dict[str, Any]: 匹配前缀的配置项字典
         """
-        # 检查缓存是否过期
-        if time.time() - self.last_refresh_time > self.cache_ttl:
-            self.refresh_cache()
-        
-        return {k: v for k, v in self.config_cache.items() if k.startswith(prefix)}
+        return {k: v for k, v in self._snapshot.values.items() if k.startswith(prefix)}
     
     def init_default_configs(self) -> None:
         """初始化默认配置"""
@@ -157,6 +296,9 @@ class ConfigManager:
             'task.max_retry_count': 3,
             'task.retry_delay': 300,
             
+            # 统计配置
+            'statistics.flush_interval': 5,
+            
             # 爬虫配置
             'spider.min_interval': 1.8,
             'spider.max_interval': 2.0,
@@ -165,6 +307,33 @@ class ConfigManager:
             'spider.max_workers': 10,
             'spider.user_agent_rotation': True,
             'spider.proxy_enabled': False,
+            'spider.engine': 'sync',
+            'spider.async_max_inflight': 1000,
+            'spider.async_pool_size': 50,
+            'spider.async_workers': 64,
+            'spider.ptbk_prefetch': False,
+            'spider.columnar_output': True,
+            'spider.task_scheduling': 'batch',
+            'spider.stream_window': 0,
+            'spider.cipher_engine': 'node_pool',
+            'spider.cipher_workers': 4,
+            'spider.cipher_max_workers': 8,
+            'spider.cipher_cache_ttl': 10,
+            'spider.cipher_prefetch': True,
+            'spider.async_writer': True,
+            'spider.writer_queue_size': 8,
+            'spider.retry_mode': 'deferred',
+            'spider.retry_base_delay': 2.0,
+            'spider.retry_max_delay': 60.0,
+            'spider.merge_date_ranges': False,
+            'spider.concurrency_control': 'static',
+            'spider.aimd_min_workers': 1,
+            'spider.aimd_max_workers': 32,
+            'spider.aimd_sample_size': 20,
+            'spider.aimd_latency_target': 5.0,
+            'spider.response_cache': False,
+            'spider.response_cache_dir': '',
+            'spider.crawl_mode': 'online',
             
             # Cookie配置
             'cookie.min_available_count': 3,
@@ -176,6 +345,7 @@ class ConfigManager:
             'output.default_dir': str(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'output')),
             'output.default_format': 'csv',
             'output.csv_encoding': 'utf-8-sig',
+            'output.convert_chunk_size': 100000,
         }
         
         for key, value in default_configs.items():
@@ -0,0 +1,145 @@
+"""
+带索引的Cookie池
+least_used / least_recently_used 策略各维护一个最小堆，选择与封禁移除均为 O(log n)：
+- 每次选中后写入新的堆项，旧堆项因版本号不一致在弹出时被丢弃（惰性删除）
+- 封禁账号只从字典中移除，其残留堆项同样惰性丢弃
+- random / round_robin 使用可交换删除的数组，O(1) 选择与移除
+本类不加锁，由调用方（CookieRotator.cookie_lock）保证互斥。
+"""
+import heapq
+import random
+import time
+from typing import Dict, List, Optional
+
+# 策略 -> 排序字段
+HEAP_STRATEGIES = {
+    'least_used': 'use_count',
+    'least_recently_used': 'last_use_time',
+}
+
+
+class IndexedCookiePool:
+    """按使用次数 / 最近使用时间索引的Cookie记录池"""
+
+    def __init__(self, records: Optional[List[Dict]] = None):
+        self.replace(records or [])
+
+    def replace(self, records: List[Dict]):
+        """整体替换池中记录并重建索引"""
+        self._records: Dict[str, Dict] = {}
+        self._versions: Dict[str, int] = {}
+        self._order: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._index = 0
+        self._seq = 0
+        for record in records:
+            account_id = record['account_id']
+            if account_id in self._records:
+                continue
+            record.setdefault('use_count', 0)
+            record['last_use_time'] = record.get('last_use_time') or 0
+            self._records[account_id] = record
+            self._versions[account_id] = 0
+            self._positions[account_id] = len(self._order)
+            self._order.append(account_id)
+        self._rebuild_heaps()
+
+    def _rebuild_heaps(self):
+        self._heaps = {}
+        for strategy, field in HEAP_STRATEGIES.items():
+            heap = [(record[field], self._next_seq(), account_id, self._versions[account_id])
+                    for account_id, record in self._records.items()]
+            heapq.heapify(heap)
+            self._heaps[strategy] = heap
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _push(self, account_id: str):
+        record = self._records[account_id]
+        version = self._versions[account_id]
+        for strategy, field in HEAP_STRATEGIES.items():
+            heapq.heappush(self._heaps[strategy], (record[field], self._next_seq(), account_id, version))
+        # 残留的过期堆项过多时重建，避免堆无限增长
+        if len(self._heaps['least_used']) > 2 * len(self._records) + 64:
+            self._rebuild_heaps()
+
+    def _peek_heap(self, strategy: str) -> Optional[str]:
+        heap = self._heaps[strategy]
+        while heap:
+            _, _, account_id, version = heap[0]
+            if self._versions.get(account_id) == version and account_id in self._records:
+                return account_id
+            heapq.heappop(heap)
+        return None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __bool__(self) -> bool:
+        return bool(self._records)
+
+    def __contains__(self, account_id) -> bool:
+        return account_id in self._records
+
+    def get(self, account_id: str) -> Optional[Dict]:
+        return self._records.get(account_id)
+
+    def records(self) -> List[Dict]:
+        """当前记录列表（按加入顺序）"""
+        return [self._records[account_id] for account_id in self._order]
+
+    def select(self, strategy: str) -> Optional[Dict]:
+        """按策略选出一个账号（不更新使用计数，需调用 touch）"""
+        if not self._records:
+            return None
+        if strategy in HEAP_STRATEGIES:
+            account_id = self._peek_heap(strategy)
+        elif strategy == 'random':
+            account_id = random.choice(self._order)
+        else:
+            self._index %= len(self._order)
+            account_id = self._order[self._index]
+            self._index = (self._index + 1) % len(self._order)
+        return self._records.get(account_id)
+
+    def touch(self, account_id: str, now: Optional[float] = None):
+        """记录一次使用：更新计数与时间，并以新版本重新入堆"""
+        record = self._records.get(account_id)
+        if record is None:
+            return
+        record['use_count'] += 1
+        record['last_use_time'] = now or time.time()
+        self._versions[account_id] += 1
+        self._push(account_id)
+
+    def remove(self, account_id: str) -> bool:
+        """移除账号（堆项惰性删除，数组交换删除）"""
+        if self._records.pop(account_id, None) is None:
+            return False
+        self._versions.pop(account_id, None)
+        position = self._positions.pop(account_id)
+        last = self._order.pop()
+        if last != account_id:
+            self._order[position] = last
+            self._positions[last] = position
+        if self._order:
+            self._index %= len(self._order)
+        else:
+            self._index = 0
+        return True
+
+    def ordered(self, strategy: str, limit: int) -> List[Dict]:
+        """按策略给出前 limit 个候选（集群模式使用）"""
+        if strategy in HEAP_STRATEGIES:
+            field = HEAP_STRATEGIES[strategy]
+            return heapq.nsmallest(limit, self._records.values(), key=lambda r: r[field] or 0)
+        if strategy == 'random':
+            return [self._records[a] for a in random.sample(self._order, min(limit, len(self._order)))]
+        if not self._order:
+            return []
+        start = self._index % len(self._order)
+        self._index = (self._index + 1) % len(self._order)
+        rotated = self._order[start:] + self._order[:start]
+        return [self._records[a] for a in rotated[:limit]]
@@ -2,25 +2,26 @@
 Cookie轮换管理模块，负责获取、验证和轮换Cookie
 """
 import time
-import random
 import json
 import threading
 from datetime import datetime, timedelta, date
 from src.core.logger import log
 # from src.data.repositories.mysql_manager import mysql_manager # Removed
 from src.data.repositories.cookie_usage_repository import cookie_usage_repo
-from src.core.config import COOKIE_CONFIG
+from src.core.config import COOKIE_CONFIG, CLUSTER_CONFIG
 from src.services.cookie_service import CookieManager
+from src.services.cookie_pool import IndexedCookiePool
+from src.utils.rate_limiter import cookie_rate_limiter
 
 
 class CookieRotator:
     def __init__(self):
-        self.cookie_list = []
-        self.cookie_index = 0
+        self.cookie_pool = IndexedCookiePool()
         self.cookie_lock = threading.Lock()
         self.cookie_update_interval = 300  # 5分钟
         self.cookie_update_lock = threading.Lock()
         self.last_update_time = 0
+        self._refreshing = False
         self.cookie_manager = CookieManager()
         self.load_balancing_strategy = COOKIE_CONFIG.get('load_balancing_strategy', 'least_recently_used')  # 默认使用LRU策略
         # Redis键名 - 添加cookie使用量相关的键
@@ -29,6 +30,14 @@ class CookieRotator:
         
         self.usage_repo = cookie_usage_repo
 
+        # 集群模式：Cookie 租约与限速桶保存在 Redis 中，多节点共享同一个 Cookie 池
+        self.cluster = None
+        if CLUSTER_CONFIG.get('enabled'):
+            from src.services.cluster_service import cluster_coordinator
+            self.cluster = cluster_coordinator
+            cookie_rate_limiter.enable_distributed(cluster_coordinator)
+            log.info(f"Cookie轮换器已启用集群模式，节点: {cluster_coordinator.node_id}")
+
         # 同步Redis和MySQL中的使用量数据
         self._sync_usage_data()
         self._update_cookie_list()
@@ -87,78 +96,67 @@ class CookieRotator:
         except Exception as e:
             log.error(f"同步使用量数据失败: {e}")
     
-    def _update_cookie_list(self):
-        """更新可用Cookie列表"""
+    def _update_cookie_list(self, force=False):
+        """更新可用Cookie列表（一次 pipeline 读取整个 Cookie 池后整体替换）"""
         with self.cookie_update_lock:
             current_time = time.time()
-            # 如果距离上次更新时间不足更新间隔，则跳过
-            if current_time - self.last_update_time < self.cookie_update_interval:
-                return
-            
             try:
-                # 从Redis获取所有可用的Cookie
-                available_cookies = self.cookie_manager.get_all_redis_cookies()
+                # 如果距离上次更新时间不足更新间隔，则跳过（仍需在 finally 中清除后台刷新标志）
+                if not force and current_time - self.last_update_time < self.cookie_update_interval:
+                    return
                 
-                if not available_cookies:
+                today = datetime.now().strftime('%Y-%m-%d')
+                records = self.cookie_manager.get_cookie_pool_snapshot(f"{self.REDIS_COOKIE_USAGE_KEY}:{today}")
+                if records is None:
+                    return
+                if not records:
                     log.warning("没有可用的Cookie")
                     return
                 
-                # 获取今日的cookie使用情况
-                today = datetime.now().strftime('%Y-%m-%d')
-                usage_data = {}
-                if self.cookie_manager.redis_client:
-                    usage_data = self.cookie_manager.redis_client.hgetall(f"{self.REDIS_COOKIE_USAGE_KEY}:{today}")
+                with self.cookie_lock:
+                    previous = {c['account_id']: c for c in self.cookie_pool.records()}
                 
-                # 转换为列表格式
-                cookie_list = []
-                for account_id, cookie_dict in available_cookies.items():
-                    # 检查Cookie状态
-                    status = self.cookie_manager.get_redis_cookie_status(account_id)
-                    if not status or status.get('is_available') != 1:
-                        continue
-                    
-                    # 检查是否被临时封禁
-                    ban_info = self.cookie_manager.get_redis_cookie_ban_info(account_id)
-                    if ban_info:
-                        temp_ban_until = ban_info.get('temp_ban_until')
-                        if temp_ban_until:
-                            ban_time = datetime.strptime(temp_ban_until, "%Y-%m-%d %H:%M:%S")
-                            if ban_time > datetime.now():
-                                continue
-                    
-                    # 获取今日使用次数
-                    use_count = int(usage_data.get(account_id, 0))
-                    
+                for record in records:
+                    use_count = record['use_count']
                     # 计算最后使用时间，如果今日未使用则设置为0
-                    last_use_time = 0
-                    if use_count > 0:
-                        # 如果有使用记录，设置一个基于使用次数的时间戳
-                        # 使用次数越多，时间戳越大（越近）
-                        last_use_time = current_time - (1000000 / (use_count + 1))
-                    
-                    cookie_list.append({
-                        'account_id': account_id,
-                        'cookie': cookie_dict,
-                        'use_count': use_count,
-                        'last_use_time': last_use_time
-                    })
+                    # 有使用记录时按使用次数估算：使用次数越多，时间戳越大（越近）
+                    last_use_time = current_time - (1000000 / (use_count + 1)) if use_count > 0 else 0
+                    old = previous.get(record['account_id'])
+                    if old:
+                        # 保留本进程内更精确的最近使用时间
+                        last_use_time = max(last_use_time, old['last_use_time'] or 0)
+                    record['last_use_time'] = last_use_time
                 
                 # 更新Cookie列表
                 with self.cookie_lock:
-                    self.cookie_list = cookie_list
-                    self.cookie_index = 0
+                    self.cookie_pool.replace(records)
                 
                 self.last_update_time = current_time
-                log.info(f"已更新Cookie列表，共 {len(cookie_list)} 个可用Cookie")
+                log.info(f"已更新Cookie列表，共 {len(records)} 个可用Cookie")
             
             except Exception as e:
                 log.error(f"更新Cookie列表失败: {e}")
+            finally:
+                self._refreshing = False
+    
+    def _schedule_refresh(self):
+        """在后台线程中刷新Cookie列表，请求路径上继续使用当前列表"""
+        with self.cookie_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._update_cookie_list, name='cookie-refresh', daemon=True).start()
+    
+    @property
+    def cookie_list(self):
+        """当前可用Cookie记录列表（兼容旧接口）"""
+        with self.cookie_lock:
+            return self.cookie_pool.records()
     
     def reset_cache(self):
         """重置Cookie缓存，强制下次获取时重新从Redis加载"""
         with self.cookie_lock:
-            self.cookie_list = []
-            self.cookie_index = 0
+            self.cookie_pool.replace([])
             self.last_update_time = 0
             log.info("已重置Cookie缓存，下次获取将重新加载")
         return True
@@ -248,30 +246,28 @@ class CookieRotator:
     
     def get_available_cookie(self):
         """获取一个可用的Cookie"""
-        # 如果Cookie列表为空或者需要更新，则更新列表
-        if not self.cookie_list or time.time() - self.last_update_time >= self.cookie_update_interval:
+        # 列表为空时同步加载；仅过期时在后台刷新，不阻塞取 Cookie 的线程
+        if not self.cookie_pool:
             self._update_cookie_list()
+        elif time.time() - self.last_update_time >= self.cookie_update_interval:
+            self._schedule_refresh()
         
         # 如果仍然没有可用Cookie，返回None
-        if not self.cookie_list:
+        if not self.cookie_pool:
             log.warning("没有可用的Cookie")
             return None
         
+        if self.cluster is not None:
+            return self._get_leased_cookie()
+        
         with self.cookie_lock:
-            # 根据不同的负载均衡策略选择Cookie
-            if self.load_balancing_strategy == 'random':
-                cookie_info = random.choice(self.cookie_list)
-            elif self.load_balancing_strategy == 'least_used':
-                cookie_info = min(self.cookie_list, key=lambda x: x['use_count'])
-            elif self.load_balancing_strategy == 'least_recently_used':
-                cookie_info = min(self.cookie_list, key=lambda x: x['last_use_time'] or 0)
-            else:
-                cookie_info = self.cookie_list[self.cookie_index]
-                self.cookie_index = (self.cookie_index + 1) % len(self.cookie_list)
+            # 根据不同的负载均衡策略选择Cookie（堆索引，O(log n)）
+            cookie_info = self.cookie_pool.select(self.load_balancing_strategy)
+            if cookie_info is None:
+                return None
             
             # 更新使用计数和时间
-            cookie_info['use_count'] += 1
-            cookie_info['last_use_time'] = time.time()
+            self.cookie_pool.touch(cookie_info['account_id'])
             
             # 记录cookie使用量
             self._record_cookie_usage(cookie_info['account_id'])
@@ -281,9 +277,50 @@ class CookieRotator:
                 'cookie': cookie_info['cookie'],
                 'cookie_id': cookie_info['account_id']
             }
-    
-    def report_cookie_status(self, account_id, is_valid, permanent=False):
+
+    def _get_cluster_candidates(self):
+        """按负载均衡策略给出候选账号顺序（集群模式）"""
+        max_candidates = CLUSTER_CONFIG.get('max_candidates', 50)
+        with self.cookie_lock:
+            ordered = self.cookie_pool.ordered(self.load_balancing_strategy, max_candidates)
+            return [c['account_id'] for c in ordered]
+
+    def _get_leased_cookie(self):
+        """集群模式下通过 Redis 租约获取 Cookie，保证同一时刻只有一个节点/线程使用该账号"""
+        candidates = self._get_cluster_candidates()
+        account_id = self.cluster.acquire_lease(candidates)
+        if not account_id:
+            log.warning("集群模式下未能租到可用的Cookie")
+            return None
+
+        with self.cookie_lock:
+            cookie_info = self.cookie_pool.get(account_id)
+            if cookie_info is None:
+                # 租约期间账号已被封禁移出列表
+                self.cluster.release_lease(account_id)
+                return None
+            self.cookie_pool.touch(account_id)
+
+        self._record_cookie_usage(account_id)
+        return {
+            'account_id': account_id,
+            'cookie': cookie_info['cookie'],
+            'cookie_id': account_id
+        }
+
+    def release_cookie(self, account_id):
+        """请求结束后释放 Cookie 租约（非集群模式下无操作）"""
+        if self.cluster is not None and account_id:
+            self.cluster.release_lease(account_id)
+
+    def report_cookie_status(self, account_id, is_valid, permanent=False, endpoint=None):
         """报告Cookie状态，用于与爬虫代码兼容"""
+        # 同步到该账号的令牌桶（endpoint 与限速等待时一致），失败时按倍数退避
+        if is_valid:
+            cookie_rate_limiter.report_success(account_id, endpoint)
+        else:
+            cookie_rate_limiter.report_failure(account_id, endpoint)
+
         if is_valid:
             return self.mark_cookie_valid(account_id)
         elif permanent:
@@ -294,11 +331,7 @@ class CookieRotator:
                 
                 # 从当前列表中移除
                 with self.cookie_lock:
-                    self.cookie_list = [c for c in self.cookie_list if c['account_id'] != account_id]
-                    if self.cookie_list:
-                        self.cookie_index = self.cookie_index % len(self.cookie_list)
-                    else:
-                        self.cookie_index = 0
+                    self.cookie_pool.remove(account_id)
                 
                 return True
             except Exception as e:
@@ -317,11 +350,7 @@ class CookieRotator:
             
             # 从当前列表中移除
             with self.cookie_lock:
-                self.cookie_list = [c for c in self.cookie_list if c['account_id'] != cookie_id]
-                if self.cookie_list:
-                    self.cookie_index = self.cookie_index % len(self.cookie_list)
-                else:
-                    self.cookie_index = 0
+                self.cookie_pool.remove(cookie_id)
             
             return True
         except Exception as e:
@@ -347,13 +376,13 @@ class CookieRotator:
         """获取Cookie使用统计信息"""
         with self.cookie_lock:
             stats = {
-                'total_cookies': len(self.cookie_list),
+                'total_cookies': len(self.cookie_pool),
                 'strategy': self.load_balancing_strategy,
                 'cookies': [{
                     'account_id': c['account_id'],
                     'use_count': c['use_count'],
                     'last_use_time': datetime.fromtimestamp(c['last_use_time']).strftime('%Y-%m-%d %H:%M:%S') if c['last_use_time'] else None
-                } for c in self.cookie_list]
+                } for c in self.cookie_pool.records()]
             }
             return stats
     
@@ -365,4 +394,4 @@ class CookieRotator:
 
 # 创建Cookie轮换器单例
 cookie_rotator = CookieRotator()
-        
\ No newline at end of file
+        
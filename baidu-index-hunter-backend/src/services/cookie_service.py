@@ -339,6 +339,49 @@ class CookieManager:
             log.error(f"获取Redis所有Cookie失败: {e}")
             return {}
 
+    def get_cookie_pool_snapshot(self, usage_key=None):
+        """
+        一次 pipeline 读取 Cookie、状态、封禁信息与今日使用量，返回可直接使用的 Cookie 记录
+        已过滤不可用与临时封禁中的账号；Redis 不可用或读取失败时返回 None
+        :param usage_key: 今日使用量 Hash 的键名（如 baidu_index:cookie_usage:2025-01-01）
+        :return: [{'account_id', 'cookie', 'use_count'}, ...]
+        """
+        try:
+            if not self.redis_client:
+                return None
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hgetall(self.REDIS_COOKIES_KEY)
+            pipe.hgetall(self.REDIS_COOKIE_STATUS_KEY)
+            pipe.hgetall(self.REDIS_COOKIE_BAN_KEY)
+            if usage_key:
+                pipe.hgetall(usage_key)
+            results = pipe.execute()
+            cookies, statuses, bans = results[:3]
+            usage = results[3] if usage_key else {}
+        except Exception as e:
+            log.error(f"批量读取Redis Cookie池失败: {e}")
+            return None
+
+        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        records = []
+        for account_id, cookie_json in cookies.items():
+            try:
+                status = json.loads(statuses[account_id]) if statuses.get(account_id) else None
+                if not status or status.get('is_available') != 1:
+                    continue
+                ban_info = json.loads(bans[account_id]) if bans.get(account_id) else None
+                # 时间格式固定为 %Y-%m-%d %H:%M:%S，可直接按字符串比较
+                if ban_info and ban_info.get('temp_ban_until') and ban_info['temp_ban_until'] > now_str:
+                    continue
+                records.append({
+                    'account_id': account_id,
+                    'cookie': json.loads(cookie_json).get('cookie', {}),
+                    'use_count': int(usage.get(account_id, 0) or 0),
+                })
+            except (ValueError, TypeError, AttributeError) as e:
+                log.warning(f"解析Cookie {account_id} 失败，已跳过: {e}")
+        return records
+
     def get_redis_cookie_status(self, account_id):
         """获取Redis中Cookie状态"""
         try:
@@ -0,0 +1,122 @@
+"""
+日期范围请求规划
+百度指数单次请求跨度不超过 366 天时返回日度数据。规划器将用户请求的日期范围排序、去重，
+把能放进同一个 366 天窗口的范围合并为一次请求；解密后再按原始范围拆回日度数据与统计摘要。
+跨度超过 366 天的范围（周度数据）保持单独请求。
+拆分出的范围无法得到接口计算的同比/环比（记为 '-'），因此合并默认关闭（spider.merge_date_ranges）。
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+import pandas as pd
+
+from src.core.logger import log
+
+DAILY_MAX_DAYS = 366
+
+DateRange = Tuple[str, str]
+
+# 统计摘要中由日度数据重新计算的字段：日度数据列 -> (日均值字段, 总值字段)
+SEARCH_VALUE_FIELDS = {
+    'PC+移动指数': ('整体日均值', '整体总值'),
+    '移动指数': ('移动日均值', '移动总值'),
+    'PC指数': ('PC日均值', 'PC总值'),
+}
+FEED_VALUE_FIELDS = {
+    '资讯指数': ('资讯指数日均值', '资讯指数总值'),
+}
+
+
+class DateWindow(NamedTuple):
+    """一次请求的日期窗口及其覆盖的原始请求范围"""
+    start: str
+    end: str
+    parts: Tuple[DateRange, ...]
+
+
+def _parse(value: str) -> datetime:
+    return datetime.strptime(str(value), '%Y-%m-%d')
+
+
+def plan_date_windows(date_ranges: Iterable[Sequence[str]], max_days: int = DAILY_MAX_DAYS) -> List[DateWindow]:
+    """
+    将日期范围合并为尽量少的请求窗口
+    - 窗口跨度（含首尾）不超过 max_days，保证接口返回日度数据
+    - 重复范围只请求一次；无法解析或超过 max_days 的范围单独成窗口
+    """
+    windows: List[DateWindow] = []
+    daily: List[Tuple[datetime, datetime, DateRange]] = []
+    for item in dict.fromkeys(tuple(r) for r in date_ranges):
+        start, end = item[0], item[1]
+        try:
+            start_dt, end_dt = _parse(start), _parse(end)
+        except (TypeError, ValueError):
+            windows.append(DateWindow(start, end, ((start, end),)))
+            continue
+        if start_dt > end_dt or (end_dt - start_dt).days + 1 > max_days:
+            windows.append(DateWindow(start, end, ((start, end),)))
+            continue
+        daily.append((start_dt, end_dt, (start, end)))
+
+    daily.sort(key=lambda item: (item[0], item[1]))
+    group: List[DateRange] = []
+    group_start = group_end = None
+    for start_dt, end_dt, item in daily:
+        if group and (max(end_dt, group_end) - group_start).days + 1 > max_days:
+            windows.append(_window(group_start, group_end, group))
+            group = []
+        if not group:
+            group_start, group_end = start_dt, end_dt
+        group.append(item)
+        group_end = max(group_end, end_dt)
+    if group:
+        windows.append(_window(group_start, group_end, group))
+    return windows
+
+
+def _window(start_dt: datetime, end_dt: datetime, parts: List[DateRange]) -> DateWindow:
+    return DateWindow(start_dt.strftime('%Y-%m-%d'), end_dt.strftime('%Y-%m-%d'), tuple(parts))
+
+
+def split_window_results(daily, stats_records: List[Dict], window_start: str, window_end: str,
+                         parts: Sequence[DateRange], value_fields: Dict[str, Tuple[str, str]]):
+    """
+    将一个窗口的结果按原始请求范围拆分
+    :param daily: 日度数据（DataFrame 或字典列表）
+    :param stats_records: 窗口的统计摘要（每个关键词一条）
+    :return: (daily, stats_records)，daily 类型与输入一致；
+             拆分后的日均值/总值由日度数据重新计算，同比/环比无法从窗口推出，记为 '-'
+    """
+    if tuple(parts) == ((window_start, window_end),):
+        return daily, stats_records
+
+    is_frame = isinstance(daily, pd.DataFrame)
+    frame = daily if is_frame else pd.DataFrame(daily)
+    if frame.empty or '日期' not in frame.columns:
+        return daily, stats_records
+
+    part_frames, part_stats = [], []
+    for start, end in parts:
+        part_frame = frame[(frame['日期'] >= start) & (frame['日期'] <= end)]
+        part_frames.append(part_frame)
+        days = (_parse(end) - _parse(start)).days + 1
+        for record in stats_records or []:
+            rows = part_frame[part_frame['关键词'] == record.get('关键词')] if '关键词' in part_frame.columns else part_frame
+            new_record = dict(record)
+            new_record['时间范围'] = f"{start} 至 {end}"
+            for column, (avg_field, total_field) in value_fields.items():
+                if column not in rows.columns:
+                    continue
+                total = int(pd.to_numeric(rows[column], errors='coerce').fillna(0).sum())
+                new_record[total_field] = total
+                new_record[avg_field] = round(total / days) if days else 0
+            for field in new_record:
+                if field.endswith('同比') or field.endswith('环比'):
+                    new_record[field] = '-'
+            part_stats.append(new_record)
+
+    merged = pd.concat(part_frames, ignore_index=True) if part_frames else frame.iloc[0:0]
+    log.debug(f"窗口 {window_start}~{window_end} 拆分为 {len(parts)} 个请求范围")
+    if is_frame:
+        return merged, part_stats
+    return merged.to_dict('records'), part_stats
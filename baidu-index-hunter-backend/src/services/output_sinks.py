@@ -0,0 +1,204 @@
+"""
+爬虫输出写入器（Sink）
+按 output_format 选择：parquet 使用常开的 ParquetWriter，每次 flush 追加一个 row group，
+数值列保持 int64/float64 类型，任务结束后无需再从 CSV 转换；
+其他格式写 CSV（常开文件句柄追加），任务结束后由 StorageService 转换。
+column_types 为爬虫声明的列类型（列名 -> string / float64 / int64），用于数值与文本混合的列（如同比 '-'）。
+"""
+import os
+from typing import Dict, Optional, Type
+
+import pandas as pd
+
+from src.core.logger import log
+
+
+class OutputSink:
+    """输出写入器基类：write 追加一批数据，close 释放资源"""
+
+    extension = ''
+
+    def __init__(self, base_path: str, column_types: Optional[Dict[str, str]] = None):
+        self.path = self._resolve_path(base_path + self.extension)
+        self.column_types = dict(column_types or {})
+        self.rows = 0
+
+    def _resolve_path(self, path: str) -> str:
+        return path
+
+    def write(self, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class CsvSink(OutputSink):
+    """CSV 追加写入：文件句柄在任务期间保持打开，每批写入后立即 flush"""
+
+    extension = '.csv'
+
+    def __init__(self, base_path: str, encoding: str = 'utf-8-sig', column_types: Optional[Dict[str, str]] = None):
+        super().__init__(base_path, column_types)
+        self.encoding = encoding
+        self._file = None
+        self._has_header = False
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # 断点续爬时追加到已有文件，只有空文件才写表头（追加模式下 utf-8-sig 不会重复写 BOM）
+        self._has_header = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        self._file = open(self.path, 'a', encoding=self.encoding, newline='')
+
+    def write(self, df: pd.DataFrame):
+        if df is None or df.empty:
+            return
+        if self._file is None:
+            self._open()
+        df.to_csv(self._file, header=not self._has_header, index=False)
+        self._file.flush()
+        self._has_header = True
+        self.rows += len(df)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetSink(OutputSink):
+    """
+    Parquet 写入：声明的列按 column_types，其余列由首批数据确定（整数 -> int64，浮点 -> float64，其余 -> string）。
+    后续批次按 schema 对齐列；若出现 schema 无法无损保存的值（整数列出现小数、数值列出现文本），
+    不截断也不置空，而是放宽该列类型（int64 -> float64 -> string）并换到新的分片文件继续写入
+    """
+
+    extension = '.parquet'
+    ARROW_TYPES = ('string', 'float64', 'int64')
+
+    def __init__(self, base_path: str, compression: str = 'snappy', column_types: Optional[Dict[str, str]] = None):
+        import pyarrow  # noqa: F401  确保依赖可用，否则由调用方回退到 CSV
+        self._target = base_path + self.extension
+        super().__init__(base_path, column_types)
+        self.compression = compression
+        self._writer = None
+        self._schema = None
+
+    def _resolve_path(self, path: str) -> str:
+        # Parquet 文件关闭后无法追加，断点续爬（或放宽列类型）时写入新的分片文件
+        if not os.path.exists(path):
+            return path
+        base, ext = os.path.splitext(path)
+        index = 1
+        while os.path.exists(f"{base}_part{index}{ext}"):
+            index += 1
+        return f"{base}_part{index}{ext}"
+
+    def _infer_schema(self, df: pd.DataFrame):
+        import pyarrow as pa
+        fields = []
+        for name, dtype in df.dtypes.items():
+            declared = self.column_types.get(str(name))
+            if declared in self.ARROW_TYPES:
+                arrow_type = pa.type_for_alias(declared)
+            elif pd.api.types.is_bool_dtype(dtype):
+                arrow_type = pa.bool_()
+            elif pd.api.types.is_integer_dtype(dtype):
+                arrow_type = pa.int64()
+            elif pd.api.types.is_float_dtype(dtype):
+                arrow_type = pa.float64()
+            else:
+                arrow_type = pa.string()
+            fields.append(pa.field(str(name), arrow_type))
+        return pa.schema(fields)
+
+    def _widen(self, df: pd.DataFrame):
+        """返回能无损容纳本批数据的 schema；当前 schema 已足够时返回 None"""
+        import pyarrow as pa
+        df = df.rename(columns=str)
+        fields = []
+        changed = False
+        for field in self._schema:
+            arrow_type = field.type
+            if field.name in df.columns and (pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)):
+                column = df[field.name]
+                present = column.notna()
+                if not pd.api.types.is_numeric_dtype(column):
+                    # 空字符串视为缺失值
+                    present &= column.astype(str) != ''
+                numeric = pd.to_numeric(column.where(present), errors='coerce')
+                if (numeric.isna() & present).any():
+                    arrow_type = pa.string()
+                elif pa.types.is_integer(arrow_type) and not (numeric.dropna() % 1 == 0).all():
+                    arrow_type = pa.float64()
+            if arrow_type != field.type:
+                log.warning(f"Parquet 列 {field.name} 出现 {field.type} 无法保存的值，放宽为 {arrow_type}")
+                changed = True
+            fields.append(pa.field(field.name, arrow_type))
+        return pa.schema(fields) if changed else None
+
+    def _conform(self, df: pd.DataFrame):
+        """按 schema 对齐列（缺失列补空、多余列丢弃）并转换为 Arrow 表"""
+        import pyarrow as pa
+        df = df.rename(columns=str).reindex(columns=self._schema.names)
+        arrays = []
+        for field in self._schema:
+            column = df[field.name]
+            if pa.types.is_string(field.type):
+                values = [None if pd.isna(v) else str(v) for v in column.tolist()]
+                arrays.append(pa.array(values, type=field.type))
+            elif pa.types.is_boolean(field.type):
+                arrays.append(pa.array(column.astype(object).where(column.notna(), None).tolist(), type=field.type))
+            else:
+                # _widen 已保证数值可无损转换（仅空字符串记为缺失）
+                numeric = pd.to_numeric(column, errors='coerce')
+                arrays.append(pa.Array.from_pandas(numeric, type=field.type, safe=False))
+        return pa.Table.from_arrays(arrays, schema=self._schema)
+
+    def _open_writer(self):
+        import pyarrow.parquet as pq
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._writer = pq.ParquetWriter(self.path, self._schema, compression=self.compression)
+
+    def write(self, df: pd.DataFrame):
+        if df is None or df.empty:
+            return
+        if self._writer is None:
+            self._schema = self._infer_schema(df)
+            self._open_writer()
+        else:
+            widened = self._widen(df)
+            if widened is not None:
+                # 已写出的 row group 无法改类型：关闭当前文件，按放宽后的 schema 写新分片
+                self._writer.close()
+                self.path = self._resolve_path(self._target)
+                self._schema = widened
+                self._open_writer()
+        self._writer.write_table(self._conform(df))
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+# 输出格式 -> 原生写入器；未列出的格式写 CSV 后再转换
+SINK_TYPES: Dict[str, Type[OutputSink]] = {
+    'csv': CsvSink,
+    'parquet': ParquetSink,
+}
+
+
+def create_sink(output_format: str, base_path: str, column_types: Optional[Dict[str, str]] = None) -> OutputSink:
+    """
+    按输出格式创建写入器
+    :param base_path: 不含扩展名的输出路径
+    :param column_types: 声明的列类型（列名 -> string / float64 / int64）
+    """
+    sink_type = SINK_TYPES.get(output_format, CsvSink)
+    try:
+        return sink_type(base_path, column_types=column_types)
+    except ImportError as e:
+        log.warning(f"{output_format} 写入器不可用，回退到 CSV: {e}")
+        return CsvSink(base_path, column_types=column_types)
@@ -8,13 +8,14 @@
 - 可读性：可用任何 SQLite 工具（DB Browser, sqlite3 CLI）查看进度
 
 文件大小估算（300 关键词 × 400 城市 × 13 年 = 1,560,000 任务）:
-- 每条 task_key 约 130 字节（含索引开销）
-- 总文件约 150-200MB，单机完全可控
+- 旧版 task_items 每条 task_key 约 130 字节（含索引开销），总计 150-200MB
+- 完成索引（字典编码 + 位图，见 completion_index）约 200KB，压缩后更小
 
 设计:
 - checkpoint_meta 表: 1 行/任务，存储统计信息和配置数据
-- task_items 表: N 行/任务，每个完成/失败的 task_key 一行
-- 内存缓冲: 批量写入减少 I/O，可配置 batch_size
+- completion_index 表: 2 行/任务（completed/failed），存储字典与压缩位图
+- task_items 表: 旧版逐条记录，仅在加载时读取并于下次保存时合并进完成索引
+- 内存缓冲: 累计 batch_size 个变更后写入一次快照
 """
 import os
 import sqlite3
@@ -24,6 +25,7 @@ from datetime import datetime
 from typing import Set, Dict, Optional, List, Any
 
 from src.core.logger import log
+from src.services.completion_index import CompletionSet
 
 
 class ProgressManager:
@@ -31,8 +33,8 @@ class ProgressManager:
     使用 SQLite (WAL 模式) 管理爬虫任务进度。
     
     核心思路:
-    - 内存中维护 completed/failed 集合用于 O(1) 查找（爬虫主循环需要高速判重）
-    - SQLite 作为持久层，使用批量缓冲减少 I/O 开销
+    - 内存中维护 completed/failed 完成索引（CompletionSet）用于快速判重
+    - SQLite 作为持久层，按批次写入索引快照减少 I/O 开销
     - WAL 模式允许多个工作线程同时读写，不互相阻塞
     
     使用方式:
@@ -60,8 +62,10 @@ class ProgressManager:
         self.task_id = task_id
         self._conn: Optional[sqlite3.Connection] = None
         self._lock = threading.Lock()
-        self._pending_completed: List[str] = []
-        self._pending_failed: List[str] = []
+        self.completed = CompletionSet()
+        self.failed = CompletionSet()
+        self._pending_changes = 0
+        self._has_legacy_items = False
         self._batch_size = batch_size
         self._closed = False
         self._init_db()
@@ -106,6 +110,16 @@ class ProgressManager:
             
             CREATE INDEX IF NOT EXISTS idx_task_items_status 
                 ON task_items(task_id, status);
+            
+            CREATE TABLE IF NOT EXISTS completion_index (
+                task_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                dictionary TEXT,
+                bitmap BLOB,
+                item_count INTEGER DEFAULT 0,
+                update_time TEXT,
+                PRIMARY KEY (task_id, status)
+            );
         """)
         self._conn.commit()
     
@@ -115,8 +129,8 @@ class ProgressManager:
         
         Returns:
             与旧 pkl 格式兼容的字典，包含:
-            - completed_keywords: List[str] - 已完成的任务键列表
-            - failed_keywords: List[str] - 失败的任务键列表
+            - completed_keywords: CompletionSet - 已完成的任务键集合（即 self.completed）
+            - failed_keywords: CompletionSet - 失败的任务键集合（即 self.failed）
             - completed_tasks, failed_tasks, total_tasks: int
             - output_path, output_files, start_time, update_time
             - extra_data 中的所有字段会被展开到顶层（如 city_dict, current_keyword_index 等）
@@ -134,19 +148,8 @@ class ProgressManager:
             columns = [d[0] for d in cursor.description]
             meta = dict(zip(columns, row))
             
-            # 加载已完成的 task_keys
-            cursor = self._conn.execute(
-                "SELECT task_key FROM task_items WHERE task_id = ? AND status = 'completed'",
-                (self.task_id,)
-            )
-            completed_keywords = [r[0] for r in cursor.fetchall()]
-            
-            # 加载失败的 task_keys
-            cursor = self._conn.execute(
-                "SELECT task_key FROM task_items WHERE task_id = ? AND status = 'failed'",
-                (self.task_id,)
-            )
-            failed_keywords = [r[0] for r in cursor.fetchall()]
+            # 加载完成索引（兼容旧版 task_items 逐条记录）
+            self._load_completion_index()
             
             # 解析 output_files (JSON)
             output_files = []
@@ -166,8 +169,8 @@ class ProgressManager:
             
             # 构建与旧 pkl 格式兼容的结果字典
             result = {
-                'completed_keywords': completed_keywords,
-                'failed_keywords': failed_keywords,
+                'completed_keywords': self.completed,
+                'failed_keywords': self.failed,
                 'completed_tasks': meta.get('completed_tasks', 0),
                 'failed_tasks': meta.get('failed_tasks', 0),
                 'total_tasks': meta.get('total_tasks', 0),
@@ -196,8 +199,11 @@ class ProgressManager:
         if not keys:
             return
         with self._lock:
-            self._pending_completed.extend(keys)
-            if len(self._pending_completed) >= self._batch_size:
+            self.completed.update(keys)
+            for key in keys:
+                self.failed.discard(key)
+            self._pending_changes += len(keys)
+            if self._pending_changes >= self._batch_size:
                 self._flush_items()
     
     def mark_failed(self, keys: List[str]):
@@ -212,41 +218,68 @@ class ProgressManager:
         if not keys:
             return
         with self._lock:
-            self._pending_failed.extend(keys)
-            if len(self._pending_failed) >= self._batch_size:
+            self.failed.update(keys)
+            for key in keys:
+                self.completed.discard(key)
+            self._pending_changes += len(keys)
+            if self._pending_changes >= self._batch_size:
                 self._flush_items()
     
-    def _flush_items(self):
+    def _load_completion_index(self):
         """
-        将缓冲区中的 task_items 写入 SQLite。
+        从 SQLite 加载完成索引到 self.completed / self.failed。
         须在持有 _lock 的情况下调用。
-        使用单个事务批量 INSERT，性能优异。
+        旧版 task_items 中的记录会一并合并，并在下次刷盘后删除。
+        """
+        rows = self._conn.execute(
+            "SELECT status, dictionary, bitmap FROM completion_index WHERE task_id = ?",
+            (self.task_id,)
+        ).fetchall()
+        payloads = {status: (dictionary, bitmap) for status, dictionary, bitmap in rows}
+        self.completed = CompletionSet.from_payload(*payloads['completed']) if 'completed' in payloads else CompletionSet()
+        self.failed = CompletionSet.from_payload(*payloads['failed']) if 'failed' in payloads else CompletionSet()
         
-        INSERT OR REPLACE 确保：
-        - 如果任务之前失败，现在成功 → 状态更新为 completed
-        - 如果任务重试后仍然失败 → 状态保持为 failed
+        cursor = self._conn.execute(
+            "SELECT task_key, status FROM task_items WHERE task_id = ?",
+            (self.task_id,)
+        )
+        for task_key, status in cursor:
+            self._has_legacy_items = True
+            if status == 'completed':
+                self.completed.add(task_key)
+            else:
+                self.failed.add(task_key)
+        if self._has_legacy_items:
+            # 同一 task_key 既成功又失败时以成功为准（与旧版 INSERT OR REPLACE 的最终状态一致）
+            for task_key in [k for k in self.failed if k in self.completed]:
+                self.failed.discard(task_key)
+            self._pending_changes += 1
+
+    def _flush_items(self):
         """
-        if not self._pending_completed and not self._pending_failed:
+        将完成索引快照写入 SQLite。
+        须在持有 _lock 的情况下调用。
+        每个状态一行，字典 + 压缩位图整体覆盖写入。
+        """
+        if not self._pending_changes:
             return
         
         try:
-            cursor = self._conn.cursor()
-            
-            if self._pending_completed:
-                cursor.executemany(
-                    "INSERT OR REPLACE INTO task_items (task_id, task_key, status) VALUES (?, ?, 'completed')",
-                    [(self.task_id, key) for key in self._pending_completed]
-                )
-                self._pending_completed.clear()
-            
-            if self._pending_failed:
-                cursor.executemany(
-                    "INSERT OR REPLACE INTO task_items (task_id, task_key, status) VALUES (?, ?, 'failed')",
-                    [(self.task_id, key) for key in self._pending_failed]
-                )
-                self._pending_failed.clear()
-            
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            rows = []
+            for status, items in (('completed', self.completed), ('failed', self.failed)):
+                dictionary, bitmap = items.to_payload()
+                rows.append((self.task_id, status, dictionary, sqlite3.Binary(bitmap), len(items), now))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO completion_index (task_id, status, dictionary, bitmap, item_count, update_time) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            if self._has_legacy_items:
+                self._conn.execute("DELETE FROM task_items WHERE task_id = ?", (self.task_id,))
+                self._has_legacy_items = False
             self._conn.commit()
+            self._pending_changes = 0
         except Exception as e:
             log.error(f"[ProgressManager] 刷盘失败: {e}")
     
@@ -300,8 +333,7 @@ class ProgressManager:
         """
         从旧 pkl 格式的字典迁移数据到 SQLite。
         
-        使用分批写入 + 单次提交，保证原子性：要么全部成功，要么全部失败。
-        对于 1.56M 条目，迁移约需 2-5 秒。
+        已完成/失败项编码为完成索引（self.completed / self.failed）后整体写入。
         
         Args:
             data: 从 pkl 文件加载的检查点字典
@@ -317,22 +349,10 @@ class ProgressManager:
             try:
                 cursor = self._conn.cursor()
                 
-                # 分批 INSERT 已完成项
-                BATCH = 10000
-                for i in range(0, len(completed), BATCH):
-                    batch = completed[i:i + BATCH]
-                    cursor.executemany(
-                        "INSERT OR REPLACE INTO task_items (task_id, task_key, status) VALUES (?, ?, 'completed')",
-                        [(self.task_id, key) for key in batch]
-                    )
-                
-                # 分批 INSERT 失败项
-                for i in range(0, len(failed), BATCH):
-                    batch = failed[i:i + BATCH]
-                    cursor.executemany(
-                        "INSERT OR REPLACE INTO task_items (task_id, task_key, status) VALUES (?, ?, 'failed')",
-                        [(self.task_id, key) for key in batch]
-                    )
+                self.completed = CompletionSet(completed)
+                self.failed = CompletionSet(k for k in failed if k not in self.completed)
+                self._pending_changes += 1
+                self._flush_items()
                 
                 # 保存元数据
                 standard_keys = {
@@ -379,19 +399,20 @@ class ProgressManager:
         获取进度统计信息
         
         Returns:
-            包含已持久化和待写入数量的字典
+            包含已持久化数量、内存索引数量和待写入变更数的字典
         """
         with self._lock:
             cursor = self._conn.execute(
-                "SELECT status, COUNT(*) FROM task_items WHERE task_id = ? GROUP BY status",
+                "SELECT status, item_count FROM completion_index WHERE task_id = ?",
                 (self.task_id,)
             )
             counts = dict(cursor.fetchall())
             return {
                 'db_completed': counts.get('completed', 0),
                 'db_failed': counts.get('failed', 0),
-                'pending_completed': len(self._pending_completed),
-                'pending_failed': len(self._pending_failed),
+                'completed': len(self.completed),
+                'failed': len(self.failed),
+                'pending_changes': self._pending_changes,
             }
     
     def close(self):
@@ -6,8 +6,10 @@
 """
 
 import json
+import time
 import redis
 import logging
+import threading
 from typing import Dict, List, Any, Optional, Tuple, Union
 
 from src.core.config import REDIS_CONFIG
@@ -29,6 +31,10 @@ class RegionManager:
     REDIS_CITIES_KEY = "baidu_index:cities"          # 地级市数据
     REDIS_REGIONS_KEY = "baidu_index:regions"        # 区域关系数据
     REDIS_PROVINCE_CITIES_KEY = "baidu_index:province_cities"  # 省份下属城市数据
+    REDIS_VERSION_KEY = "baidu_index:region_version"  # 区域数据版本号，每次同步后递增
+    
+    # 本地缓存比对版本号的最小间隔（秒），期间的查询不访问Redis
+    VERSION_CHECK_INTERVAL = 5
     
     # Redis过期时间（7天）
     REDIS_EXPIRE = 60 * 60 * 24 * 7
@@ -38,6 +44,11 @@ class RegionManager:
         self.redis_config = REDIS_CONFIG
         self.redis_client = None
         self.repo = region_repo
+        # 进程内只读缓存：Redis键 -> 已解析的字典，以及派生的名称索引
+        self._cache = {}
+        self._cache_version = None
+        self._last_version_check = 0
+        self._cache_lock = threading.Lock()
         self._connect()
     
     def _connect(self):
@@ -63,6 +74,62 @@ class RegionManager:
             self.redis_client.close()
         log.info("已断开Redis连接")
     
+    def _check_version(self):
+        """按间隔比对Redis中的版本号，版本变化（其他进程已同步）时清空本地缓存"""
+        now = time.monotonic()
+        if now - self._last_version_check < self.VERSION_CHECK_INTERVAL:
+            return
+        self._last_version_check = now
+        try:
+            version = self.redis_client.get(self.REDIS_VERSION_KEY)
+        except Exception as e:
+            log.warning(f"读取区域数据版本号失败: {e}")
+            return
+        if version != self._cache_version:
+            with self._cache_lock:
+                self._cache = {}
+                self._cache_version = version
+    
+    def invalidate_cache(self):
+        """递增Redis版本号并清空本地缓存，其他进程在下次比对版本号时失效"""
+        with self._cache_lock:
+            self._cache = {}
+        try:
+            version = self.redis_client.incr(self.REDIS_VERSION_KEY)
+            self._cache_version = str(version)
+        except Exception as e:
+            log.warning(f"更新区域数据版本号失败: {e}")
+    
+    def _get_cached(self, redis_key: str, sync_func) -> Dict:
+        """优先读取本地缓存，未命中时从Redis加载（Redis中也没有则先同步）"""
+        self._check_version()
+        data = self._cache.get(redis_key)
+        if data is not None:
+            return data
+        
+        data_json = self.redis_client.get(redis_key)
+        if not data_json:
+            # Redis中没有，同步数据并重新获取
+            sync_func()
+            data_json = self.redis_client.get(redis_key)
+        data = json.loads(data_json) if data_json else {}
+        if data:
+            with self._cache_lock:
+                self._cache[redis_key] = data
+        return data
+    
+    def _get_city_name_index(self) -> Dict[str, str]:
+        """城市名称 -> 城市代码 索引"""
+        index = self._cache.get('city_name_index')
+        if index is None:
+            index = {}
+            for code, city in self.get_all_cities().items():
+                index.setdefault(city['name'], code)
+            if index:
+                with self._cache_lock:
+                    self._cache['city_name_index'] = index
+        return index
+    
     def sync_to_redis(self):
         """将MySQL中的区域数据同步到Redis"""
         try:
@@ -103,6 +170,7 @@ class RegionManager:
             if provinces_data:
                 self.redis_client.set(self.REDIS_PROVINCES_KEY, json.dumps(provinces_data, ensure_ascii=False))
                 self.redis_client.expire(self.REDIS_PROVINCES_KEY, self.REDIS_EXPIRE)
+                self.invalidate_cache()
             
             log.info(f"成功同步 {len(provinces_data)} 条省份数据到Redis")
         except Exception as e:
@@ -126,6 +194,7 @@ class RegionManager:
             if cities_data:
                 self.redis_client.set(self.REDIS_CITIES_KEY, json.dumps(cities_data, ensure_ascii=False))
                 self.redis_client.expire(self.REDIS_CITIES_KEY, self.REDIS_EXPIRE)
+                self.invalidate_cache()
             
             log.info(f"成功同步 {len(cities_data)} 条地级市数据到Redis")
         except Exception as e:
@@ -174,6 +243,7 @@ class RegionManager:
             if regions_data:
                 self.redis_client.set(self.REDIS_REGIONS_KEY, json.dumps(regions_data, ensure_ascii=False))
                 self.redis_client.expire(self.REDIS_REGIONS_KEY, self.REDIS_EXPIRE)
+                self.invalidate_cache()
             
             log.info(f"成功同步 {len(regions_data)} 条区域关系数据到Redis")
         except Exception as e:
@@ -182,47 +252,23 @@ class RegionManager:
     def get_all_provinces(self) -> Dict:
         """
         获取所有省份数据（包含大区信息）
-        :return: 省份数据字典
+        :return: 省份数据字典（进程内共享缓存，调用方不要修改）
         """
-        provinces_json = self.redis_client.get(self.REDIS_PROVINCES_KEY)
-        
-        if provinces_json:
-            return json.loads(provinces_json)
-        
-        # Redis中没有，同步数据并重新获取
-        self._sync_provinces()
-        provinces_json = self.redis_client.get(self.REDIS_PROVINCES_KEY)
-        return json.loads(provinces_json) if provinces_json else {}
+        return self._get_cached(self.REDIS_PROVINCES_KEY, self._sync_provinces)
     
     def get_all_cities(self) -> Dict:
         """
         获取所有地级市数据
-        :return: 地级市数据字典
+        :return: 地级市数据字典（进程内共享缓存，调用方不要修改）
         """
-        cities_json = self.redis_client.get(self.REDIS_CITIES_KEY)
-        
-        if cities_json:
-            return json.loads(cities_json)
-        
-        # Redis中没有，同步数据并重新获取
-        self._sync_cities()
-        cities_json = self.redis_client.get(self.REDIS_CITIES_KEY)
-        return json.loads(cities_json) if cities_json else {}
+        return self._get_cached(self.REDIS_CITIES_KEY, self._sync_cities)
     
     def get_all_regions(self) -> Dict:
         """
         获取所有区域关系数据
-        :return: 区域关系数据字典
+        :return: 区域关系数据字典（进程内共享缓存，调用方不要修改）
         """
-        regions_json = self.redis_client.get(self.REDIS_REGIONS_KEY)
-        
-        if regions_json:
-            return json.loads(regions_json)
-        
-        # Redis中没有，同步数据并重新获取
-        self._sync_regions()
-        regions_json = self.redis_client.get(self.REDIS_REGIONS_KEY)
-        return json.loads(regions_json) if regions_json else {}
+        return self._get_cached(self.REDIS_REGIONS_KEY, self._sync_regions)
     
     def get_region_by_code(self, code: str) -> Optional[Dict]:
         """
@@ -253,7 +299,7 @@ class RegionManager:
         """
         # 从地级市数据中获取
         cities = self.get_all_cities()
-        city = cities.get(city_code)
+        city = cities.get(str(city_code))
         return city['name'] if city else None
     
     
@@ -379,14 +425,10 @@ class RegionManager:
             
         # log.info(f"开始查询城市名称 '{city_name}' 对应的代码")
         
-        # 先从Redis缓存中查找
-        cities = self.get_all_cities()
-        
-        # 遍历城市数据查找匹配名称的城市
-        for code, city in cities.items():
-            if city["name"] == city_name:
-                # log.info(f"从Redis缓存中找到城市: '{city_name}', 代码: {code}")
-                return code
+        # 先从本地名称索引中查找
+        code = self._get_city_name_index().get(city_name)
+        if code:
+            return code
         
         # Redis中没找到，从数据库查询
         try:
@@ -583,6 +625,7 @@ class RegionManager:
                     json.dumps(province_cities, ensure_ascii=False)
                 )
                 self.redis_client.expire(self.REDIS_PROVINCE_CITIES_KEY, self.REDIS_EXPIRE)
+                self.invalidate_cache()
                 
                 log.info(f"成功统计并同步 {len(province_cities)} 个省份的城市数据到Redis")
                 return True
@@ -598,17 +641,10 @@ class RegionManager:
         """
         获取各省份下属城市数据
         """
-        province_cities_json = self.redis_client.get(self.REDIS_PROVINCE_CITIES_KEY)
-        
         # 如果Redis中没有数据，先同步
-        if not province_cities_json:
-            self.sync_province_cities()
-            province_cities_json = self.redis_client.get(self.REDIS_PROVINCE_CITIES_KEY)
-            
-        if not province_cities_json:
+        province_cities = self._get_cached(self.REDIS_PROVINCE_CITIES_KEY, self.sync_province_cities)
+        if not province_cities:
             return {}
-            
-        province_cities = json.loads(province_cities_json)
         
         # 如果指定了省份代码，只返回该省份的数据
         if province_code:
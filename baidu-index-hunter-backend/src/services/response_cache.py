@@ -0,0 +1,226 @@
+"""
+接口响应磁盘缓存
+按 (接口, 规范化请求参数) 缓存百度指数接口返回的数据，同一参数在 TTL 内不再重复请求：
+- 内容以 zlib 压缩后追加写入分段文件（segments/000001.seg ...），相同内容只存一份（按 SHA-1 寻址）
+- SQLite 索引记录 请求键 -> 内容摘要 与 摘要 -> (分段, 偏移, 长度)
+- 每个接口单独设置 TTL（spider.response_cache_ttl.<接口>，0 表示永不过期）
+回放模式（spider.crawl_mode = replay）忽略 TTL，只从缓存读取，不访问网络。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from src.core.logger import log
+from src.core.config import OUTPUT_DIR
+
+DEFAULT_CACHE_DIR = os.path.join(OUTPUT_DIR, 'cache', 'responses')
+
+# 各接口默认 TTL（秒）：趋势类数据当天可能补数，画像类数据更新较慢
+DEFAULT_TTLS = {
+    'search_index': 6 * 3600,
+    'feed_index': 6 * 3600,
+    'word_graph': 24 * 3600,
+    'region_distribution': 24 * 3600,
+    'demographic_attributes': 7 * 24 * 3600,
+    'interest_profile': 7 * 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """规范化请求参数：去掉空值，标量统一为字符串，列表保持顺序（决定返回数据的顺序）"""
+    normalized = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            normalized[name] = [str(item) for item in value]
+        else:
+            normalized[name] = str(value)
+    return normalized
+
+
+def make_cache_key(endpoint: str, params: Dict[str, Any]) -> str:
+    raw = json.dumps([endpoint, normalize_params(params)], sort_keys=True,
+                     ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """追加写的压缩分段存储 + SQLite 索引，线程安全"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttls: Optional[Dict[str, int]] = None,
+                 default_ttl: int = DEFAULT_TTL, segment_max_bytes: int = SEGMENT_MAX_BYTES,
+                 compress_level: int = 6):
+        self.cache_dir = cache_dir
+        self.segment_dir = os.path.join(cache_dir, 'segments')
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.segment_max_bytes = segment_max_bytes
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._segment_id = 0
+        self._segment_size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.writes = 0
+        self.dedup_writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """首次使用时创建目录与索引"""
+        if self._conn is None:
+            os.makedirs(self.segment_dir, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.cache_dir, 'index.db'), check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS blobs ('
+                         'digest TEXT PRIMARY KEY, segment INTEGER, offset INTEGER, length INTEGER)')
+            conn.execute('CREATE TABLE IF NOT EXISTS entries ('
+                         'key TEXT PRIMARY KEY, endpoint TEXT, digest TEXT, created REAL, params TEXT)')
+            conn.commit()
+            row = conn.execute('SELECT MAX(segment) FROM blobs').fetchone()
+            self._segment_id = row[0] or 1
+            path = self._segment_path(self._segment_id)
+            self._segment_size = os.path.getsize(path) if os.path.exists(path) else 0
+            self._conn = conn
+        return self._conn
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.segment_dir, f"{segment_id:06d}.seg")
+
+    def ttl_for(self, endpoint: str) -> int:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, endpoint: str, params: Dict[str, Any], ignore_ttl: bool = False) -> Optional[Any]:
+        """读取缓存内容；不存在、已过期或读取失败时返回 None"""
+        key = make_cache_key(endpoint, params)
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    'SELECT e.created, b.segment, b.offset, b.length FROM entries e '
+                    'JOIN blobs b ON e.digest = b.digest WHERE e.key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                created, segment_id, offset, length = row
+                ttl = self.ttl_for(endpoint)
+                if not ignore_ttl and ttl > 0 and time.time() - created > ttl:
+                    self.expired += 1
+                    self.misses += 1
+                    return None
+                with open(self._segment_path(segment_id), 'rb') as f:
+                    f.seek(offset)
+                    blob = f.read(length)
+                payload = json.loads(zlib.decompress(blob).decode('utf-8'))
+            except Exception as e:
+                log.warning(f"读取响应缓存失败 [{endpoint}]: {e}")
+                self.misses += 1
+                return None
+            self.hits += 1
+            return payload
+
+    def put(self, endpoint: str, params: Dict[str, Any], payload: Any) -> bool:
+        """写入缓存；内容相同的响应只在分段中保存一份"""
+        try:
+            raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        except (TypeError, ValueError) as e:
+            log.warning(f"响应无法序列化，跳过缓存 [{endpoint}]: {e}")
+            return False
+        digest = hashlib.sha1(raw).hexdigest()
+        key = make_cache_key(endpoint, params)
+        params_text = json.dumps(normalize_params(params), ensure_ascii=False)
+        with self._lock:
+            try:
+                conn = self._connect()
+                if conn.execute('SELECT 1 FROM blobs WHERE digest = ?', (digest,)).fetchone():
+                    self.dedup_writes += 1
+                else:
+                    blob = zlib.compress(raw, self.compress_level)
+                    if self._segment_size and self._segment_size + len(blob) > self.segment_max_bytes:
+                        self._segment_id += 1
+                        self._segment_size = 0
+                    with open(self._segment_path(self._segment_id), 'ab') as f:
+                        offset = f.tell()
+                        f.write(blob)
+                    self._segment_size = offset + len(blob)
+                    conn.execute('INSERT INTO blobs (digest, segment, offset, length) VALUES (?, ?, ?, ?)',
+                                 (digest, self._segment_id, offset, len(blob)))
+                conn.execute('INSERT OR REPLACE INTO entries (key, endpoint, digest, created, params) '
+                             'VALUES (?, ?, ?, ?, ?)', (key, endpoint, digest, time.time(), params_text))
+                conn.commit()
+                self.writes += 1
+                return True
+            except Exception as e:
+                log.warning(f"写入响应缓存失败 [{endpoint}]: {e}")
+                return False
+
+    def purge_expired(self) -> int:
+        """删除已过期的索引项，返回删除数量（分段文件中的内容不回收）"""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            try:
+                conn = self._connect()
+                endpoints = [row[0] for row in conn.execute('SELECT DISTINCT endpoint FROM entries')]
+                for endpoint in endpoints:
+                    ttl = self.ttl_for(endpoint)
+                    if ttl > 0:
+                        removed += conn.execute('DELETE FROM entries WHERE endpoint = ? AND created < ?',
+                                                (endpoint, now - ttl)).rowcount
+                conn.commit()
+            except Exception as e:
+                log.warning(f"清理响应缓存失败: {e}")
+        return removed
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            entries = 0
+            if self._conn is not None:
+                entries = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            return {
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'hit_rate': round(self.hits / total, 4) if total else 0,
+                'writes': self.writes,
+                'dedup_writes': self.dedup_writes,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """全局响应缓存（首次使用时按配置创建）"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                from src.services.config_service import config_manager
+                ttls = {
+                    endpoint: config_manager.get_int(f'spider.response_cache_ttl.{endpoint}', ttl)
+                    for endpoint, ttl in DEFAULT_TTLS.items()
+                }
+                cache_dir = config_manager.get_str('spider.response_cache_dir', '') or DEFAULT_CACHE_DIR
+                _response_cache = ResponseCache(cache_dir, ttls=ttls)
+    return _response_cache
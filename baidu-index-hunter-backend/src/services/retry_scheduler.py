@@ -0,0 +1,118 @@
+"""
+延迟重试调度器
+失败任务按指数退避放入 (到期时间, 任务) 小顶堆，由调度线程在到期后重新提交，
+工作线程不再在重试间隔中休眠。每个任务的重试次数与下次到期时间可导出到检查点，断点续爬后继续退避。
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.core.logger import log
+
+
+class RetryScheduler:
+    """按任务键记录重试次数，失败任务在退避到期前不占用线程池"""
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 2.0,
+                 backoff: float = 2.0, max_delay: float = 60.0):
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = max(0.0, float(base_delay))
+        self.backoff = max(1.0, float(backoff))
+        self.max_delay = max(self.base_delay, float(max_delay))
+        self._heap = []
+        self._seq = itertools.count()
+        # 任务键 -> [已重试次数, 下次到期时间（time.time()，0 表示不在等待中）]
+        self._state: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(keys: Iterable[str]) -> str:
+        return '|'.join(keys)
+
+    def _delay_for(self, attempt: int) -> float:
+        return min(self.base_delay * self.backoff ** (attempt - 1), self.max_delay)
+
+    def schedule(self, keys: Iterable[str], task: Any, now: Optional[float] = None) -> Optional[float]:
+        """
+        登记一次失败并安排重试
+        :return: 退避秒数；已达最大重试次数时返回 None（状态随之清除）
+        """
+        key = self.make_key(keys)
+        now = time.time() if now is None else now
+        with self._lock:
+            attempts = int(self._state.get(key, (0, 0))[0]) + 1
+            if attempts > self.max_retries:
+                self._state.pop(key, None)
+                return None
+            delay = self._delay_for(attempts)
+            self._state[key] = [attempts, now + delay]
+            heapq.heappush(self._heap, (now + delay, next(self._seq), key, task))
+            return delay
+
+    def defer(self, keys: Iterable[str], task: Any, now: Optional[float] = None) -> bool:
+        """恢复的任务若仍在退避期内则放入堆中等待，返回是否已延迟"""
+        if not self._state:
+            return False
+        key = self.make_key(keys)
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state.get(key)
+            if not state or state[1] <= now:
+                return False
+            heapq.heappush(self._heap, (state[1], next(self._seq), key, task))
+            return True
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Any]:
+        """取出已到期的任务（最多 limit 个）"""
+        now = time.time() if now is None else now
+        tasks = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and (limit is None or len(tasks) < limit):
+                _, _, key, task = heapq.heappop(self._heap)
+                state = self._state.get(key)
+                if state:
+                    state[1] = 0
+                tasks.append(task)
+        return tasks
+
+    def next_delay(self, now: Optional[float] = None) -> Optional[float]:
+        """距最早到期任务的秒数，没有等待中的任务时返回 None"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - now)
+
+    def discard(self, keys: Iterable[str]):
+        """任务成功或最终失败后清除其重试状态"""
+        if self._state:
+            with self._lock:
+                self._state.pop(self.make_key(keys), None)
+
+    def attempts(self, keys: Iterable[str]) -> int:
+        state = self._state.get(self.make_key(keys))
+        return int(state[0]) if state else 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        """导出重试状态（写入检查点）"""
+        with self._lock:
+            return {key: list(state) for key, state in self._state.items()}
+
+    def restore(self, state: Optional[Dict[str, List[float]]]):
+        """从检查点恢复重试次数与到期时间，对应任务在重新生成时按到期时间延迟提交"""
+        with self._lock:
+            self._heap = []
+            self._state = {}
+            for key, value in (state or {}).items():
+                try:
+                    self._state[key] = [int(value[0]), float(value[1])]
+                except (TypeError, ValueError, IndexError) as e:
+                    log.warning(f"忽略无效的重试状态 {key}: {e}")
+
+    def reset(self):
+        self.restore(None)
@@ -163,5 +163,20 @@ class StatisticsService:
             'data_volume_comparison': data_volume_comparison
         }
 
+    def get_engine_stats(self) -> Dict[str, Any]:
+        """获取爬虫引擎运行时统计（进程内，重启后清零）"""
+        from src.engine.crypto.ptbk_service import ptbk_key_service
+        from src.engine.crypto.cipher_generator import cipher_text_generator
+        from src.engine.crypto.cipher_prefetcher import cipher_prefetcher
+        from src.utils.rate_limiter import cookie_rate_limiter
+        from src.services.response_cache import get_response_cache
+
+        return {
+            'ptbk_cache': ptbk_key_service.get_stats(),
+            'cipher_text': dict(cipher_text_generator.get_stats(), prefetch=cipher_prefetcher.get_stats()),
+            'rate_limiter': cookie_rate_limiter.get_stats(),
+            'response_cache': get_response_cache().get_stats()
+        }
+
 # Global Instance
 statistics_service = StatisticsService()
@@ -0,0 +1,132 @@
+"""
+爬虫统计写回聚合器
+爬虫热路径只在内存中累加 (stat_date, task_type) 维度的增量，
+后台线程按固定间隔（以及进程退出时）批量写入 spider_statistics，
+写入使用 INSERT ... ON DUPLICATE KEY UPDATE 原子递增，避免多任务在同一行上串行。
+"""
+import atexit
+import threading
+from datetime import date
+from typing import Dict, Tuple, List, Optional
+
+from src.core.logger import log
+
+# 可累加的计数字段
+COUNTER_FIELDS = (
+    'total_tasks', 'completed_tasks', 'failed_tasks', 'total_crawled_items',
+    'cookie_usage', 'cookie_ban_count', 'duration_sum',
+)
+
+
+class SpiderStatsAggregator:
+    """按 (stat_date, task_type) 聚合统计增量，定时批量刷写"""
+
+    def __init__(self, flush_interval: Optional[float] = None, repository=None):
+        self.flush_interval = flush_interval
+        self._repository = repository
+        self._pending: Dict[Tuple[date, str], Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.flush_count = 0
+        atexit.register(self.stop)
+
+    @property
+    def repository(self):
+        if self._repository is None:
+            from src.data.repositories.statistics_repository import statistics_repo
+            self._repository = statistics_repo
+        return self._repository
+
+    def _get_interval(self) -> float:
+        if self.flush_interval is None:
+            try:
+                from src.services.config_service import config_manager
+                self.flush_interval = float(config_manager.get('statistics.flush_interval', 5))
+            except Exception:
+                self.flush_interval = 5.0
+        return self.flush_interval
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stop_event.clear()
+                    self._thread = threading.Thread(target=self._run, name='stats-aggregator', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self._get_interval()):
+            self.flush()
+
+    def add(self, task_type: str, stat_date: Optional[date] = None, **deltas):
+        """累加增量（仅内存操作，不访问数据库）"""
+        key = (stat_date or date.today(), task_type)
+        with self._lock:
+            bucket = self._pending.setdefault(key, dict.fromkeys(COUNTER_FIELDS, 0))
+            for field, value in deltas.items():
+                if value:
+                    bucket[field] += value
+        self._ensure_started()
+
+    def increment_crawled_count(self, task_type: str, count: int):
+        """递增当日抓取数量"""
+        if count > 0:
+            self.add(task_type, total_crawled_items=count)
+
+    def record_task_summary(self, task_type: str, total_delta: int = 0, completed_delta: int = 0,
+                            failed_delta: int = 0, duration: float = 0, cookie_usage: int = 0,
+                            cookie_ban_count: int = 0):
+        """记录任务结束时的汇总（参数与 update_spider_summary 一致）"""
+        self.add(
+            task_type,
+            total_tasks=total_delta,
+            completed_tasks=completed_delta,
+            failed_tasks=failed_delta,
+            duration_sum=completed_delta * duration if completed_delta > 0 and duration > 0 else 0,
+            cookie_usage=cookie_usage,
+            cookie_ban_count=cookie_ban_count,
+        )
+
+    def _drain(self) -> List[Dict]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return [dict(bucket, stat_date=stat_date, task_type=task_type)
+                for (stat_date, task_type), bucket in pending.items()]
+
+    def _restore(self, rows: List[Dict]):
+        """写入失败时将增量放回，等待下次刷写"""
+        with self._lock:
+            for row in rows:
+                bucket = self._pending.setdefault((row['stat_date'], row['task_type']),
+                                                  dict.fromkeys(COUNTER_FIELDS, 0))
+                for field in COUNTER_FIELDS:
+                    bucket[field] += row.get(field, 0)
+
+    def flush(self) -> int:
+        """立即写入所有累积的增量，返回写入的行数"""
+        with self._flush_lock:
+            rows = self._drain()
+            if not rows:
+                return 0
+            try:
+                self.repository.apply_spider_statistics_deltas(rows)
+                self.flush_count += 1
+                return len(rows)
+            except Exception as e:
+                log.error(f"统计增量写入失败，将在下次重试: {e}")
+                self._restore(rows)
+                return 0
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stop(self):
+        """停止后台线程并写入剩余增量"""
+        self._stop_event.set()
+        self.flush()
+
+
+stats_aggregator = SpiderStatsAggregator()
@@ -6,6 +6,8 @@ import os
 import pickle
 import sqlite3
 from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, Iterator, Optional
 from src.core.logger import log
 
 # 支持的输出格式及其文件扩展名
@@ -18,6 +20,12 @@ SUPPORTED_FORMATS = {
     'sql':     '.sqlite',
 }
 
+# 格式转换时每块读取的 CSV 行数
+DEFAULT_CHUNK_SIZE = 100000
+
+# Excel 单个工作表的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+
 class StorageService:
     """数据存储服务"""
     
@@ -127,13 +135,17 @@ class StorageService:
 
     # --- 格式转换 (Format Conversion) ---
 
-    def convert_csv_to_format(self, csv_path: str, target_format: str, table_name: str = 'data') -> str:
+    def convert_csv_to_format(self, csv_path: str, target_format: str, table_name: str = 'data',
+                              chunk_size: Optional[int] = None) -> str:
         """
         将 CSV 文件转换为指定格式。
+        除 dta 外均按块读取 CSV 并增量写出，峰值内存只与 chunk_size 相关；
+        先写入临时文件，成功后再替换为目标文件。
         
         :param csv_path: 源 CSV 文件路径
         :param target_format: 目标格式 ('excel', 'dta', 'json', 'parquet', 'sql')
         :param table_name: SQL 格式时的表名
+        :param chunk_size: 每块行数，默认读取配置 output.convert_chunk_size
         :return: 转换后的文件路径，失败返回原始 csv_path
         """
         if target_format == 'csv' or target_format not in SUPPORTED_FORMATS:
@@ -143,31 +155,38 @@ class StorageService:
             log.warning(f"CSV 文件不存在，跳过转换: {csv_path}")
             return csv_path
         
+        # 构建输出路径（替换扩展名）
+        base_path = os.path.splitext(csv_path)[0]
+        output_path = base_path + SUPPORTED_FORMATS[target_format]
+        tmp_path = output_path + '.tmp'
+        
         try:
-            df = pd.read_csv(csv_path, encoding='utf-8-sig')
-            if df.empty:
+            chunk_size = chunk_size or self._get_chunk_size()
+            # Parquet 各 row group 必须同一 schema：先扫描全文件确定列类型，避免按首块推断的类型与后续块冲突
+            dtype = self._scan_csv_dtypes(csv_path, chunk_size) if target_format == 'parquet' else None
+            chunks = self._iter_csv_chunks(csv_path, chunk_size, dtype=dtype)
+            first = next(chunks, None)
+            if first is None or first.empty:
                 log.warning(f"CSV 文件为空，跳过转换: {csv_path}")
                 return csv_path
-            
-            # 构建输出路径（替换扩展名）
-            base_path = os.path.splitext(csv_path)[0]
-            ext = SUPPORTED_FORMATS[target_format]
-            output_path = base_path + ext
+            chunks = chain([first], chunks)
             
             # 根据格式调用对应方法
             success = False
             if target_format == 'excel':
-                success = self._convert_to_excel(df, output_path)
+                success = self._stream_to_excel(chunks, tmp_path)
             elif target_format == 'dta':
-                success = self._convert_to_dta(df, output_path)
+                # Stata 写入器需要完整数据，只能整体转换
+                success = self._convert_to_dta(pd.concat(chunks, ignore_index=True), tmp_path)
             elif target_format == 'json':
-                success = self._convert_to_json(df, output_path)
+                success = self._stream_to_json(chunks, tmp_path)
             elif target_format == 'parquet':
-                success = self._convert_to_parquet(df, output_path)
+                success = self._stream_to_parquet(chunks, tmp_path)
             elif target_format == 'sql':
-                success = self._convert_to_sql(df, output_path, table_name)
+                success = self._stream_to_sql(chunks, tmp_path, table_name)
             
             if success:
+                os.replace(tmp_path, output_path)
                 log.info(f"文件已转换: {csv_path} → {output_path}")
                 return output_path
             else:
@@ -176,16 +195,132 @@ class StorageService:
         except Exception as e:
             log.error(f"格式转换失败 ({target_format}): {e}")
             return csv_path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _get_chunk_size() -> int:
+        try:
+            from src.services.config_service import config_manager
+            return max(1000, config_manager.get_int('output.convert_chunk_size', DEFAULT_CHUNK_SIZE))
+        except Exception:
+            return DEFAULT_CHUNK_SIZE
 
-    def _convert_to_excel(self, df: pd.DataFrame, output_path: str) -> bool:
-        """转换为 Excel (.xlsx)"""
+    @staticmethod
+    def _iter_csv_chunks(csv_path: str, chunk_size: int, dtype: Optional[Dict[str, str]] = None) -> Iterator[pd.DataFrame]:
+        """按块读取 CSV"""
+        with pd.read_csv(csv_path, encoding='utf-8-sig', chunksize=chunk_size, dtype=dtype) as reader:
+            for chunk in reader:
+                yield chunk
+
+    @classmethod
+    def _scan_csv_dtypes(cls, csv_path: str, chunk_size: int) -> Dict[str, str]:
+        """
+        按全部数据块确定需要固定类型的列：
+        任一块中非数值的列读为 str（如前几块全是数字代码、后面出现文本的关键词列），
+        任一块中为浮点的数值列读为 float64（整数列在某块出现空值时会被推断为浮点）
+        """
+        text_columns, float_columns = set(), set()
+        for chunk in cls._iter_csv_chunks(csv_path, chunk_size):
+            for name, column in chunk.items():
+                if column.isna().all():
+                    continue
+                if not pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+                    text_columns.add(name)
+                elif pd.api.types.is_float_dtype(column):
+                    float_columns.add(name)
+        dtype = {name: 'float64' for name in float_columns - text_columns}
+        dtype.update({name: 'str' for name in text_columns})
+        return dtype
+
+    def _stream_to_excel(self, chunks: Iterable[pd.DataFrame], output_path: str) -> bool:
+        """openpyxl 只写模式逐行写出，超过单表行数上限时自动新建工作表"""
         try:
-            df.to_excel(output_path, index=False, engine='openpyxl')
+            from openpyxl import Workbook
+            wb = Workbook(write_only=True)
+            ws = None
+            sheet_rows = 0
+            sheet_index = 0
+            for chunk in chunks:
+                header = [str(c) for c in chunk.columns]
+                # NaN/NA 写为空单元格，numpy 标量转换为 Python 原生类型
+                values = chunk.astype(object).where(chunk.notna(), None).values.tolist()
+                for row in values:
+                    if ws is None or sheet_rows >= EXCEL_MAX_ROWS:
+                        sheet_index += 1
+                        ws = wb.create_sheet(title='Sheet1' if sheet_index == 1 else f'Sheet{sheet_index}')
+                        ws.append(header)
+                        sheet_rows = 1
+                    ws.append(row)
+                    sheet_rows += 1
+            wb.save(output_path)
+            if sheet_index > 1:
+                log.info(f"数据超过 Excel 单表上限，已拆分为 {sheet_index} 个工作表")
             return True
         except Exception as e:
             log.error(f"转换 Excel 失败: {e}")
             return False
 
+    def _stream_to_json(self, chunks: Iterable[pd.DataFrame], output_path: str) -> bool:
+        """流式写出 JSON 数组（每条记录一行）"""
+        try:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write('[')
+                first = True
+                for chunk in chunks:
+                    lines = chunk.to_json(orient='records', force_ascii=False, lines=True).strip()
+                    if not lines:
+                        continue
+                    f.write('\n' if first else ',\n')
+                    f.write(lines.replace('\n', ',\n'))
+                    first = False
+                f.write('\n]\n')
+            return True
+        except Exception as e:
+            log.error(f"转换 JSON 失败: {e}")
+            return False
+
+    def _stream_to_parquet(self, chunks: Iterable[pd.DataFrame], output_path: str) -> bool:
+        """每块写一个 row group；列类型由 _scan_csv_dtypes 扫描全文件确定，各块按同一 schema 写出"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            writer = None
+            try:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        schema = table.schema.remove_metadata()
+                        writer = pq.ParquetWriter(output_path, schema)
+                    else:
+                        table = table.cast(writer.schema)
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+            return True
+        except Exception as e:
+            log.error(f"转换 Parquet 失败: {e}")
+            return False
+
+    def _stream_to_sql(self, chunks: Iterable[pd.DataFrame], output_path: str, table_name: str = 'data') -> bool:
+        """每块一次事务写入 SQLite"""
+        try:
+            conn = sqlite3.connect(output_path)
+            try:
+                if_exists = 'replace'
+                for chunk in chunks:
+                    with conn:
+                        chunk.to_sql(table_name, conn, if_exists=if_exists, index=False)
+                    if_exists = 'append'
+            finally:
+                conn.close()
+            return True
+        except Exception as e:
+            log.error(f"转换 SQLite 失败: {e}")
+            return False
+
     def _convert_to_dta(self, df: pd.DataFrame, output_path: str) -> bool:
         """转换为 Stata (.dta)"""
         try:
@@ -208,35 +343,6 @@ class StorageService:
             log.error(f"转换 DTA 失败: {e}")
             return False
 
-    def _convert_to_json(self, df: pd.DataFrame, output_path: str) -> bool:
-        """转换为 JSON (.json)"""
-        try:
-            df.to_json(output_path, orient='records', force_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            log.error(f"转换 JSON 失败: {e}")
-            return False
-
-    def _convert_to_parquet(self, df: pd.DataFrame, output_path: str) -> bool:
-        """转换为 Parquet (.parquet)"""
-        try:
-            df.to_parquet(output_path, index=False, engine='pyarrow')
-            return True
-        except Exception as e:
-            log.error(f"转换 Parquet 失败: {e}")
-            return False
-
-    def _convert_to_sql(self, df: pd.DataFrame, output_path: str, table_name: str = 'data') -> bool:
-        """转换为 SQLite 数据库 (.sqlite)"""
-        try:
-            conn = sqlite3.connect(output_path)
-            df.to_sql(table_name, conn, if_exists='replace', index=False)
-            conn.close()
-            return True
-        except Exception as e:
-            log.error(f"转换 SQLite 失败: {e}")
-            return False
-
 
 # 全局单例
 storage_service = StorageService()
@@ -206,6 +206,10 @@ class TaskService:
         if parameters.get('output_name'):
             spider_params['output_name'] = parameters['output_name']
 
+        # 爬取模式：replay 只从响应缓存重建输出
+        if parameters.get('crawl_mode') in ('online', 'replay'):
+            spider_params['crawl_mode'] = parameters['crawl_mode']
+
     def _process_year_range(self, spider_params: Dict[str, Any], parameters: Dict[str, Any], keys: List[str] = ['year_range']):
         """处理年份范围参数"""
         year_range = None
@@ -3,11 +3,23 @@
 """
 import time
 import functools
+import threading
 import traceback
 import os
 from src.core.logger import log
 from src.core.config import SPIDER_CONFIG
-from src.utils.rate_limiter import rate_limiter
+
+# 线程级重试模式：爬虫线程池的工作线程启用后，失败立即抛出，由调度线程延迟重新提交
+_retry_context = threading.local()
+
+
+def enable_deferred_retries():
+    """在当前线程禁用装饰器内的休眠重试（用作线程池 initializer）"""
+    _retry_context.deferred = True
+
+
+def deferred_retries_enabled() -> bool:
+    return getattr(_retry_context, 'deferred', False)
 
 def retry(max_retries=None, delay=None, backoff=None, exceptions=(Exception,)):
     """
@@ -34,17 +46,16 @@ def retry(max_retries=None, delay=None, backoff=None, exceptions=(Exception,)):
             
             while True:
                 try:
-                    result = func(*args, **kwargs)
-                    
-                    # 如果成功，报告成功并返回结果
-                    rate_limiter.report_success()
-                    return result
+                    # 限速与失败退避由调用方按 Cookie 账号的令牌桶处理（cookie_rate_limiter）
+                    return func(*args, **kwargs)
                     
                 except exceptions as e:
                     retries += 1
                     
-                    # 报告失败
-                    rate_limiter.report_failure()
+                    if deferred_retries_enabled():
+                        # 延迟重试模式：不占用工作线程等待，交给 RetryScheduler
+                        log.warning(f"函数 {func.__name__} 调用失败，交由延迟重试队列: {str(e)}")
+                        raise
                     
                     if retries > max_retries:
                         log.error(f"函数 {func.__name__} 达到最大重试次数 {max_retries}，放弃重试")
@@ -61,6 +72,8 @@ def retry(max_retries=None, delay=None, backoff=None, exceptions=(Exception,)):
                     # 增加延迟时间
                     current_delay *= backoff
         
+        # 延迟重试模式下由 RetryScheduler 按同一预算退避（见 BaseCrawler.retry_budget_method）
+        wrapper.retry_budget = (max_retries, delay, backoff)
         return wrapper
     
     return decorator
@@ -61,19 +61,16 @@ class RateLimiter:
                 wait_time = random.uniform(self.min_interval, self.max_interval)
             
             # 如果已经等待了足够长的时间，不需要额外等待
-            if elapsed >= wait_time:
-                actual_wait = 0
-            else:
-                actual_wait = wait_time - elapsed
-                time.sleep(actual_wait)
-            
-            # 更新上次请求时间
-            self.last_request_time = time.time()
-            
-            if actual_wait > 0:
-                log.debug(f"请求频率限制: 等待 {actual_wait:.2f} 秒")
+            actual_wait = max(0, wait_time - elapsed)
             
-            return actual_wait
+            # 预约请求时间，休眠在锁外进行，其他线程据此继续排队
+            self.last_request_time = current_time + actual_wait
+        
+        if actual_wait > 0:
+            log.debug(f"请求频率限制: 等待 {actual_wait:.2f} 秒")
+            time.sleep(actual_wait)
+        
+        return actual_wait
     
     def report_success(self):
         """报告请求成功，重置连续失败计数"""
@@ -83,16 +80,10 @@ class RateLimiter:
                 log.debug("请求成功，重置连续失败计数")
     
     def report_failure(self):
-        """报告请求失败，增加连续失败计数"""
+        """报告请求失败，增加连续失败计数（下一次 wait 按倍数放大间隔，不阻塞当前线程）"""
         with self.lock:
             self.consecutive_failures += 1
             log.warning(f"请求失败，连续失败次数: {self.consecutive_failures}")
-            
-            # 如果连续失败次数过多，增加等待时间
-            if self.consecutive_failures >= self.max_consecutive_failures:
-                backoff_time = self.default_interval * (self.failure_multiplier ** self.consecutive_failures)
-                log.warning(f"连续失败次数过多，增加等待时间: {backoff_time:.2f} 秒")
-                time.sleep(backoff_time)
     
     def reset(self):
         """重置限制器状态"""
@@ -102,5 +93,212 @@ class RateLimiter:
             log.debug("请求频率限制器已重置")
 
 
+class TokenBucket:
+    """
+    单个令牌桶
+    令牌按平均请求间隔匀速补充，预约时只计算需要等待的时间，不在锁内休眠
+    """
+
+    def __init__(self, min_interval, max_interval, capacity=1, failure_multiplier=1.2,
+                 max_consecutive_failures=3, default_interval=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.capacity = max(1, capacity)
+        self.failure_multiplier = failure_multiplier
+        self.max_consecutive_failures = max_consecutive_failures
+        self.default_interval = default_interval or min_interval
+
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        self.penalty_until = 0.0
+        self.consecutive_failures = 0
+        self.lock = threading.Lock()
+
+        # 等待统计
+        self.request_count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _backoff_factor(self):
+        """连续失败时的间隔放大倍数"""
+        if self.consecutive_failures <= 0:
+            return 1.0
+        return self.failure_multiplier ** min(self.consecutive_failures, self.max_consecutive_failures)
+
+    def reserve(self, pace=1.0):
+        """
+        预约一个令牌
+        参数:
+            pace (float): 请求间隔倍数，由调用方任务的自适应并发控制器给出（1.0 即配置的间隔）
+        返回:
+            float: 调用方需要等待的时间（秒）
+        """
+        with self.lock:
+            now = time.monotonic()
+            interval = random.uniform(self.min_interval, self.max_interval) * self._backoff_factor() * pace
+
+            # 按间隔补充令牌
+            elapsed = now - self.last_refill
+            self.tokens = min(float(self.capacity), self.tokens + elapsed / interval)
+            self.last_refill = now
+
+            # 令牌可以为负，表示已被预约的排队时间
+            self.tokens -= 1
+            wait_time = 0.0 if self.tokens >= 0 else -self.tokens * interval
+            if self.penalty_until > now:
+                wait_time = max(wait_time, self.penalty_until - now)
+
+            self._record_wait(wait_time)
+            return wait_time
+
+    def _record_wait(self, wait_time):
+        self.request_count += 1
+        self.total_wait += wait_time
+        self.max_wait = max(self.max_wait, wait_time)
+
+    def record_wait(self, wait_time):
+        """记录外部（分布式）限速产生的等待时间"""
+        with self.lock:
+            self._record_wait(wait_time)
+
+    def report_success(self):
+        with self.lock:
+            self.consecutive_failures = 0
+
+    def report_failure(self):
+        """增加连续失败计数，超过阈值时推迟下一次可用时间（不阻塞当前线程）"""
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.max_consecutive_failures:
+                backoff_time = self.default_interval * (self.failure_multiplier ** self.consecutive_failures)
+                self.penalty_until = max(self.penalty_until, time.monotonic() + backoff_time)
+                return backoff_time
+            return 0.0
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'requests': self.request_count,
+                'total_wait': round(self.total_wait, 3),
+                'avg_wait': round(self.total_wait / self.request_count, 3) if self.request_count else 0,
+                'max_wait': round(self.max_wait, 3),
+                'consecutive_failures': self.consecutive_failures,
+                'backoff_factor': round(self._backoff_factor(), 3),
+            }
+
+
+class CookieRateLimiter:
+    """
+    按 Cookie 账号划分的令牌桶限速器
+    每个账号（可选再按接口细分）一个令牌桶，总吞吐量随 Cookie 池规模线性增长
+    """
+
+    def __init__(self, min_interval=None, max_interval=None, default_interval=None,
+                 capacity=None, per_endpoint=None):
+        self.min_interval = min_interval or SPIDER_CONFIG.get('min_interval', 0.8)
+        self.max_interval = max_interval or SPIDER_CONFIG.get('max_interval', 1)
+        self.default_interval = default_interval or SPIDER_CONFIG.get('default_interval', 0.8)
+        self.capacity = capacity or SPIDER_CONFIG.get('bucket_capacity', 1)
+        self.per_endpoint = per_endpoint if per_endpoint is not None else SPIDER_CONFIG.get('rate_limit_per_endpoint', False)
+        self.max_consecutive_failures = SPIDER_CONFIG.get('max_consecutive_failures', 3)
+        self.failure_multiplier = SPIDER_CONFIG.get('failure_multiplier', 1.2)
+
+        self.buckets = {}
+        self.lock = threading.Lock()
+        # 集群模式下由 Redis 中的令牌桶限速，本地桶只记录统计
+        self.distributed = None
+
+    def enable_distributed(self, coordinator):
+        """启用分布式限速（集群模式）"""
+        self.distributed = coordinator
+        log.info("Cookie限速器已切换为 Redis 分布式令牌桶")
+
+    def _bucket_key(self, account_id, endpoint=None):
+        if self.per_endpoint and endpoint:
+            return f"{account_id}:{endpoint}"
+        return str(account_id)
+
+    def get_bucket(self, account_id, endpoint=None):
+        """获取（或创建）账号对应的令牌桶"""
+        key = self._bucket_key(account_id, endpoint)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            with self.lock:
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    bucket = TokenBucket(
+                        self.min_interval, self.max_interval,
+                        capacity=self.capacity,
+                        failure_multiplier=self.failure_multiplier,
+                        max_consecutive_failures=self.max_consecutive_failures,
+                        default_interval=self.default_interval
+                    )
+                    self.buckets[key] = bucket
+        return bucket
+
+    def wait(self, account_id, endpoint=None, pace=1.0):
+        """
+        等待账号令牌桶放行，休眠发生在锁外
+        pace 为请求间隔倍数，只作用于本次预约，各任务的自适应节奏互不影响
+        
+        返回:
+            float: 实际等待的时间（秒）
+        """
+        bucket = self.get_bucket(account_id, endpoint)
+        if self.distributed is not None:
+            try:
+                wait_time = self.distributed.reserve_slot(
+                    self._bucket_key(account_id, endpoint),
+                    random.uniform(self.min_interval, self.max_interval) * pace,
+                    capacity=self.capacity,
+                    max_consecutive_failures=self.max_consecutive_failures,
+                    failure_multiplier=self.failure_multiplier
+                )
+                bucket.record_wait(wait_time)
+            except Exception as e:
+                log.error(f"分布式限速失败，回退为本地令牌桶: {e}")
+                wait_time = bucket.reserve(pace)
+        else:
+            wait_time = bucket.reserve(pace)
+        if wait_time > 0:
+            log.debug(f"账号 {account_id} 请求频率限制: 等待 {wait_time:.2f} 秒")
+            time.sleep(wait_time)
+        return wait_time
+
+    def report_success(self, account_id, endpoint=None):
+        self.get_bucket(account_id, endpoint).report_success()
+        if self.distributed is not None:
+            try:
+                self.distributed.report_success(self._bucket_key(account_id, endpoint))
+            except Exception as e:
+                log.error(f"分布式限速状态更新失败: {e}")
+
+    def report_failure(self, account_id, endpoint=None):
+        backoff_time = self.get_bucket(account_id, endpoint).report_failure()
+        if self.distributed is not None:
+            try:
+                backoff_time = self.distributed.report_failure(
+                    self._bucket_key(account_id, endpoint),
+                    self.default_interval,
+                    max_consecutive_failures=self.max_consecutive_failures,
+                    failure_multiplier=self.failure_multiplier
+                )
+            except Exception as e:
+                log.error(f"分布式限速状态更新失败: {e}")
+        if backoff_time > 0:
+            log.warning(f"账号 {account_id} 连续失败次数过多，推迟 {backoff_time:.2f} 秒后再请求")
+
+    def get_stats(self):
+        """各令牌桶的等待统计"""
+        with self.lock:
+            buckets = dict(self.buckets)
+        return {key: bucket.get_stats() for key, bucket in buckets.items()}
+
+    def reset(self):
+        with self.lock:
+            self.buckets.clear()
+
+
 # 创建全局实例
 rate_limiter = RateLimiter()
+cookie_rate_limiter = CookieRateLimiter()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from src.services.async_writer import AsyncBatchWriter
+from src.engine.spider.base_crawler import BaseCrawler
+
+
+class TestAsyncBatchWriter(unittest.TestCase):
+    def test_merges_queued_batches_and_drains(self):
+        gate = threading.Event()
+        calls = []
+
+        def handler(items):
+            gate.wait(2)
+            calls.append(list(items))
+
+        writer = AsyncBatchWriter(handler, max_pending=10)
+        for i in range(5):
+            writer.submit(i)
+        gate.set()
+        writer.drain()
+        self.assertEqual(sorted(i for batch in calls for i in batch), [0, 1, 2, 3, 4])
+        self.assertLess(len(calls), 5)
+        writer.stop()
+
+    def test_backpressure_when_queue_full(self):
+        gate = threading.Event()
+        writer = AsyncBatchWriter(lambda items: gate.wait(2), max_pending=1, max_merge=1)
+        writer.submit('a')  # 被写入线程取走后阻塞在 handler 中
+        time.sleep(0.05)
+        writer.submit('b')  # 占满队列
+        blocked = threading.Event()
+        done = threading.Event()
+
+        def producer():
+            blocked.set()
+            writer.submit('c')
+            done.set()
+
+        threading.Thread(target=producer, daemon=True).start()
+        blocked.wait(1)
+        self.assertFalse(done.wait(0.1))
+        gate.set()
+        self.assertTrue(done.wait(2))
+        writer.drain()
+        writer.stop()
+
+    def test_handler_errors_do_not_stop_writer(self):
+        seen = []
+
+        def handler(items):
+            seen.extend(items)
+            if 'bad' in items:
+                raise RuntimeError('disk full')
+
+        writer = AsyncBatchWriter(handler, max_merge=1)
+        writer.submit('bad')
+        writer.submit('ok')
+        writer.drain()
+        self.assertEqual(seen, ['bad', 'ok'])
+        writer.stop()
+
+
+class TestCrawlerAsyncFlush(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.crawler = BaseCrawler(task_type='unit')
+        self.crawler.task_id = 't1'
+        self.crawler.output_path = self.tmp.name
+        self.crawler.output_format = 'csv'
+        self.crawler.async_writer = True
+        self.crawler._save_global_checkpoint = MagicMock()
+        self.crawler._update_spider_statistics = MagicMock()
+
+    def tearDown(self):
+        self.crawler._drain_writer()
+        self.tmp.cleanup()
+
+    def test_flush_enqueues_and_flush_all_drains(self):
+        persisted = threading.Event()
+        original = self.crawler._persist_batches
+
+        def slow_persist(batches):
+            time.sleep(0.2)
+            original(batches)
+            persisted.set()
+
+        self.crawler._get_writer().handler = slow_persist
+        self.crawler.data_cache = [{'a': 1}, {'a': 2}]
+        with patch('src.data.repositories.statistics_repository.statistics_repo'):
+            start = time.time()
+            self.crawler._flush_buffer(force=True)
+            self.assertLess(time.time() - start, 0.15)
+            self.assertEqual(self.crawler.data_cache, [])
+            self.crawler._flush_all()
+        self.assertTrue(persisted.is_set())
+        df = pd.read_csv(os.path.join(self.tmp.name, 'unit_t1_data.csv'), encoding='utf-8-sig')
+        self.assertEqual(df['a'].tolist(), [1, 2])
+        self.crawler._update_spider_statistics.assert_called_with(2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import threading
+import unittest
+
+from src.engine.spider.search_index_crawler import SearchIndexCrawler
+from src.services.batch_planner import KeywordBatchPlanner, search_batch_planner
+from src.services.completion_index import CompletionSet
+
+
+class TestKeywordBatchPlanner(unittest.TestCase):
+    def test_compound_keywords_isolated(self):
+        planner = KeywordBatchPlanner()
+        keywords = ['a', 'b', 'c+d', 'e', 'f', 'g', 'h']
+        self.assertEqual(planner.plan(keywords, 5), [['a', 'b', 'e', 'f', 'g'], 'h', 'c+d'])
+
+    def test_batch_size_one(self):
+        planner = KeywordBatchPlanner()
+        self.assertEqual(planner.plan(['a', 'b+c', 'd'], 1), ['a', 'd', 'b+c'])
+
+    def test_known_conflicts_avoided(self):
+        planner = KeywordBatchPlanner()
+        planner.record_conflict(['a', 'b'])
+        plan = planner.plan(['a', 'b', 'c', 'd'], 5)
+        self.assertEqual(plan, [['a', 'c', 'd'], 'b'])
+        self.assertFalse(any(isinstance(unit, list) and planner.is_conflicting(unit) for unit in plan))
+
+    def test_split_conflicting_batch(self):
+        planner = KeywordBatchPlanner()
+        planner.record_conflict(['a', 'b', 'c'])
+        self.assertTrue(planner.is_conflicting(['a', 'b', 'c', 'd']))
+        self.assertEqual(planner.split(['a', 'b', 'c', 'd']), [['a', 'b', 'd'], 'c'])
+
+    def test_concurrent_record_and_check(self):
+        planner = KeywordBatchPlanner()
+        errors = []
+
+        def record():
+            for i in range(2000):
+                planner.record_conflict([f'k{i}', f'k{i + 1}'])
+
+        def check():
+            try:
+                for _ in range(2000):
+                    planner.is_conflicting(['k1', 'k2', 'x'])
+            except RuntimeError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=record), threading.Thread(target=check)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+
+class TestSearchTaskPlanning(unittest.TestCase):
+    def setUp(self):
+        search_batch_planner.clear()
+        self.crawler = SearchIndexCrawler()
+        self.crawler.city_dict = {'0': '全国', '1': '北京'}
+        self.crawler.completed_keywords = CompletionSet()
+
+    def tearDown(self):
+        search_batch_planner.clear()
+
+    def test_compound_does_not_force_single_requests(self):
+        keywords = [f'k{i}' for i in range(10)] + ['x+y']
+        tasks = list(self.crawler._iter_tasks(keywords, [('2024-01-01', '2024-01-31')], 5))
+        # 2 个满批次 + 1 个联查，每个城市一次
+        self.assertEqual(len(tasks), 6)
+        self.assertEqual(sum(1 for t in tasks if t[0] == 'x+y'), 2)
+
+    def test_conflict_learned_mid_run_splits_later_batches(self):
+        keywords = ['a', 'b', 'c']
+        tasks = self.crawler._iter_tasks(keywords, [('2024-01-01', '2024-01-31')], 5)
+        first = next(tasks)
+        self.assertEqual(first[0], ['a', 'b', 'c'])
+        search_batch_planner.record_conflict(['a', 'b', 'c'])
+        self.assertEqual([t[0] for t in tasks], [['a', 'b'], 'c'])
+
+    def test_completed_units_skipped(self):
+        self.crawler.city_dict = {'0': '全国'}
+        self.crawler.completed_keywords.update(['a_0_2024-01-01_2024-01-31', 'b_0_2024-01-01_2024-01-31'])
+        tasks = list(self.crawler._iter_tasks(['a', 'b', 'c+d'], [('2024-01-01', '2024-01-31')], 5))
+        self.assertEqual([t[0] for t in tasks], ['c+d'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import shutil
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from src.core.config import CIPHER_TEXT_JS_PATH
+from src.engine.crypto.cipher_generator import CipherTextCache, CipherTextGenerator, NodeCipherPool
+
+URL = 'https://index.baidu.com/v2/main/index.html#/trend/test?words=test'
+
+@unittest.skipIf(shutil.which('node') is None, "需要 node")
+class TestNodeCipherPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = NodeCipherPool(CIPHER_TEXT_JS_PATH, size=2, node_path=shutil.which('node'))
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_concurrent_calls_reuse_workers(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda i: self.pool.call(f"{URL}{i}", 'UA'), range(8)))
+        self.assertTrue(all(r and r.startswith('1750651558786_') for r in results))
+        self.assertLessEqual(self.pool._created, 2)
+
+class TestCipherTextCache(unittest.TestCase):
+    def test_generate_uses_cache(self):
+        generator = CipherTextGenerator()
+        generator._configured = True
+        with patch.object(generator, '_generate_execjs', return_value='cipher') as mock_gen:
+            self.assertEqual(generator.generate(URL, 'UA'), 'cipher')
+            self.assertEqual(generator.generate(URL, 'UA'), 'cipher')
+            generator.generate(URL, 'other UA')
+        self.assertEqual(mock_gen.call_count, 2)
+
+    def test_ttl_disabled(self):
+        cache = CipherTextCache(ttl=0)
+        cache.put('k', 'v')
+        self.assertIsNone(cache.get('k'))
+
+if __name__ == '__main__':
+    unittest.main()
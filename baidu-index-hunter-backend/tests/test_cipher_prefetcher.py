@@ -0,0 +1,34 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+from src.engine.crypto.cipher_prefetcher import CipherTextPrefetcher, task_keyword
+from src.engine.crypto.cipher_generator import build_cipher_url
+
+class TestCipherTextPrefetcher(unittest.TestCase):
+    def test_wrap_prefetches_task_keywords(self):
+        generator = MagicMock()
+        generator.generate.return_value = 'cipher'
+        prefetcher = CipherTextPrefetcher(generator, lookahead=8, workers=2)
+        tasks = [(['kw1', 'kw2'], '0', '全国', 's', 'e'), ('kw3', '0', '全国', 's', 'e')]
+        self.assertEqual(list(prefetcher.wrap(tasks)), tasks)
+        prefetcher._queue.join()
+        urls = sorted(c[0][0] for c in generator.generate.call_args_list)
+        self.assertEqual(urls, sorted([build_cipher_url('kw1'), build_cipher_url('kw3')]))
+        self.assertEqual(prefetcher.produced, 2)
+
+    def test_full_queue_skips_without_blocking(self):
+        release = threading.Event()
+        generator = MagicMock()
+        generator.generate.side_effect = lambda url: release.wait(2)
+        prefetcher = CipherTextPrefetcher(generator, lookahead=1, workers=1)
+        results = [prefetcher.submit(f'kw{i}') for i in range(5)]
+        release.set()
+        self.assertTrue(results[0])
+        self.assertGreater(prefetcher.skipped, 0)
+
+    def test_task_keyword(self):
+        self.assertEqual(task_keyword((['a', 'b'], '0')), 'a')
+        self.assertEqual(task_keyword(('a', '0')), 'a')
+
+if __name__ == '__main__':
+    unittest.main()
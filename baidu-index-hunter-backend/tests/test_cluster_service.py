@@ -0,0 +1,40 @@
+import unittest
+from src.services.cluster_service import ClusterCoordinator
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+@unittest.skipIf(fakeredis is None, "需要 fakeredis[lua]")
+class TestClusterCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.node_a = ClusterCoordinator(self.redis, key_prefix='test:cluster', node_id='a')
+        self.node_b = ClusterCoordinator(self.redis, key_prefix='test:cluster', node_id='b')
+
+    def test_lease_is_exclusive_across_nodes(self):
+        self.assertEqual(self.node_a.try_acquire_lease(['acc1', 'acc2']), 'acc1')
+        self.assertEqual(self.node_b.try_acquire_lease(['acc1', 'acc2']), 'acc2')
+        self.assertIsNone(self.node_b.try_acquire_lease(['acc1', 'acc2']))
+
+        # 其他节点不能释放不属于自己的租约
+        self.assertFalse(self.node_b.release_lease('acc1'))
+        self.assertTrue(self.node_a.release_lease('acc1'))
+        self.assertEqual(self.node_b.acquire_lease(['acc1', 'acc2'], wait_timeout=0), 'acc1')
+
+    def test_rate_slots_are_shared(self):
+        self.assertEqual(self.node_a.reserve_slot('acc1', 1.0), 0)
+        wait = self.node_b.reserve_slot('acc1', 1.0)
+        self.assertGreater(wait, 0.9)
+        self.assertEqual(self.node_b.reserve_slot('acc2', 1.0), 0)
+
+    def test_failure_backoff(self):
+        self.assertEqual(self.node_a.report_failure('acc1', 1.0, max_consecutive_failures=2, failure_multiplier=2), 0)
+        self.assertEqual(self.node_b.report_failure('acc1', 1.0, max_consecutive_failures=2, failure_multiplier=2), 4.0)
+        self.assertGreater(self.node_a.reserve_slot('acc1', 0.1), 3.9)
+        self.node_a.report_success('acc1')
+        self.assertEqual(self.redis.hget('test:cluster:bucket:acc1', 'fails'), '0')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from src.services.completion_index import CompletionSet
+from src.services.progress_manager import ProgressManager
+
+class TestCompletionSet(unittest.TestCase):
+    def test_set_semantics(self):
+        keys = ["a_b_0_2024-01-01_2024-12-31", "kw_1_2024-01-01_2024-12-31", "kw_2024-01-01", "plain"]
+        items = CompletionSet(keys)
+        items.add(keys[0])
+        self.assertEqual(len(items), 4)
+        for key in keys:
+            self.assertIn(key, items)
+        self.assertNotIn("kw_2_2024-01-01_2024-12-31", items)
+        self.assertEqual(sorted(items), sorted(keys))
+        items.discard(keys[1])
+        self.assertNotIn(keys[1], items)
+        self.assertEqual(len(items), 3)
+
+    def test_payload_roundtrip(self):
+        keys = [f"kw{k}_{c}_2024-01-01_2024-12-31" for k in range(30) for c in range(50) if (k + c) % 3]
+        items = CompletionSet(keys)
+        restored = CompletionSet.from_payload(*items.to_payload())
+        self.assertEqual(len(restored), len(keys))
+        self.assertEqual(set(restored), set(keys))
+        self.assertEqual(len(CompletionSet.from_payload(*CompletionSet().to_payload())), 0)
+
+class TestProgressManagerIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'checkpoint.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_persist_and_resume(self):
+        pm = ProgressManager(self.db_path, 't1', batch_size=2)
+        pm.mark_failed(["k_0_s_e"])
+        pm.mark_completed(["k_0_s_e", "k_1_s_e"])
+        pm.save_checkpoint({'task_type': 'search_index', 'total_tasks': 4})
+        pm.close()
+
+        pm = ProgressManager(self.db_path, 't1')
+        data = pm.load_checkpoint()
+        self.assertEqual(set(data['completed_keywords']), {"k_0_s_e", "k_1_s_e"})
+        self.assertEqual(len(data['failed_keywords']), 0)
+        self.assertEqual(pm.get_stats()['db_completed'], 2)
+        pm.close()
+
+    def test_legacy_task_items_are_merged(self):
+        pm = ProgressManager(self.db_path, 't2')
+        pm.save_checkpoint({'task_type': 'search_index'})
+        pm.close()
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany("INSERT INTO task_items (task_id, task_key, status) VALUES ('t2', ?, ?)",
+                         [("old_0_s_e", 'completed'), ("old_1_s_e", 'failed')])
+        conn.commit()
+        conn.close()
+
+        pm = ProgressManager(self.db_path, 't2')
+        data = pm.load_checkpoint()
+        self.assertIn("old_0_s_e", data['completed_keywords'])
+        self.assertIn("old_1_s_e", data['failed_keywords'])
+        pm.flush()
+        rows = pm._conn.execute("SELECT COUNT(*) FROM task_items WHERE task_id = 't2'").fetchone()[0]
+        self.assertEqual(rows, 0)
+        pm.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.engine.spider.word_graph_crawler import WordGraphCrawler
+from src.services.concurrency_controller import (
+    AIMDController, OUTCOME_ERROR, OUTCOME_LOCKED, OUTCOME_SUCCESS, OUTCOME_THROTTLED, status_outcome
+)
+from src.utils.rate_limiter import CookieRateLimiter
+
+
+class TestStatusOutcome(unittest.TestCase):
+    def test_mapping(self):
+        self.assertEqual(status_outcome(0), OUTCOME_SUCCESS)
+        self.assertEqual(status_outcome(1), OUTCOME_SUCCESS)
+        self.assertEqual(status_outcome(10001), OUTCOME_LOCKED)
+        self.assertEqual(status_outcome(10002), OUTCOME_THROTTLED)
+        self.assertEqual(status_outcome(None, has_body=False), OUTCOME_THROTTLED)
+        self.assertEqual(status_outcome(10000), OUTCOME_ERROR)
+
+
+class TestAIMDController(unittest.TestCase):
+    def test_additive_increase_until_max(self):
+        paces = []
+        controller = AIMDController(initial_limit=2, max_limit=4, sample_size=5, on_pace_change=paces.append)
+        for _ in range(5):
+            controller.record(OUTCOME_SUCCESS, 0.1)
+        self.assertEqual(controller.window, 3)
+        self.assertAlmostEqual(paces[-1], 0.95)
+        for _ in range(20):
+            controller.record(OUTCOME_SUCCESS, 0.1)
+        self.assertEqual(controller.window, 4)
+
+    def test_lock_decreases_immediately_and_slows_pace(self):
+        paces = []
+        controller = AIMDController(initial_limit=8, sample_size=4, on_pace_change=paces.append)
+        controller.record(OUTCOME_LOCKED)
+        self.assertEqual(controller.window, 4)
+        self.assertAlmostEqual(paces[-1], 1.5)
+        # 同一窗口内的后续锁定不再立即减半，窗口结束时再减一次
+        controller.record(OUTCOME_LOCKED)
+        controller.record(OUTCOME_LOCKED)
+        controller.record(OUTCOME_SUCCESS, 0.1)
+        self.assertEqual(controller.window, 4)
+        controller.record(OUTCOME_SUCCESS, 0.1)
+        self.assertEqual(controller.window, 2)
+        self.assertAlmostEqual(controller.pace, 2.25)
+
+    def test_lock_burst_is_one_decrease(self):
+        controller = AIMDController(initial_limit=16, sample_size=20)
+        for _ in range(10):
+            controller.record(OUTCOME_LOCKED)
+        self.assertEqual(controller.window, 8)
+        self.assertAlmostEqual(controller.pace, 1.5)
+
+    def test_throttle_rate_and_latency_trigger_decrease(self):
+        controller = AIMDController(initial_limit=8, sample_size=10, throttle_threshold=0.05)
+        for _ in range(9):
+            controller.record(OUTCOME_SUCCESS, 0.1)
+        controller.record(OUTCOME_THROTTLED, 0.1)
+        self.assertEqual(controller.window, 4)
+
+        controller = AIMDController(initial_limit=8, sample_size=4, latency_target=1.0)
+        for _ in range(4):
+            controller.record(OUTCOME_SUCCESS, 3.0)
+        self.assertEqual(controller.window, 4)
+        self.assertEqual(controller.pace, 1.0)
+
+    def test_never_below_min(self):
+        controller = AIMDController(initial_limit=2, min_limit=2)
+        for _ in range(5):
+            controller.record(OUTCOME_LOCKED)
+        self.assertEqual(controller.window, 2)
+
+
+class TestPaceFactor(unittest.TestCase):
+    def test_pace_scales_bucket_interval(self):
+        limiter = CookieRateLimiter(min_interval=1, max_interval=1, capacity=1)
+        with patch('src.utils.rate_limiter.time.sleep'):
+            limiter.wait('a')
+            waited = limiter.wait('a', pace=3.0)
+        self.assertGreater(waited, 2.5)
+
+    def test_pace_is_scoped_to_crawler(self):
+        slow, fast = WordGraphCrawler(), WordGraphCrawler()
+        slow.concurrency_controller = AIMDController()
+        slow.concurrency_controller.record(OUTCOME_LOCKED)
+        with patch('src.engine.spider.base_crawler.cookie_rate_limiter') as limiter:
+            slow._wait_rate_limit('a')
+            fast._wait_rate_limit('a')
+        self.assertAlmostEqual(limiter.wait.call_args_list[0][1]['pace'], 1.5)
+        self.assertEqual(limiter.wait.call_args_list[1][1]['pace'], 1.0)
+
+
+class TestCrawlerIntegration(unittest.TestCase):
+    def test_aimd_window_drives_streaming(self):
+        crawler = WordGraphCrawler()
+        crawler.max_workers = 3
+        self.assertIsNone(crawler.concurrency_controller)
+        crawler.concurrency_controller = AIMDController(initial_limit=3, max_limit=12)
+        self.assertTrue(crawler.streaming_enabled)
+        self.assertEqual(crawler._get_stream_window(), 3)
+        self.assertEqual(crawler._pool_size(), 12)
+        crawler._record_response(OUTCOME_LOCKED)
+        self.assertEqual(crawler._get_stream_window(), 1)
+
+    def test_profile_crawler_reports_lock_status(self):
+        crawler = WordGraphCrawler()
+        crawler.concurrency_controller = MagicMock()
+        crawler.cookie_rotator = MagicMock()
+        crawler._get_cookie_dict = MagicMock(return_value=('acc', {'BDUSS': 'x'}))
+        crawler._wait_rate_limit = MagicMock()
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'status': 10001, 'message': 'request block'}
+        with patch('requests.get', return_value=response):
+            self.assertIsNone(crawler.get_word_graph('kw', '20230101'))
+        outcome = crawler.concurrency_controller.record.call_args[0][0]
+        self.assertEqual(outcome, OUTCOME_LOCKED)
+
+
+if __name__ == '__main__':
+    unittest.main()
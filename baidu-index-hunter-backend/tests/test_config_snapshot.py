@@ -0,0 +1,80 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.services.config_service import ConfigManager
+
+
+class TestConfigSnapshot(unittest.TestCase):
+    def setUp(self):
+        repo = MagicMock()
+        repo.get_all_as_dict.return_value = {
+            'spider.max_workers': '8',
+            'spider.min_interval': '1.5',
+            'spider.columnar_output': 'false',
+            'spider.engine': '"async"',
+            'spider.bad_int': '"abc"',
+        }
+        with patch('src.services.config_service.config_repo', repo):
+            self.manager = ConfigManager()
+        self.repo = repo
+        # 测试中不启动后台线程
+        self.manager._refresh_thread = MagicMock()
+        self.manager._publish_change = MagicMock()
+
+    def test_get_never_hits_database(self):
+        self.repo.get_all_as_dict.reset_mock()
+        self.manager.last_refresh_time = 0
+        self.assertEqual(self.manager.get('spider.max_workers'), 8)
+        self.assertEqual(self.manager.get('missing', 'x'), 'x')
+        self.repo.get_all_as_dict.assert_not_called()
+
+    def test_get_does_not_start_background_threads(self):
+        manager = ConfigManager.__new__(ConfigManager)
+        manager.__dict__.update(self.manager.__dict__)
+        manager._refresh_thread = None
+        with patch.object(ConfigManager, 'start_background_refresh') as start:
+            manager.get('spider.max_workers')
+            manager.get_int('spider.max_workers')
+        start.assert_not_called()
+
+    def test_typed_accessors(self):
+        self.assertEqual(self.manager.get_int('spider.max_workers', 5), 8)
+        self.assertEqual(self.manager.get_float('spider.min_interval', 1.0), 1.5)
+        self.assertFalse(self.manager.get_bool('spider.columnar_output', True))
+        self.assertEqual(self.manager.get_str('spider.engine', 'sync'), 'async')
+        self.assertEqual(self.manager.get_int('spider.bad_int', 3), 3)
+        self.assertTrue(self.manager.get_bool('missing', True))
+        # 解析结果按快照缓存
+        self.assertIn(('spider.max_workers', 'int'), self.manager._snapshot.parsed)
+
+    def test_snapshot_is_immutable_and_swapped_on_set(self):
+        old = self.manager._snapshot
+        with self.assertRaises(TypeError):
+            self.manager.config_cache['spider.max_workers'] = 1
+        self.assertTrue(self.manager.set('spider.max_workers', 12))
+        self.assertIsNot(self.manager._snapshot, old)
+        self.assertEqual(old.values['spider.max_workers'], 8)
+        self.assertEqual(self.manager.get_int('spider.max_workers'), 12)
+        self.manager._publish_change.assert_called_with('spider.max_workers')
+
+    def test_delete_and_refresh(self):
+        self.repo.delete_by_key.return_value = True
+        self.assertTrue(self.manager.delete('spider.engine'))
+        self.assertIsNone(self.manager.get('spider.engine'))
+        self.assertTrue(self.manager.refresh_cache())
+        self.assertEqual(self.manager.get('spider.engine'), 'async')
+
+    def test_change_notification_triggers_background_reload(self):
+        manager = self.manager
+        manager.cache_ttl = 60
+        manager.refresh_cache = MagicMock(side_effect=lambda: done.set())
+        done = threading.Event()
+        thread = threading.Thread(target=manager._refresh_loop, daemon=True)
+        thread.start()
+        manager._refresh_event.set()
+        self.assertTrue(done.wait(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
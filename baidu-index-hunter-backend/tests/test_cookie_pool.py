@@ -0,0 +1,61 @@
+import unittest
+
+from src.services.cookie_pool import IndexedCookiePool
+
+
+def _records(*pairs):
+    return [{'account_id': a, 'cookie': {}, 'use_count': c, 'last_use_time': t} for a, c, t in pairs]
+
+
+class TestIndexedCookiePool(unittest.TestCase):
+    def test_least_used_rotates_by_use_count(self):
+        pool = IndexedCookiePool(_records(('a', 2, 0), ('b', 0, 0), ('c', 1, 0)))
+        picked = []
+        for _ in range(6):
+            record = pool.select('least_used')
+            picked.append(record['account_id'])
+            pool.touch(record['account_id'], now=1)
+        self.assertEqual(picked[:3], ['b', 'c', 'b'])
+        self.assertEqual(sorted(r['use_count'] for r in pool.records()), [3, 3, 3])
+
+    def test_least_recently_used(self):
+        pool = IndexedCookiePool(_records(('a', 0, 30), ('b', 0, 10), ('c', 0, 20)))
+        order = []
+        for now in (100, 101, 102, 103):
+            record = pool.select('least_recently_used')
+            order.append(record['account_id'])
+            pool.touch(record['account_id'], now=now)
+        self.assertEqual(order, ['b', 'c', 'a', 'b'])
+
+    def test_removed_account_is_never_selected(self):
+        pool = IndexedCookiePool(_records(('a', 0, 0), ('b', 5, 0), ('c', 9, 0)))
+        self.assertTrue(pool.remove('a'))
+        self.assertFalse(pool.remove('a'))
+        self.assertEqual(pool.select('least_used')['account_id'], 'b')
+        self.assertNotIn('a', pool)
+        self.assertEqual(len(pool), 2)
+        pool.remove('b')
+        pool.remove('c')
+        self.assertIsNone(pool.select('least_used'))
+        self.assertIsNone(pool.select('round_robin'))
+
+    def test_round_robin_and_random(self):
+        pool = IndexedCookiePool(_records(('a', 0, 0), ('b', 0, 0), ('c', 0, 0)))
+        seen = [pool.select('round_robin')['account_id'] for _ in range(3)]
+        self.assertEqual(sorted(seen), ['a', 'b', 'c'])
+        pool.remove('b')
+        self.assertIn(pool.select('random')['account_id'], ('a', 'c'))
+
+    def test_stale_heap_entries_are_compacted(self):
+        pool = IndexedCookiePool(_records(('a', 0, 0), ('b', 0, 0)))
+        for _ in range(1000):
+            pool.touch(pool.select('least_used')['account_id'])
+        self.assertLessEqual(len(pool._heaps['least_used']), 2 * len(pool) + 64 + 1)
+
+    def test_ordered_candidates(self):
+        pool = IndexedCookiePool(_records(('a', 3, 0), ('b', 1, 0), ('c', 2, 0)))
+        self.assertEqual([r['account_id'] for r in pool.ordered('least_used', 2)], ['b', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
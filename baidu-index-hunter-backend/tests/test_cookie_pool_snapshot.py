@@ -0,0 +1,113 @@
+import json
+import time
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+from src.services.cookie_service import CookieManager
+from src.services.cookie_rotator import CookieRotator
+
+
+def _make_manager():
+    with patch('src.services.cookie_service.cookie_repo'), \
+         patch('src.services.cookie_service.redis.Redis'), \
+         patch('src.services.cookie_service.AbSrUpdater'):
+        manager = CookieManager()
+    manager.redis_client = fakeredis.FakeRedis(decode_responses=True)
+    return manager
+
+
+@unittest.skipIf(fakeredis is None, "需要 fakeredis")
+class TestCookiePoolSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.manager = _make_manager()
+        r = self.manager.redis_client
+        future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+        past = (datetime.now() - timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+        for acc in ('a', 'b', 'c', 'd'):
+            r.hset(CookieManager.REDIS_COOKIES_KEY, acc, json.dumps({'account_id': acc, 'cookie': {'BDUSS': acc}}))
+            r.hset(CookieManager.REDIS_COOKIE_STATUS_KEY, acc, json.dumps({'is_available': 1}))
+        r.hset(CookieManager.REDIS_COOKIE_STATUS_KEY, 'b', json.dumps({'is_available': 0}))
+        r.hset(CookieManager.REDIS_COOKIE_BAN_KEY, 'c', json.dumps({'temp_ban_until': future}))
+        r.hset(CookieManager.REDIS_COOKIE_BAN_KEY, 'd', json.dumps({'temp_ban_until': past}))
+        r.hset('usage:today', 'a', 3)
+
+    def test_snapshot_filters_and_attaches_usage(self):
+        records = self.manager.get_cookie_pool_snapshot('usage:today')
+        by_id = {r['account_id']: r for r in records}
+        self.assertEqual(set(by_id), {'a', 'd'})
+        self.assertEqual(by_id['a']['cookie'], {'BDUSS': 'a'})
+        self.assertEqual(by_id['a']['use_count'], 3)
+        self.assertEqual(by_id['d']['use_count'], 0)
+
+    def test_snapshot_uses_single_round_trip(self):
+        client = self.manager.redis_client
+        self.manager.redis_client = MagicMock(wraps=client)
+        self.manager.get_cookie_pool_snapshot('usage:today')
+        self.manager.redis_client.pipeline.assert_called_once()
+        self.manager.redis_client.hget.assert_not_called()
+
+    def test_snapshot_without_redis(self):
+        self.manager.redis_client = None
+        self.assertIsNone(self.manager.get_cookie_pool_snapshot())
+
+
+class TestCookieRotatorRefresh(unittest.TestCase):
+    def setUp(self):
+        with patch('src.services.cookie_rotator.CookieManager') as manager_cls, \
+             patch.object(CookieRotator, '_sync_usage_data'):
+            self.manager = manager_cls.return_value
+            self.manager.get_cookie_pool_snapshot.return_value = [
+                {'account_id': 'a', 'cookie': {'k': 'v'}, 'use_count': 0},
+            ]
+            self.rotator = CookieRotator()
+        self.rotator._record_cookie_usage = MagicMock()
+
+    def test_initial_load_is_synchronous(self):
+        self.assertEqual(len(self.rotator.cookie_list), 1)
+        self.assertEqual(self.rotator.get_available_cookie()['account_id'], 'a')
+
+    def test_stale_list_refreshes_in_background(self):
+        gate = threading.Event()
+
+        def slow_snapshot(usage_key=None):
+            gate.wait(2)
+            return [{'account_id': 'b', 'cookie': {}, 'use_count': 0}]
+
+        self.manager.get_cookie_pool_snapshot.side_effect = slow_snapshot
+        self.rotator.last_update_time = 0
+
+        start = time.time()
+        cookie = self.rotator.get_available_cookie()
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(cookie['account_id'], 'a')
+
+        gate.set()
+        for _ in range(100):
+            if self.rotator.cookie_list[0]['account_id'] == 'b':
+                break
+            time.sleep(0.02)
+        self.assertEqual(self.rotator.cookie_list[0]['account_id'], 'b')
+        self.assertFalse(self.rotator._refreshing)
+
+    def test_fresh_list_clears_refreshing_flag(self):
+        # 同步刷新已抢先完成时，后台刷新线程直接返回，也必须清除标志
+        self.rotator._refreshing = True
+        self.rotator._update_cookie_list()
+        self.assertFalse(self.rotator._refreshing)
+        self.manager.get_cookie_pool_snapshot.assert_called_once()
+
+    def test_failed_snapshot_keeps_current_list(self):
+        self.manager.get_cookie_pool_snapshot.return_value = None
+        self.rotator._update_cookie_list(force=True)
+        self.assertEqual(self.rotator.cookie_list[0]['account_id'], 'a')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,6 +21,11 @@ class TestSearchIndexCrawlerInterface(unittest.TestCase):
         self.mock_config = self.mock_config_patcher.start()
         self.mock_config.return_value = 5  # Mock max_workers
 
+        # 输出与检查点都写入临时目录，不污染真实 OUTPUT_DIR
+        self.test_dir = tempfile.mkdtemp()
+        self.output_dir_patcher = patch('src.engine.spider.base_crawler.OUTPUT_DIR', self.test_dir)
+        self.output_dir_patcher.start()
+
         self.crawler = SearchIndexCrawler()
         
         # Mock methods to allow crawl flow to proceed
@@ -40,6 +45,8 @@ class TestSearchIndexCrawlerInterface(unittest.TestCase):
     def tearDown(self):
         self.mock_config_patcher.stop()
         self.log_patcher.stop()
+        self.output_dir_patcher.stop()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
 
     def test_crawl_output_format(self):
         """Test the crawl method execution and verify CSV output format and content."""
@@ -74,9 +81,6 @@ class TestSearchIndexCrawlerInterface(unittest.TestCase):
         with patch('src.engine.processors.search_processor.SearchProcessor._get_key', return_value="dummy_key"), \
              patch('src.engine.processors.search_processor.SearchProcessor._decrypt', return_value=",".join(["100"] * 31)):
              
-            # 3. Setup temporary output directory
-            self.test_dir = tempfile.mkdtemp()
-            
             # Patch pandas.DataFrame to inspect what's being passed
             original_dataframe = pd.DataFrame
             def side_effect(data, **kwargs):
@@ -151,9 +155,6 @@ class TestSearchIndexCrawlerInterface(unittest.TestCase):
         # Verify data
         self.assertEqual(df.iloc[0]['关键词'], '手机')
         self.assertEqual(str(df.iloc[0]['PC+移动指数']), '100')
-        
-        # Cleanup
-        shutil.rmtree(self.test_dir)
 
 if __name__ == '__main__':
     unittest.main()
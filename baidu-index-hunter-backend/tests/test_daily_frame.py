@@ -0,0 +1,57 @@
+import unittest
+import pandas as pd
+from src.engine.processors.search_processor import SearchProcessor
+from src.engine.spider.base_crawler import BaseCrawler
+
+class TestDailyFrame(unittest.TestCase):
+    def setUp(self):
+        self.processor = SearchProcessor()
+
+    def _both(self, start_date, end_date, all_, wise, pc):
+        rows, _ = self.processor.process_search_index_daily_data(
+            {}, {}, "test", 0, "全国", start_date, end_date, all_, wise, pc
+        )
+        frame = self.processor.build_search_index_daily_frame(
+            "test", 0, "全国", start_date, end_date, all_, wise, pc
+        )
+        return pd.DataFrame(rows), frame
+
+    def test_matches_row_output_daily(self):
+        expected, frame = self._both("2024-01-01", "2024-01-05", "100,,3", "50,1,2", "")
+        self.assertEqual(list(frame.columns), list(expected.columns))
+        self.assertEqual(len(frame), 5)
+        cols = ['日期', '所属年份', '数据类型', '数据间隔(天)']
+        self.assertEqual(frame[cols].values.tolist(), expected[cols].values.tolist())
+        self.assertEqual(frame['PC+移动指数'].tolist(), [100, pd.NA, 3, 0, 0])
+        self.assertEqual(frame['PC指数'].tolist(), [0] * 5)
+        # 空值（无数据的日期）与行格式一样写出为空，而不是 0
+        for column in ('PC+移动指数', '移动指数', 'PC指数'):
+            self.assertEqual(frame[column].astype(object).where(frame[column].notna(), '').astype(str).tolist(),
+                             expected[column].astype(str).tolist())
+
+    def test_matches_row_output_weekly(self):
+        values = ",".join(["7"] * 60)
+        expected, frame = self._both("2024-01-01", "2025-01-02", values, values, values)
+        self.assertEqual(len(frame), len(expected))
+        self.assertEqual(frame['日期'].tolist(), expected['日期'].tolist())
+        self.assertEqual(frame['数据类型'].iloc[0], '周度')
+
+    def test_multi_columnar(self):
+        processor = SearchProcessor()
+        processor._get_key = lambda uniqid, cookie: "abcdefghij,0123456789,"
+        data = {'data': {'uniqid': 'u', 'userIndexes': [
+            {'all': {'data': 'bc,d'}, 'wise': {'data': 'b,b'}, 'pc': {'data': 'a,a'}},
+            {'all': {'data': 'b,b'}, 'wise': {'data': 'b,b'}, 'pc': {'data': 'a,a'}},
+        ], 'generalRatio': [{'all': {'avg': 1}}, {'all': {'avg': 2}}]}}
+        frame, stats = processor.process_multi_search_index_data(
+            data, {}, ['k1', 'k2'], 0, '全国', '2024-01-01', '2024-01-02', columnar=True)
+        self.assertEqual(len(frame), 4)
+        self.assertEqual(frame['PC+移动指数'].tolist(), [12, 3, 1, 1])
+        self.assertEqual([s['整体总值'] for s in stats], [2, 4])
+
+    def test_build_frame_mixes_rows_and_frames(self):
+        df = BaseCrawler._build_frame([{'a': 1}, pd.DataFrame({'a': [2, 3]})])
+        self.assertEqual(df['a'].tolist(), [1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.engine.spider.search_index_crawler import SearchIndexCrawler
+from src.services.date_planner import SEARCH_VALUE_FIELDS, plan_date_windows, split_window_results
+
+
+class TestPlanDateWindows(unittest.TestCase):
+    def test_months_merged_into_one_request(self):
+        months = [('2023-01-01', '2023-01-31'), ('2023-03-01', '2023-03-31'), ('2023-02-01', '2023-02-28')]
+        windows = plan_date_windows(months)
+        self.assertEqual(len(windows), 1)
+        self.assertEqual((windows[0].start, windows[0].end), ('2023-01-01', '2023-03-31'))
+        self.assertEqual(windows[0].parts, tuple(sorted(months)))
+
+    def test_window_never_exceeds_daily_limit(self):
+        years = [(f'{y}-01-01', f'{y}-12-31') for y in range(2019, 2023)]
+        windows = plan_date_windows(years + [('2020-06-01', '2020-06-30')])
+        self.assertEqual(len(windows), 4)
+        for window in windows:
+            days = (pd.Timestamp(window.end) - pd.Timestamp(window.start)).days + 1
+            self.assertLessEqual(days, 366)
+        self.assertIn(('2020-06-01', '2020-06-30'), windows[1].parts)
+
+    def test_long_and_invalid_ranges_kept_as_is(self):
+        windows = plan_date_windows([('2019-01-01', '2021-12-31'), ('bad', 'range'),
+                                     ('2023-01-01', '2023-01-31'), ('2023-01-01', '2023-01-31')])
+        self.assertEqual([(w.start, w.end) for w in windows],
+                         [('2019-01-01', '2021-12-31'), ('bad', 'range'), ('2023-01-01', '2023-01-31')])
+
+
+class TestSplitWindowResults(unittest.TestCase):
+    def setUp(self):
+        dates = pd.date_range('2023-01-01', '2023-01-10').strftime('%Y-%m-%d')
+        self.frame = pd.DataFrame({'关键词': 'kw', '日期': dates, 'PC+移动指数': range(1, 11),
+                                   '移动指数': 1, 'PC指数': 0})
+        self.stats = [{'关键词': 'kw', '时间范围': '2023-01-01 至 2023-01-10', '整体日均值': 5,
+                       '整体同比': 12, '整体环比': 3, '整体总值': 55}]
+
+    def test_split_frame_and_recompute_stats(self):
+        parts = (('2023-01-01', '2023-01-02'), ('2023-01-09', '2023-01-10'))
+        daily, stats = split_window_results(self.frame, self.stats, '2023-01-01', '2023-01-10',
+                                            parts, SEARCH_VALUE_FIELDS)
+        self.assertEqual(list(daily['日期']), ['2023-01-01', '2023-01-02', '2023-01-09', '2023-01-10'])
+        self.assertEqual([s['整体总值'] for s in stats], [3, 19])
+        self.assertEqual([s['移动总值'] for s in stats], [2, 2])
+        self.assertEqual(stats[1]['时间范围'], '2023-01-09 至 2023-01-10')
+        self.assertEqual(stats[0]['整体同比'], '-')
+        self.assertEqual(stats[0]['整体环比'], '-')
+
+    def test_split_record_list_keeps_type(self):
+        records = self.frame.to_dict('records')
+        daily, _ = split_window_results(records, self.stats, '2023-01-01', '2023-01-10',
+                                        (('2023-01-05', '2023-01-05'),), SEARCH_VALUE_FIELDS)
+        self.assertIsInstance(daily, list)
+        self.assertEqual(daily[0]['日期'], '2023-01-05')
+
+    def test_unmerged_window_untouched(self):
+        daily, stats = split_window_results(self.frame, self.stats, '2023-01-01', '2023-01-10',
+                                            (('2023-01-01', '2023-01-10'),), SEARCH_VALUE_FIELDS)
+        self.assertIs(daily, self.frame)
+        self.assertIs(stats, self.stats)
+
+
+class TestCrawlerWindows(unittest.TestCase):
+    def test_task_keys_cover_every_requested_range(self):
+        crawler = SearchIndexCrawler()
+        crawler.merge_date_ranges = True
+        windows = crawler._plan_date_windows([('2023-01-01', '2023-01-31'), ('2023-02-01', '2023-02-28')])
+        self.assertEqual(windows, [('2023-01-01', '2023-02-28')])
+        keys = crawler._task_keys((['a', 'b'], '0', '全国', '2023-01-01', '2023-02-28'))
+        self.assertEqual(keys, ['a_0_2023-01-01_2023-01-31', 'a_0_2023-02-01_2023-02-28',
+                                'b_0_2023-01-01_2023-01-31', 'b_0_2023-02-01_2023-02-28'])
+
+    def test_ranges_not_merged_by_default(self):
+        # 合并后的范围没有同比/环比，默认逐个范围请求
+        ranges = [('2023-01-01', '2023-01-31'), ('2023-02-01', '2023-02-28')]
+        with patch('src.services.config_service.config_manager.get_bool', side_effect=lambda key, default=False: default):
+            crawler = SearchIndexCrawler()
+        self.assertFalse(crawler.merge_date_ranges)
+        self.assertEqual(crawler._plan_date_windows(ranges), ranges)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import pandas as pd
+from src.engine.crypto.decrypt import decrypt, decrypt_series, parse_series, get_translation_table
+
+def reference_decrypt(key, data):
+    """原逐字符实现，用于对照"""
+    i = list(key)
+    a = {}
+    for A in range(len(i) // 2):
+        a[i[A]] = i[len(i) // 2 + A]
+    return ''.join(a.get(c, c) for c in data)
+
+class TestDecrypt(unittest.TestCase):
+    KEY = "abcdefghij,0123456789,"
+
+    def test_matches_reference(self):
+        data = "bcd,,jaa,e"
+        self.assertEqual(decrypt(self.KEY, data), reference_decrypt(self.KEY, data))
+        self.assertEqual(decrypt(self.KEY, data), "123,,900,4")
+
+    def test_empty_inputs(self):
+        self.assertEqual(decrypt("", "abc"), "")
+        self.assertEqual(decrypt(self.KEY, ""), "")
+
+    def test_table_is_cached(self):
+        self.assertIs(get_translation_table(self.KEY), get_translation_table(self.KEY))
+
+    def test_parse_series(self):
+        # 空值与非数字保留为缺失，不当作 0
+        self.assertEqual(parse_series("1,,30").tolist(), [1, pd.NA, 30])
+        self.assertEqual(len(parse_series("")), 0)
+        self.assertEqual(parse_series("7,x,2").tolist(), [7, pd.NA, 2])
+        self.assertEqual(str(parse_series("1,2").dtype), 'Int64')
+        # 带小数时不截断
+        self.assertEqual(parse_series("1.5,,2").tolist(), [1.5, pd.NA, 2.0])
+
+    def test_decrypt_series(self):
+        series = decrypt_series(self.KEY, "bcd,,jaa")
+        self.assertEqual(str(series.dtype), 'Int64')
+        self.assertEqual(series.tolist(), [123, pd.NA, 900])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from src.engine.core import http_engine
+from src.engine.core.http_engine import AsyncHttpEngine, SyncHttpEngine, _pool_key, get_http_engine
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(0.3)
+        body = b'{"status": 0}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPoolKey(unittest.TestCase):
+    def test_pool_key(self):
+        self.assertEqual(_pool_key('acc'), 'acc')
+        self.assertEqual(_pool_key(None, None), 'default')
+        self.assertEqual(_pool_key(None, {'BDUSS': 'x', 'a': 1}), _pool_key(None, {'BDUSS': 'x'}))
+        self.assertNotEqual(_pool_key(None, {'a': '1'}), _pool_key(None, {'a': '2'}))
+
+
+class TestSyncHttpEngine(unittest.TestCase):
+    def test_session_per_account(self):
+        engine = SyncHttpEngine()
+        self.assertIs(engine._get_session('a'), engine._get_session('a'))
+        self.assertIsNot(engine._get_session('a'), engine._get_session('b'))
+        engine.close()
+        self.assertEqual(engine.sessions, {})
+
+
+class TestGetHttpEngine(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.multiple(http_engine, _async_http_engine=None, _async_unavailable=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_missing_aiohttp_falls_back_once(self):
+        with patch.object(http_engine, 'AsyncHttpEngine', side_effect=ImportError) as engine_cls, \
+             patch.object(http_engine, 'log') as log:
+            self.assertIs(get_http_engine('async'), http_engine.sync_http_engine)
+            self.assertIs(get_http_engine('async'), http_engine.sync_http_engine)
+        engine_cls.assert_called_once()
+        log.error.assert_called_once()
+
+    def test_sync_by_name(self):
+        self.assertIs(get_http_engine('sync'), http_engine.sync_http_engine)
+
+
+class TestAsyncHttpEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}/'
+        cls.engine = AsyncHttpEngine(max_inflight=50)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_get(self):
+        response = self.engine.get(self.url, cookies={'BDUSS': 'x'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 0})
+
+    def test_submit_runs_concurrently_without_threads(self):
+        # 20 个 0.3 秒的请求由一个线程提交，总耗时远小于串行的 6 秒
+        start = time.monotonic()
+        futures = [self.engine.submit(self.url, pool_key='acc') for _ in range(20)]
+        results = [future.result(10) for future in futures]
+        self.assertLess(time.monotonic() - start, 3)
+        self.assertTrue(all(r.status_code == 200 for r in results))
+
+    def test_connection_error_mapped(self):
+        import requests
+        with self.assertRaises(requests.ConnectionError):
+            self.engine.get('http://127.0.0.1:1/', timeout=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
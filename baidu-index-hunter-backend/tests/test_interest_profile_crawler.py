@@ -57,7 +57,7 @@ class TestInterestProfileCrawler(unittest.TestCase):
             
             self.assertIsNotNone(result)
             self.assertEqual(result['status'], 0)
-            self.crawler.cookie_rotator.report_cookie_status.assert_called_with('account_1', True)
+            self.crawler.cookie_rotator.report_cookie_status.assert_called_with('account_1', True, endpoint='interest_profile')
 
     def test_prepare_tasks(self):
         keywords = ['a', 'b', 'c', 'd', 'e', 'f']
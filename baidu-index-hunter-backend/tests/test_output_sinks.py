@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.services.output_sinks import CsvSink, ParquetSink, create_sink
+
+
+class TestOutputSinks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = os.path.join(self.tmp.name, 'search_index_x_data')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_create_sink_by_format(self):
+        self.assertIsInstance(create_sink('parquet', self.base), ParquetSink)
+        self.assertIsInstance(create_sink('csv', self.base), CsvSink)
+        # 其他格式先写 CSV，结束后再转换
+        self.assertIsInstance(create_sink('excel', self.base), CsvSink)
+
+    def test_parquet_appends_row_groups_with_typed_columns(self):
+        sink = ParquetSink(self.base)
+        sink.write(pd.DataFrame({'关键词': ['a', 'b'], '搜索指数': [1, 2], '同比': [0.5, None]}))
+        # 后续批次：整数列出现空值、列顺序不同、多出一列
+        sink.write(pd.DataFrame({'同比': [0.1], '搜索指数': [None], '关键词': ['c'], 'extra': [1]}))
+        sink.close()
+
+        parquet = pq.ParquetFile(sink.path)
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+        schema = parquet.schema_arrow
+        self.assertEqual(str(schema.field('搜索指数').type), 'int64')
+        self.assertEqual(str(schema.field('同比').type), 'double')
+        df = pd.read_parquet(sink.path)
+        self.assertEqual(df['关键词'].tolist(), ['a', 'b', 'c'])
+        self.assertTrue(pd.isna(df['搜索指数'].iloc[2]))
+        self.assertNotIn('extra', df.columns)
+
+    def test_parquet_declared_types_keep_mixed_batches(self):
+        sink = ParquetSink(self.base, column_types={'整体同比': 'string', '占比': 'float64'})
+        sink.write(pd.DataFrame({'关键词': ['a'], '整体同比': [12], '占比': [3]}))
+        sink.write(pd.DataFrame({'关键词': ['b'], '整体同比': ['-'], '占比': [2.75]}))
+        sink.close()
+        df = pd.read_parquet(sink.path)
+        self.assertEqual(df['整体同比'].tolist(), ['12', '-'])
+        self.assertEqual(df['占比'].tolist(), [3.0, 2.75])
+
+    def test_parquet_widens_undeclared_columns_into_new_part(self):
+        sink = ParquetSink(self.base)
+        sink.write(pd.DataFrame({'关键词': ['a'], '整体同比': [12], '占比': [3]}))
+        first_path = sink.path
+        # 整数列出现小数、数值列出现文本：不截断、不置空
+        sink.write(pd.DataFrame({'关键词': ['b'], '整体同比': ['-'], '占比': [2.75]}))
+        sink.write(pd.DataFrame({'关键词': ['c'], '整体同比': [5], '占比': ['']}))
+        sink.close()
+        self.assertNotEqual(sink.path, first_path)
+        self.assertTrue(sink.path.endswith('_data_part1.parquet'))
+
+        first = pd.read_parquet(first_path)
+        self.assertEqual(first['整体同比'].tolist(), [12])
+        widened = pq.ParquetFile(sink.path).schema_arrow
+        self.assertEqual(str(widened.field('整体同比').type), 'string')
+        self.assertEqual(str(widened.field('占比').type), 'double')
+        second = pd.read_parquet(sink.path)
+        self.assertEqual(second['整体同比'].tolist(), ['-', '5'])
+        self.assertEqual(second['占比'].iloc[0], 2.75)
+        self.assertTrue(pd.isna(second['占比'].iloc[1]))
+
+    def test_parquet_resume_writes_new_part(self):
+        first = ParquetSink(self.base)
+        first.write(pd.DataFrame({'a': [1]}))
+        first.close()
+        second = ParquetSink(self.base)
+        self.assertTrue(second.path.endswith('_data_part1.parquet'))
+
+    def test_csv_sink_writes_header_once(self):
+        sink = CsvSink(self.base)
+        sink.write(pd.DataFrame({'a': [1], 'b': ['x']}))
+        sink.write(pd.DataFrame({'a': [2], 'b': ['y']}))
+        sink.close()
+        # 续写（新进程）不重复表头
+        resumed = CsvSink(self.base)
+        resumed.write(pd.DataFrame({'a': [3], 'b': ['z']}))
+        resumed.close()
+        df = pd.read_csv(sink.path, encoding='utf-8-sig')
+        self.assertEqual(df['a'].tolist(), [1, 2, 3])
+        self.assertEqual(list(df.columns), ['a', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import threading
+import unittest
+from unittest.mock import patch
+from src.engine.crypto.ptbk_service import PtbkKeyCache, PtbkKeyService
+
+class TestPtbkKeyCache(unittest.TestCase):
+    def test_lru_eviction_and_stats(self):
+        cache = PtbkKeyCache(maxsize=2, ttl=60)
+        cache.put('a', 'ka')
+        cache.put('b', 'kb')
+        self.assertEqual(cache.get('a'), 'ka')
+        cache.put('c', 'kc')  # 淘汰最久未使用的 b
+        self.assertIsNone(cache.get('b'))
+        stats = cache.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['evictions'], 1)
+
+    def test_ttl_expiry(self):
+        cache = PtbkKeyCache(maxsize=10, ttl=0.01)
+        cache.put('a', 'ka')
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('a'))
+
+class TestPtbkKeyService(unittest.TestCase):
+    def test_get_key_fetches_once(self):
+        service = PtbkKeyService()
+        with patch.object(service, 'fetch_key', return_value='key123') as mock_fetch:
+            self.assertEqual(service.get_key('u1', {}), 'key123')
+            self.assertEqual(service.get_key('u1', {}), 'key123')
+            mock_fetch.assert_called_once()
+
+    def test_prefetch_is_shared_with_get_key(self):
+        service = PtbkKeyService()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch(uniqid, cookie, max_retries=3):
+            started.set()
+            release.wait(2)
+            return 'key456'
+
+        with patch.object(service, 'fetch_key', side_effect=slow_fetch) as mock_fetch:
+            service.prefetch('u2', {})
+            started.wait(2)
+            threading.Timer(0.05, release.set).start()
+            self.assertEqual(service.get_key('u2', {}), 'key456')
+            self.assertEqual(mock_fetch.call_count, 1)
+        self.assertEqual(service.get_stats()['prefetch_count'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import patch
+from src.utils.rate_limiter import TokenBucket, CookieRateLimiter
+
+class TestTokenBucket(unittest.TestCase):
+    def test_first_request_passes_then_waits(self):
+        bucket = TokenBucket(1.0, 1.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        wait = bucket.reserve()
+        self.assertGreater(wait, 0.9)
+        self.assertLessEqual(wait, 1.0)
+        stats = bucket.get_stats()
+        self.assertEqual(stats['requests'], 2)
+        self.assertAlmostEqual(stats['max_wait'], wait, places=2)
+
+    def test_failure_backoff_is_per_bucket(self):
+        bucket = TokenBucket(1.0, 1.0, failure_multiplier=2, max_consecutive_failures=2, default_interval=1.0)
+        bucket.reserve()
+        self.assertEqual(bucket.report_failure(), 0.0)
+        self.assertEqual(bucket.report_failure(), 4.0)
+        self.assertGreaterEqual(bucket.reserve(), 3.9)
+        bucket.report_success()
+        self.assertEqual(bucket.get_stats()['consecutive_failures'], 0)
+
+class TestCookieRateLimiter(unittest.TestCase):
+    def test_accounts_do_not_block_each_other(self):
+        limiter = CookieRateLimiter(min_interval=5, max_interval=5, default_interval=5, capacity=1)
+        with patch('src.utils.rate_limiter.time.sleep') as mock_sleep:
+            self.assertEqual(limiter.wait('a'), 0.0)
+            self.assertEqual(limiter.wait('b'), 0.0)
+            self.assertGreater(limiter.wait('a'), 4.9)
+            mock_sleep.assert_called_once()
+        self.assertEqual(set(limiter.get_stats().keys()), {'a', 'b'})
+
+    def test_per_endpoint_buckets(self):
+        limiter = CookieRateLimiter(min_interval=5, max_interval=5, per_endpoint=True)
+        with patch('src.utils.rate_limiter.time.sleep'):
+            self.assertEqual(limiter.wait('a', 'search'), 0.0)
+            self.assertEqual(limiter.wait('a', 'feed'), 0.0)
+        self.assertIn('a:search', limiter.get_stats())
+
+    def test_crawler_reports_to_the_bucket_it_waits_on(self):
+        from src.engine.spider.word_graph_crawler import WordGraphCrawler
+        limiter = CookieRateLimiter(min_interval=1, max_interval=1, per_endpoint=True)
+        crawler = WordGraphCrawler()
+        with patch('src.engine.spider.base_crawler.cookie_rate_limiter', limiter), \
+             patch('src.services.cookie_rotator.cookie_rate_limiter', limiter), \
+             patch.object(crawler.cookie_rotator, 'mark_cookie_valid'):
+            crawler._wait_rate_limit('a')
+            crawler.cookie_rotator.report_cookie_status('a', True, endpoint=crawler.task_type)
+            crawler._report_cookie_status('a', True)
+        self.assertEqual(set(limiter.get_stats()), {f'a:{crawler.task_type}'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+from src.services.region_service import RegionManager
+
+
+@unittest.skipIf(fakeredis is None, "需要 fakeredis")
+class TestRegionCache(unittest.TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        with patch('src.services.region_service.redis.Redis', return_value=self.redis):
+            self.manager = RegionManager()
+        self.manager.repo = MagicMock()
+        self.redis.set(RegionManager.REDIS_CITIES_KEY, json.dumps({
+            '514': {'code': '514', 'name': '北京', 'province_code': '911', 'province_name': '北京'},
+            '57': {'code': '57', 'name': '上海', 'province_code': '912', 'province_name': '上海'},
+        }, ensure_ascii=False))
+
+    def test_lookups_hit_memory_after_first_load(self):
+        self.assertEqual(self.manager.get_city_name_by_code('514'), '北京')
+        self.manager.redis_client = MagicMock(wraps=self.redis)
+        for _ in range(100):
+            self.assertEqual(self.manager.get_city_name_by_code(57), '上海')
+            self.assertEqual(self.manager.get_city_code_by_name('北京'), '514')
+        self.manager.redis_client.get.assert_not_called()
+
+    def test_version_bump_invalidates_other_instances(self):
+        with patch('src.services.region_service.redis.Redis', return_value=self.redis):
+            other = RegionManager()
+        self.assertEqual(other.get_city_name_by_code('514'), '北京')
+
+        self.redis.set(RegionManager.REDIS_CITIES_KEY, json.dumps({
+            '514': {'code': '514', 'name': '北京市', 'province_code': '911', 'province_name': '北京'},
+        }, ensure_ascii=False))
+        self.manager.invalidate_cache()
+
+        # 版本比对间隔内仍使用旧缓存
+        self.assertEqual(other.get_city_name_by_code('514'), '北京')
+        other._last_version_check = 0
+        self.assertEqual(other.get_city_name_by_code('514'), '北京市')
+
+    def test_sync_bumps_version(self):
+        city = MagicMock(city_code='1', city_name='广州', province_code='913', province_name='广东')
+        self.manager.repo.get_all_cities.return_value = [city]
+        self.manager._sync_cities()
+        self.assertEqual(self.redis.get(RegionManager.REDIS_VERSION_KEY), '1')
+        self.assertEqual(self.manager.get_city_name_by_code('1'), '广州')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from src.core.config import BAIDU_INDEX_API
+from src.engine.core.http_engine import AsyncHttpEngine, HttpResponse
+from src.engine.spider.search_index_crawler import SearchIndexCrawler
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(0.3)
+        body = b'{"status": 0, "data": {"uniqid": "u", "userIndexes": [{}]}}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _steps(url):
+    try:
+        response = yield {'url': url, 'timeout': 5}
+    except requests.ConnectionError:
+        return 'error'
+    return response.status_code
+
+
+class TestSyncDriver(unittest.TestCase):
+    def test_responses_and_errors_sent_back(self):
+        crawler = SearchIndexCrawler()
+        crawler.http_engine = MagicMock(name='engine')
+        crawler.http_engine.get.return_value = HttpResponse(200, '{}')
+        self.assertEqual(crawler._run_request_steps(_steps('http://x/')), 200)
+        crawler.http_engine.get.assert_called_once_with(url='http://x/', timeout=5)
+
+        crawler.http_engine.get.side_effect = requests.ConnectionError('down')
+        self.assertEqual(crawler._run_request_steps(_steps('http://x/')), 'error')
+
+    def test_sync_engine_submits_process_task(self):
+        crawler = SearchIndexCrawler()
+        self.assertFalse(crawler.request_pipeline_enabled)
+        executor = MagicMock()
+        crawler._submit_task(executor, 'task')
+        executor.submit.assert_called_once_with(crawler._process_task, 'task')
+
+
+class TestAsyncPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}/'
+        cls.engine = AsyncHttpEngine(max_inflight=50)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.crawler = SearchIndexCrawler()
+        self.crawler.http_engine = self.engine
+        self.crawler.retry_mode = 'deferred'
+
+    def test_inflight_not_bound_by_threads(self):
+        # 20 个 0.3 秒的请求只用 2 个线程：按线程阻塞等待至少需要 3 秒
+        self.assertTrue(self.crawler.request_pipeline_enabled)
+        self.assertEqual(self.crawler._get_stream_window(), 50)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            start = time.monotonic()
+            futures = [self.crawler._submit_request_steps(executor, _steps(self.url)) for _ in range(20)]
+            results = [future.result(10) for future in futures]
+        self.assertLess(time.monotonic() - start, 2.5)
+        self.assertEqual(results, [200] * 20)
+
+    def test_search_task_through_pipeline(self):
+        crawler = self.crawler
+        crawler._get_cookie_dict = MagicMock(return_value=('acc', {'BDUSS': 'x'}))
+        crawler._release_cookie = MagicMock()
+        crawler._wait_rate_limit = MagicMock(return_value=0)
+        crawler._get_cipher_text = MagicMock(return_value='cipher')
+        crawler._process_search_index_data = MagicMock(return_value=([{'日期': '2024-01-01'}], {'关键词': 'kw'}))
+        task = ('kw', '0', '全国', '2024-01-01', '2024-01-01')
+        with patch.dict(BAIDU_INDEX_API, search_url=self.url), ThreadPoolExecutor(max_workers=1) as executor:
+            result = crawler._submit_task(executor, task).result(10)
+        self.assertEqual(result, ('kw_0_2024-01-01_2024-01-01', [{'日期': '2024-01-01'}], {'关键词': 'kw'}, True))
+        crawler._release_cookie.assert_called_once_with('acc')
+        data = crawler._process_search_index_data.call_args[0][0]
+        self.assertEqual(data['data']['uniqid'], 'u')
+
+    def test_queue_time_not_counted_in_timeout(self):
+        engine = AsyncHttpEngine(max_inflight=1)
+        try:
+            # 第二个请求排队约 0.3 秒，加上自身 0.3 秒超过 0.5 秒的超时，但不应超时
+            futures = [engine.submit(self.url, timeout=0.5) for _ in range(2)]
+            responses = [future.result(5) for future in futures]
+        finally:
+            engine.close()
+        self.assertEqual([r.status_code for r in responses], [200, 200])
+        self.assertTrue(all(r.elapsed < 0.5 for r in responses))
+
+
+if __name__ == '__main__':
+    unittest.main()
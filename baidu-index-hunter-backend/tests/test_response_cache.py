@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.engine.crypto.ptbk_service import ptbk_key_service
+from src.engine.spider.base_crawler import ReplayMissError
+from src.engine.spider.search_index_crawler import SearchIndexCrawler
+from src.services.response_cache import ResponseCache, make_cache_key
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.tmp_dir, ttls={'search_index': 60, 'word_graph': 0})
+        self.params = {'area': 0, 'words': ['a', 'b'], 'startDate': '2023-01-01', 'endDate': '2023-01-31'}
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_key_normalizes_params(self):
+        key = make_cache_key('search_index', self.params)
+        self.assertEqual(key, make_cache_key('search_index', dict(self.params, area='0', extra=None)))
+        self.assertNotEqual(key, make_cache_key('search_index', dict(self.params, words=['b', 'a'])))
+        self.assertNotEqual(key, make_cache_key('feed_index', self.params))
+
+    def test_round_trip_and_reopen(self):
+        payload = {'status': 0, 'data': {'uniqid': 'u1', 'userIndexes': ['x' * 100]}}
+        self.assertIsNone(self.cache.get('search_index', self.params))
+        self.assertTrue(self.cache.put('search_index', self.params, payload))
+        self.assertEqual(self.cache.get('search_index', self.params), payload)
+        self.cache.close()
+
+        reopened = ResponseCache(self.tmp_dir, ttls={'search_index': 60})
+        self.assertEqual(reopened.get('search_index', self.params), payload)
+        reopened.close()
+
+    def test_identical_payloads_stored_once(self):
+        payload = {'data': 'same'}
+        self.cache.put('search_index', self.params, payload)
+        self.cache.put('search_index', dict(self.params, area=1), payload)
+        self.assertEqual(self.cache.get_stats()['dedup_writes'], 1)
+        segment = os.path.join(self.tmp_dir, 'segments', '000001.seg')
+        size = os.path.getsize(segment)
+        self.cache.put('search_index', dict(self.params, area=2), payload)
+        self.assertEqual(os.path.getsize(segment), size)
+
+    def test_ttl_per_endpoint(self):
+        self.cache.put('search_index', self.params, {'v': 1})
+        self.cache.put('word_graph', self.params, {'v': 2})
+        later = time.time() + 120
+        with patch('src.services.response_cache.time.time', return_value=later):
+            self.assertIsNone(self.cache.get('search_index', self.params))
+            self.assertEqual(self.cache.get('search_index', self.params, ignore_ttl=True), {'v': 1})
+            # TTL 为 0 的接口永不过期
+            self.assertEqual(self.cache.get('word_graph', self.params), {'v': 2})
+            self.assertEqual(self.cache.purge_expired(), 1)
+
+    def test_segments_roll_over(self):
+        cache = ResponseCache(os.path.join(self.tmp_dir, 'small'), segment_max_bytes=64)
+        for i in range(5):
+            cache.put('search_index', {'area': i}, {'data': os.urandom(40).hex()})
+        segments = os.listdir(os.path.join(self.tmp_dir, 'small', 'segments'))
+        self.assertGreater(len(segments), 1)
+        for i in range(5):
+            self.assertIsNotNone(cache.get('search_index', {'area': i}))
+        cache.close()
+
+
+class TestCrawlerCachedFetch(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.tmp_dir)
+        patcher = patch('src.engine.spider.base_crawler.get_response_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.crawler = SearchIndexCrawler()
+        self.crawler.response_cache_enabled = True
+        self.params = {'area': 0, 'words': ['kw'], 'startDate': '2023-01-01', 'endDate': '2023-01-31'}
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_second_fetch_served_from_cache(self):
+        fetch = MagicMock(return_value={'word': 'kw'})
+        self.assertEqual(self.crawler._cached_fetch('word_graph', self.params, fetch), {'word': 'kw'})
+        self.assertEqual(self.crawler._cached_fetch('word_graph', self.params, fetch), {'word': 'kw'})
+        fetch.assert_called_once()
+
+    def test_index_fetch_restores_ptbk_key(self):
+        data = {'status': 0, 'data': {'uniqid': 'cache-uniqid', 'userIndexes': []}}
+        fetch = MagicMock(return_value=(data, {'BDUSS': 'x'}))
+        with patch.object(ptbk_key_service, 'get_key', return_value='ptbk-key') as get_key:
+            self.assertEqual(self.crawler._cached_index_fetch('search_index', self.params, fetch),
+                             (data, {'BDUSS': 'x'}))
+        get_key.assert_called_once_with('cache-uniqid', {'BDUSS': 'x'})
+
+        ptbk_key_service.cache.clear()
+        self.crawler.crawl_mode = 'replay'
+        self.assertEqual(self.crawler._cached_index_fetch('search_index', self.params, fetch), (data, {}))
+        fetch.assert_called_once()
+        self.assertEqual(ptbk_key_service.cache.get('cache-uniqid'), 'ptbk-key')
+
+    def test_replay_miss_does_not_fetch(self):
+        self.crawler.crawl_mode = 'replay'
+        fetch = MagicMock()
+        with self.assertRaises(ReplayMissError):
+            self.crawler._cached_fetch('word_graph', self.params, fetch)
+        fetch.assert_not_called()
+        self.assertFalse(self.crawler.deferred_retry_enabled)
+
+    def test_disabled_cache_always_fetches(self):
+        self.crawler.response_cache_enabled = False
+        fetch = MagicMock(return_value={'word': 'kw'})
+        self.crawler._cached_fetch('word_graph', self.params, fetch)
+        self.crawler._cached_fetch('word_graph', self.params, fetch)
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(self.cache.get_stats()['writes'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
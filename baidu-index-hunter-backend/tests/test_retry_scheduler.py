@@ -0,0 +1,146 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from src.engine.spider.search_index_crawler import SearchIndexCrawler
+from src.engine.spider.word_graph_crawler import WordGraphCrawler
+from src.services.completion_index import CompletionSet
+from src.services.retry_scheduler import RetryScheduler
+from src.utils.decorators import enable_deferred_retries, retry
+from src.utils.rate_limiter import RateLimiter
+
+
+class TestRetryScheduler(unittest.TestCase):
+    def test_exponential_backoff_until_exhausted(self):
+        scheduler = RetryScheduler(max_retries=3, base_delay=2, backoff=2, max_delay=5)
+        self.assertEqual(scheduler.schedule(['a'], 'task', now=0), 2)
+        self.assertEqual(scheduler.schedule(['a'], 'task', now=0), 4)
+        self.assertEqual(scheduler.schedule(['a'], 'task', now=0), 5)
+        self.assertIsNone(scheduler.schedule(['a'], 'task', now=0))
+        self.assertEqual(scheduler.attempts(['a']), 0)
+
+    def test_pop_due_in_due_order(self):
+        scheduler = RetryScheduler(max_retries=2, base_delay=1)
+        scheduler.schedule(['late'], 'late', now=10)
+        scheduler.schedule(['early'], 'early', now=0)
+        self.assertEqual(scheduler.pop_due(now=0.5), [])
+        self.assertAlmostEqual(scheduler.next_delay(now=0.5), 0.5)
+        self.assertEqual(scheduler.pop_due(now=20), ['early', 'late'])
+        self.assertEqual(len(scheduler), 0)
+
+    def test_snapshot_restore_defers_until_due(self):
+        scheduler = RetryScheduler(max_retries=3, base_delay=10)
+        scheduler.schedule(['k1', 'k2'], 'task', now=100)
+        state = scheduler.snapshot()
+
+        restored = RetryScheduler(max_retries=3, base_delay=10)
+        restored.restore(state)
+        self.assertEqual(restored.attempts(['k1', 'k2']), 1)
+        self.assertTrue(restored.defer(['k1', 'k2'], 'task', now=105))
+        self.assertFalse(restored.defer(['k1', 'k2'], 'task', now=111))
+        self.assertFalse(restored.defer(['other'], 'task', now=105))
+        # 恢复后继续累计重试次数
+        self.assertEqual(restored.schedule(['k1', 'k2'], 'task', now=111), 20)
+
+
+class TestDeferredRetryWorkers(unittest.TestCase):
+    def test_decorator_raises_immediately_in_deferred_thread(self):
+        calls = []
+
+        @retry(max_retries=3, delay=5)
+        def flaky():
+            calls.append(1)
+            raise ValueError('boom')
+
+        with patch('src.utils.decorators.time.sleep') as mock_sleep:
+            with ThreadPoolExecutor(max_workers=1, initializer=enable_deferred_retries) as executor:
+                with self.assertRaises(ValueError):
+                    executor.submit(flaky).result()
+        self.assertEqual(len(calls), 1)
+        mock_sleep.assert_not_called()
+
+    def test_rate_limiter_failure_does_not_sleep(self):
+        limiter = RateLimiter(min_interval=1, max_interval=1, default_interval=1)
+        limiter.failure_multiplier = 2
+        limiter.last_request_time = time.time()
+        with patch('src.utils.rate_limiter.time.sleep') as mock_sleep:
+            limiter.report_failure()
+            mock_sleep.assert_not_called()
+            # 退避由下一次 wait 按连续失败次数放大间隔承担
+            waited = limiter.wait()
+        self.assertGreater(waited, 1.9)
+        mock_sleep.assert_called_once()
+
+    def test_decorator_does_not_report_to_global_limiter(self):
+        @retry(max_retries=0)
+        def fail():
+            raise ValueError('boom')
+
+        with patch('src.utils.rate_limiter.rate_limiter') as limiter:
+            with self.assertRaises(ValueError):
+                fail()
+        limiter.report_failure.assert_not_called()
+
+    def test_task_items_retried_from_queue(self):
+        crawler = WordGraphCrawler()
+        crawler.max_workers = 2
+        crawler.completed_keywords = CompletionSet()
+        crawler.failed_keywords = CompletionSet()
+        crawler.completed_tasks = 0
+        crawler.failed_tasks = 0
+        crawler.progress_manager = None
+        crawler._flush_buffer = MagicMock()
+        crawler._update_task_db_status = MagicMock()
+        crawler._maybe_report_progress = MagicMock()
+        crawler.retry_mode = 'deferred'
+        crawler.retry_scheduler = RetryScheduler(max_retries=2, base_delay=0.05)
+
+        attempts = {}
+        lock = threading.Lock()
+
+        def process(task):
+            with lock:
+                attempts[task['keyword']] = attempts.get(task['keyword'], 0) + 1
+                count = attempts[task['keyword']]
+            if task['keyword'] == 'flaky' and count == 1:
+                raise Exception('temporary')
+            if task['keyword'] == 'bad':
+                raise Exception('permanent')
+            return pd.DataFrame([{'kw': task['keyword']}])
+
+        crawler._process_task = process
+        tasks = [{'keyword': kw, 'date': '20240101'} for kw in ('ok', 'flaky', 'bad')]
+        crawler._run_task_items(tasks, crawler._task_keys, lambda task, df: None)
+
+        self.assertEqual(attempts, {'ok': 1, 'flaky': 2, 'bad': 3})
+        self.assertIn('flaky_20240101', crawler.completed_keywords)
+        self.assertIn('bad_20240101', crawler.failed_keywords)
+        self.assertEqual(crawler.failed_tasks, 1)
+        self.assertEqual(crawler.retry_scheduler.snapshot(), {})
+
+    def test_retry_state_in_checkpoint(self):
+        crawler = WordGraphCrawler()
+        crawler.retry_scheduler.schedule(['kw_20240101'], {'keyword': 'kw'})
+        data = crawler._get_checkpoint_data()
+        self.assertEqual(data['retry_state']['kw_20240101'][0], 1)
+
+        resumed = WordGraphCrawler()
+        resumed._restore_from_checkpoint(data)
+        self.assertEqual(resumed.retry_scheduler.attempts(['kw_20240101']), 1)
+
+    def test_scheduler_uses_request_method_budget(self):
+        # 延迟重试与装饰器内重试的预算一致：_get_search_index 声明 max_retries=5, delay=2
+        crawler = SearchIndexCrawler()
+        scheduler = crawler.retry_scheduler
+        self.assertEqual(scheduler.max_retries, 5)
+        delays = [scheduler.schedule(['k'], 'task', now=0) for _ in range(6)]
+        self.assertEqual(delays, [2, 4, 8, 16, 32, None])
+        self.assertEqual(WordGraphCrawler().retry_scheduler.max_retries, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
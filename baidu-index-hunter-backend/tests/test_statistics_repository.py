@@ -0,0 +1,39 @@
+import unittest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+from sqlalchemy.dialects import mysql
+from src.data.repositories.statistics_repository import StatisticsRepository
+
+class TestTaskStatisticsUpsert(unittest.TestCase):
+    def setUp(self):
+        self.repo = StatisticsRepository()
+
+    def test_normalize_accepts_processor_and_column_keys(self):
+        cn = self.repo._normalize_task_statistics({'task_id': 't', '关键词': 'kw', '城市代码': 0, '城市': '全国'})
+        en = self.repo._normalize_task_statistics({'task_id': 't', 'keyword': 'kw', 'city_code': '0', 'city_name': '全国'})
+        self.assertEqual(cn['city_code'], '0')
+        for key in ('task_id', 'keyword', 'city_code', 'city_name'):
+            self.assertEqual(cn[key], en[key])
+        self.assertEqual(self.repo._normalize_task_statistics({'task_id': 't'})['city_code'], '')
+
+    def test_upsert_statement(self):
+        sql = str(self.repo._build_task_statistics_upsert().compile(dialect=mysql.dialect()))
+        self.assertIn('ON DUPLICATE KEY UPDATE', sql)
+        self.assertNotIn('task_id = VALUES', sql)
+
+    def test_batch_is_chunked(self):
+        session = MagicMock()
+
+        @contextmanager
+        def fake_scope():
+            yield session
+
+        stats = [{'task_id': 't', '关键词': f'kw{i}', '城市代码': 0} for i in range(5)]
+        with patch('src.data.repositories.statistics_repository.session_scope', fake_scope):
+            self.repo.save_task_statistics_batch(stats, chunk_size=2)
+        self.assertEqual(session.execute.call_count, 3)
+        self.assertEqual(len(session.execute.call_args_list[0][0][1]), 2)
+        session.commit.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
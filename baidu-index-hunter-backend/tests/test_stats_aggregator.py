@@ -0,0 +1,37 @@
+import unittest
+from unittest.mock import MagicMock
+from src.services.stats_aggregator import SpiderStatsAggregator
+
+class TestSpiderStatsAggregator(unittest.TestCase):
+    def setUp(self):
+        self.repo = MagicMock()
+        self.aggregator = SpiderStatsAggregator(flush_interval=60, repository=self.repo)
+
+    def tearDown(self):
+        self.aggregator._stop_event.set()
+
+    def test_deltas_are_merged_per_day_and_type(self):
+        self.aggregator.increment_crawled_count('search_index', 10)
+        self.aggregator.increment_crawled_count('search_index', 5)
+        self.aggregator.record_task_summary('search_index', total_delta=1, completed_delta=1, duration=30)
+        self.aggregator.increment_crawled_count('feed_index', 3)
+
+        self.assertEqual(self.aggregator.flush(), 2)
+        rows = {r['task_type']: r for r in self.repo.apply_spider_statistics_deltas.call_args[0][0]}
+        self.assertEqual(rows['search_index']['total_crawled_items'], 15)
+        self.assertEqual(rows['search_index']['completed_tasks'], 1)
+        self.assertEqual(rows['search_index']['duration_sum'], 30)
+        self.assertEqual(rows['feed_index']['total_crawled_items'], 3)
+        self.assertEqual(self.aggregator.flush(), 0)
+
+    def test_failed_flush_keeps_deltas(self):
+        self.repo.apply_spider_statistics_deltas.side_effect = [Exception("db down"), None]
+        self.aggregator.increment_crawled_count('search_index', 7)
+        self.assertEqual(self.aggregator.flush(), 0)
+        self.aggregator.increment_crawled_count('search_index', 1)
+        self.assertEqual(self.aggregator.flush(), 1)
+        row = self.repo.apply_spider_statistics_deltas.call_args[0][0][0]
+        self.assertEqual(row['total_crawled_items'], 8)
+
+if __name__ == '__main__':
+    unittest.main()
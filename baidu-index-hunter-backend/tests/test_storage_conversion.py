@@ -0,0 +1,90 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.services.storage_service import StorageService
+
+
+class TestStreamingConversion(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, 'out.csv')
+        self.df = pd.DataFrame({
+            '关键词': [f'kw{i}' for i in range(25)],
+            '日期': pd.date_range('2024-01-01', periods=25).strftime('%Y-%m-%d'),
+            '搜索指数': np.arange(25, dtype=np.int64) * 10,
+            '同比': [None if i % 7 == 0 else i / 10 for i in range(25)],
+        })
+        # 中间块的整数列含空值，验证跨块类型一致
+        self.df['搜索指数'] = self.df['搜索指数'].astype(object)
+        self.df.loc[12, '搜索指数'] = None
+        self.df.to_csv(self.csv_path, index=False, encoding='utf-8-sig')
+        self.service = StorageService()
+        self.expected = pd.read_csv(self.csv_path, encoding='utf-8-sig')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _convert(self, fmt):
+        path = self.service.convert_csv_to_format(self.csv_path, fmt, chunk_size=10)
+        self.assertNotEqual(path, self.csv_path)
+        self.assertFalse(os.path.exists(path + '.tmp'))
+        return path
+
+    def test_parquet(self):
+        result = pd.read_parquet(self._convert('parquet'))
+        self.assertEqual(len(result), 25)
+        self.assertEqual(result['搜索指数'].isna().sum(), 1)
+        self.assertEqual(result['搜索指数'].iloc[24], 240)
+
+    def test_parquet_numeric_keywords_then_text(self):
+        # 首块关键词全为数字代码、后续块出现文本时，整列按字符串写出而不是回退 CSV
+        df = pd.DataFrame({'关键词': [str(600000 + i) for i in range(15)] + ['abc'] * 10,
+                           '搜索指数': range(25)})
+        df.to_csv(self.csv_path, index=False, encoding='utf-8-sig')
+        result = pd.read_parquet(self._convert('parquet'))
+        self.assertEqual(result['关键词'].iloc[0], '600000')
+        self.assertEqual(result['关键词'].iloc[24], 'abc')
+        self.assertEqual(result['搜索指数'].sum(), sum(range(25)))
+
+    def test_json(self):
+        with open(self._convert('json'), encoding='utf-8') as f:
+            records = json.load(f)
+        self.assertEqual(len(records), 25)
+        self.assertEqual(records[0]['关键词'], 'kw0')
+        self.assertIsNone(records[0]['同比'])
+
+    def test_sql(self):
+        conn = sqlite3.connect(self._convert('sql'))
+        try:
+            count = conn.execute('SELECT COUNT(*) FROM data').fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(count, 25)
+
+    def test_excel_splits_sheets_at_row_limit(self):
+        with patch('src.services.storage_service.EXCEL_MAX_ROWS', 11):
+            path = self._convert('excel')
+        sheets = pd.read_excel(path, sheet_name=None)
+        self.assertEqual(list(sheets), ['Sheet1', 'Sheet2', 'Sheet3'])
+        combined = pd.concat(sheets.values(), ignore_index=True)
+        self.assertEqual(len(combined), 25)
+        self.assertEqual(combined['关键词'].tolist(), self.expected['关键词'].tolist())
+
+    def test_dta(self):
+        result = pd.read_stata(self._convert('dta'))
+        self.assertEqual(len(result), 25)
+
+    def test_empty_csv_is_not_converted(self):
+        pd.DataFrame(columns=['a']).to_csv(self.csv_path, index=False)
+        self.assertEqual(self.service.convert_csv_to_format(self.csv_path, 'parquet'), self.csv_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from src.engine.spider.base_crawler import BaseCrawler
+
+class _Crawler(BaseCrawler):
+    def __init__(self):
+        super().__init__(task_type="search_index")
+        self.max_workers = 4
+
+    def _process_task(self, task):
+        return task
+
+class TestStreamingScheduler(unittest.TestCase):
+    def test_window_bounds_pending_tasks(self):
+        crawler = _Crawler()
+        produced = []
+        done = []
+
+        def tasks():
+            for i in range(100):
+                # 生成器领先已完成任务的数量不超过窗口
+                self.assertLessEqual(len(produced) - len(done), 3)
+                produced.append(i)
+                yield i
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            submitted = crawler._run_streaming(executor, tasks(), lambda f: done.append(f.result()), window=3)
+        self.assertEqual(submitted, 100)
+        self.assertEqual(sorted(done), list(range(100)))
+
+    def test_peek_tasks(self):
+        has_tasks, tasks = BaseCrawler._peek_tasks(iter([]))
+        self.assertFalse(has_tasks)
+        has_tasks, tasks = BaseCrawler._peek_tasks(x for x in [1, 2])
+        self.assertTrue(has_tasks)
+        self.assertEqual(list(tasks), [1, 2])
+
+    def test_error_in_callback_cancels_pending(self):
+        crawler = _Crawler()
+
+        def on_done(future):
+            raise RuntimeError("stop")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with self.assertRaises(RuntimeError):
+                crawler._run_streaming(executor, iter(range(50)), on_done, window=4)
+
+if __name__ == '__main__':
+    unittest.main()
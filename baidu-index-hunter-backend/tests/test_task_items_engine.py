@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from src.engine.spider.word_graph_crawler import WordGraphCrawler
+from src.services.completion_index import CompletionSet
+from src.services.retry_scheduler import RetryScheduler
+
+
+class TestTaskItemsEngine(unittest.TestCase):
+    def setUp(self):
+        self.crawler = WordGraphCrawler()
+        self.crawler.max_workers = 4
+        self.crawler.completed_keywords = CompletionSet()
+        self.crawler.failed_keywords = CompletionSet()
+        self.crawler.completed_tasks = 0
+        self.crawler.failed_tasks = 0
+        self.crawler.progress_manager = None
+        self.crawler.data_cache = []
+        self.crawler._flush_buffer = MagicMock()
+        self.crawler._update_task_db_status = MagicMock()
+        self.crawler._maybe_report_progress = MagicMock()
+        self.crawler.retry_scheduler = RetryScheduler(max_retries=2, base_delay=0.01)
+
+    def test_runs_concurrently_and_marks_keys(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def process(task):
+            with lock:
+                active.append(task)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(task)
+            if task['keyword'] == 'bad':
+                raise Exception('boom')
+            return pd.DataFrame([{'kw': task['keyword']}])
+
+        self.crawler._process_task = process
+        tasks = self.crawler._prepare_tasks(['a', 'b', 'c', 'bad'], ['20240101', '20240108'])
+        results = []
+        self.crawler._run_task_items(tasks, self.crawler._task_keys, lambda t, df: results.append(t))
+
+        self.assertGreater(max(peak), 1)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.crawler.completed_tasks, 6)
+        self.assertEqual(self.crawler.failed_tasks, 2)
+        self.assertIn('a_20240108', self.crawler.completed_keywords)
+        self.assertIn('bad_20240101', self.crawler.failed_keywords)
+
+    def test_resume_skips_completed_keys(self):
+        self.crawler.completed_keywords.update(['a_20240101', 'b_20240108'])
+        seen = []
+        self.crawler._process_task = lambda task: seen.append(task) or None
+        tasks = self.crawler._prepare_tasks(['a', 'b'], ['20240101', '20240108'])
+        executed = self.crawler._run_task_items(tasks, self.crawler._task_keys, lambda t, r: None)
+        self.assertEqual(executed, 2)
+        self.assertEqual(sorted(t['keyword'] + t['date'] for t in seen), ['a20240108', 'b20240101'])
+
+    def test_batch_keys_skip_only_fully_completed_batches(self):
+        self.crawler.completed_keywords.update(['x', 'y'])
+        seen = []
+        self.crawler._process_task = lambda batch: seen.append(batch) or None
+        self.crawler._run_task_items([['x', 'y'], ['y', 'z']], list, lambda t, r: None)
+        self.assertEqual(seen, [['y', 'z']])
+
+
+if __name__ == '__main__':
+    unittest.main()